@@ -0,0 +1,24 @@
+from typing import AsyncGenerator
+
+from litestar import Request
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.infrastructure.db.replica import SAFE_METHODS, ReplicaSessionLocal, client_key, read_your_writes, route_request
+
+
+
+async def provide_db(request: Request, db_primary: AsyncSession) -> AsyncGenerator[AsyncSession, None]:
+    """Sesión `db` de los handlers: réplica para lecturas seguras, primaria para el resto.
+
+    `db_primary` es la sesión del plugin (la que hace autocommit al responder).
+    """
+    if route_request(request.scope) == "replica":
+        async with ReplicaSessionLocal() as session:
+            yield session
+        return
+
+    yield db_primary
+
+    if request.method not in SAFE_METHODS:
+        # La ventana read-your-writes corre desde que terminó la escritura
+        read_your_writes.pin(client_key(request.scope))
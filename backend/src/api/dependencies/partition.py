@@ -0,0 +1,30 @@
+from litestar import Request
+from litestar.exceptions import NotAuthorizedException
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.infrastructure.db.repositories.document_repository import DocumentPartition
+from src.infrastructure.db.repositories.user_repository import UserRepository
+
+
+
+ADMIN_ROLE = "admin"
+
+
+async def provide_partition(request: Request, db: AsyncSession, include_archived: bool = False) -> DocumentPartition:
+    """Partición de documentos del usuario del token (AuthMiddleware); sin token, los documentos sin dueño.
+
+    El admin ve todos, pero lleva su propio id: sus subidas (y la búsqueda de
+    duplicados) son suyas, no sin dueño. `include_archived=true` suma el tier
+    frío a listas y búsquedas. El usuario se busca en cada request (el token trae
+    el username, no el id): así un usuario desactivado pierde el acceso al instante.
+    """
+    username = request.scope.get("user")
+    if not username:
+        return DocumentPartition(include_archived=include_archived)
+
+    user = await UserRepository(db).get_by_username(username)
+    if user is None or not user.is_active:
+        raise NotAuthorizedException("Usuario no válido")
+    return DocumentPartition(
+        owner_id=user.id, all_owners=request.scope.get("role") == ADMIN_ROLE, include_archived=include_archived
+    )
@@ -0,0 +1,86 @@
+from datetime import datetime
+from typing import Optional
+
+from litestar.exceptions import HTTPException
+from litestar.params import Parameter
+
+from src.infrastructure.db.models.document_tag import normalize_tags
+from src.infrastructure.db.repositories.document_repository import DocumentSearchFilters
+from src.application.document.services.counterparty_directory import counterparty_directory
+from src.utils.rut import normalize_rut
+
+
+
+FUZZY_COMPANY_MIN_SCORE = 0.6
+FUZZY_COMPANY_MAX_GAP = 0.2  # solo nombres casi tan parecidos como el mejor
+
+
+def _parse_date(value: Optional[str], name: str) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, "%Y-%m-%d")
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"{name} debe tener formato YYYY-MM-DD")
+
+
+def _parse_rut(value: Optional[str], name: str) -> Optional[str]:
+    if not value:
+        return None
+    rut = normalize_rut(value)
+    if not rut:
+        raise HTTPException(status_code=400, detail=f"{name} no es un RUT válido")
+    return rut
+
+
+async def provide_search_filters(
+    # "query" es un kwarg reservado de Litestar (el multidict completo)
+    text: Optional[str] = Parameter(query="query", default=None),
+    document_type: Optional[str] = None,
+    company: Optional[str] = None,
+    rut: Optional[str] = None,
+    company_rut: Optional[str] = None,
+    client_rut: Optional[str] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    min_amount: Optional[float] = None,
+    max_amount: Optional[float] = None,
+    tags: Optional[str] = None,
+    tags_mode: str = "all",
+    company_match: str = "fuzzy",
+) -> DocumentSearchFilters:
+    """Parámetros de búsqueda compartidos. `tags` va separado por comas; `tags_mode` es all (AND) o any (OR).
+
+    `company_match=fuzzy` busca `company` en el índice de trigramas de contrapartes y
+    suma sus RUTs al ILIKE por nombre (que sigue encontrando documentos sin RUT válido);
+    con `contains` solo se usa el ILIKE.
+    """
+    if tags_mode not in ("all", "any"):
+        raise HTTPException(status_code=400, detail="tags_mode debe ser 'all' o 'any'")
+    if company_match not in ("fuzzy", "contains"):
+        raise HTTPException(status_code=400, detail="company_match debe ser 'fuzzy' o 'contains'")
+
+    company_ruts = None
+    if company and company_match == "fuzzy":
+        matches = await counterparty_directory.fuzzy_search(
+            company, limit=None, min_score=FUZZY_COMPANY_MIN_SCORE
+        )
+        if matches:
+            best = matches[0][1]
+            company_ruts = [entry.rut for entry, score in matches if score >= best - FUZZY_COMPANY_MAX_GAP]
+
+    return DocumentSearchFilters(
+        query=text,
+        document_type=document_type,
+        company=company,
+        company_ruts=company_ruts,
+        rut=_parse_rut(rut, "rut"),
+        company_rut=_parse_rut(company_rut, "company_rut"),
+        client_rut=_parse_rut(client_rut, "client_rut"),
+        date_from=_parse_date(date_from, "date_from"),
+        date_to=_parse_date(date_to, "date_to"),
+        min_amount=min_amount,
+        max_amount=max_amount,
+        tags=normalize_tags(tags.split(",")) if tags else [],
+        tags_mode=tags_mode,
+    )
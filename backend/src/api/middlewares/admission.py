@@ -0,0 +1,155 @@
+import json
+import time
+from collections import defaultdict
+
+from litestar.types import ASGIApp, Scope, Receive, Send, Message
+
+from src.core.config.settings import env_vars
+from src.infrastructure.admission import Overloaded, upload_admission
+from src.infrastructure.db.session import get_db_session
+from src.infrastructure.db.repositories.analysis_job_repository import AnalysisJobRepository
+from src.infrastructure.metrics import metrics
+
+
+
+# (método, ruta) que pasan por control de admisión; el resto (/health, descargas) no se toca
+GATED_ROUTES = {("POST", "/upload")}
+BACKLOG_CACHE_SECONDS = 2.0
+UPLOAD_SLOT_KEY = "release_upload_slot"
+
+
+def release_upload_slot(scope: Scope) -> None:
+    """Libera antes de tiempo el cupo de `upload_admission` del request (el archivo ya se guardó)"""
+    release = scope.get("state", {}).get(UPLOAD_SLOT_KEY)
+    if release:
+        release()
+
+
+class AdmissionMiddleware:
+    """
+    Control de admisión para las subidas, antes de leer el cuerpo:
+
+    1. Content-Length sobre `upload_max_body_bytes` -> 413 (sin parsear el multipart).
+       Sin Content-Length (chunked) se cuentan los bytes al vuelo.
+    2. Más de `upload_max_per_client` subidas simultáneas del mismo cliente -> 429.
+    3. En modo "queue", backlog de analysis_job sobre `analysis_max_queue_depth` -> 503.
+    4. Concurrencia global (`upload_admission`): espera en cola o 503. El cupo se
+       libera al guardar el archivo (`release_upload_slot`), no tras el análisis inline.
+
+    Los rechazos llevan Retry-After.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self.per_client: dict[str, int] = defaultdict(int)
+        self._backlog = 0
+        self._backlog_checked_at = 0.0
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or (scope["method"], scope["path"].rstrip("/") or "/") not in GATED_ROUTES:
+            return await self.app(scope, receive, send)
+
+        headers = dict(scope["headers"])
+        content_length = headers.get(b"content-length")
+        if content_length and content_length.isdigit() and int(content_length) > env_vars.upload_max_body_bytes:
+            return await self._reject(send, 413, "body_too_large", "El archivo excede el tamaño máximo permitido")
+
+        client = scope["client"][0] if scope.get("client") else "unknown"
+        if self.per_client[client] >= env_vars.upload_max_per_client:
+            return await self._reject(
+                send, 429, "per_client", "Demasiadas subidas simultáneas desde este cliente",
+                retry_after=upload_admission.retry_after(),
+            )
+
+        if env_vars.analysis_mode == "queue" and await self._backlog_depth() >= env_vars.analysis_max_queue_depth:
+            return await self._reject(
+                send, 503, "backlog", "Cola de análisis llena, intenta más tarde", retry_after=30,
+            )
+
+        # Se cuenta antes de esperar en la cola: las subidas encoladas también ocupan cupo del cliente
+        self.per_client[client] += 1
+        try:
+            try:
+                await upload_admission.acquire()
+            except Overloaded as e:
+                # El controlador ya registró la métrica (queue_full / timeout)
+                return await self._reject(
+                    send, 503, e.reason, "Servidor ocupado, intenta más tarde", retry_after=e.retry_after, record=False,
+                )
+
+            started = time.monotonic()
+            released = False
+
+            def release() -> None:
+                nonlocal released
+                if not released:
+                    released = True
+                    upload_admission.release(time.monotonic() - started)
+
+            scope.setdefault("state", {})[UPLOAD_SLOT_KEY] = release
+            try:
+                await self._call_with_body_limit(scope, receive, send)
+            finally:
+                release()
+        finally:
+            self.per_client[client] -= 1
+            if not self.per_client[client]:
+                del self.per_client[client]
+
+    async def _call_with_body_limit(self, scope: Scope, receive: Receive, send: Send) -> None:
+        received = 0
+        exceeded = False
+        started_response = False
+
+        async def limited_receive() -> Message:
+            nonlocal received, exceeded
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > env_vars.upload_max_body_bytes:
+                    # Cortar la lectura: la app ve un cliente desconectado
+                    exceeded = True
+                    return {"type": "http.disconnect"}
+            return message
+
+        async def guarded_send(message: Message) -> None:
+            nonlocal started_response
+            if exceeded:
+                return  # Se reemplaza por el 413
+            started_response = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except Exception:
+            if not exceeded:
+                raise
+
+        if exceeded and not started_response:
+            await self._reject(send, 413, "body_too_large", "El archivo excede el tamaño máximo permitido")
+
+    async def _backlog_depth(self) -> int:
+        """Jobs pendientes, consultado a lo más cada BACKLOG_CACHE_SECONDS"""
+        if time.monotonic() - self._backlog_checked_at > BACKLOG_CACHE_SECONDS:
+            async with get_db_session() as session:
+                self._backlog = await AnalysisJobRepository(session).count_pending()
+            self._backlog_checked_at = time.monotonic()
+        return self._backlog
+
+    async def _reject(
+        self, send: Send, status: int, reason: str, detail: str, retry_after: int | None = None, record: bool = True
+    ) -> None:
+        if record:
+            metrics.increment("admission", gate="upload", outcome=reason)
+
+        body = json.dumps({"status_code": status, "detail": detail}, ensure_ascii=False).encode("utf-8")
+        headers = [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"connection", b"close"),
+        ]
+        if retry_after is not None:
+            headers.append((b"retry-after", str(retry_after).encode()))
+
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
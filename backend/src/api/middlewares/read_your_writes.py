@@ -0,0 +1,27 @@
+from litestar.types import ASGIApp, Scope, Receive, Send, Message
+
+from src.infrastructure.db.replica import SAFE_METHODS, ReplicaSessionLocal, pin_cookie
+
+
+
+class ReadYourWritesMiddleware:
+    """
+    Agrega la cookie de read-your-writes (ver infrastructure/db/replica.py) a la
+    respuesta de cada petición que escribe: el pin en memoria es por proceso y
+    el GET siguiente puede llegar a otro worker. Sin réplica no hace nada.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if ReplicaSessionLocal is None or scope["type"] != "http" or scope["method"] in SAFE_METHODS:
+            return await self.app(scope, receive, send)
+
+        async def pinned_send(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                # La ventana corre desde que terminó la escritura
+                message["headers"] = [*message.get("headers", []), (b"set-cookie", pin_cookie())]
+            await send(message)
+
+        await self.app(scope, receive, pinned_send)
@@ -18,6 +18,6 @@ class AuthController(Controller):
         if not user:
             return Response(status_code=401, content={"detail": "Invalid credentials"})
 
-        access_token = auth_service.create_access_token({"sub": user.username})
+        access_token = auth_service.create_access_token({"sub": user.username, "role": user.role})
         return TokenResponse(access_token=access_token)
 
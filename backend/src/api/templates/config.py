@@ -2,6 +2,7 @@ from litestar.template.config import TemplateConfig
 from litestar.contrib.jinja import JinjaTemplateEngine
 
 from src.api.templates.callables import static_version
+from src.api.templates.filters import TEMPLATE_FILTERS
 from src.core.config.constants import ROOT_PATH
 
 
@@ -9,6 +10,8 @@ from src.core.config.constants import ROOT_PATH
 def configure_template_engine(engine: JinjaTemplateEngine) -> None:
     # Callables disponibles en templates
     engine.register_template_callable("static_version", static_version)
+    # Filtros para los fragmentos HTMX (lista de archivos)
+    engine.engine.filters.update(TEMPLATE_FILTERS)
 
 
 template_config = TemplateConfig(
@@ -0,0 +1,75 @@
+from pathlib import Path
+from typing import Optional
+
+
+
+DOCUMENT_TYPE_LABELS = {
+    "factura": "Factura",
+    "boleta": "Boleta",
+    "nota_credito": "Nota de Crédito",
+    "nota_debito": "Nota de Débito",
+    "guia_despacho": "Guía de Despacho",
+    "orden_compra": "Orden de Compra",
+    "cotizacion": "Cotización",
+    "contrato": "Contrato",
+    "balance": "Balance",
+    "estado_resultado": "Estado de Resultado",
+    "flujo_efectivo": "Flujo de Efectivo",
+    "comprobante_egreso": "Comprobante de Egreso",
+    "comprobante_ingreso": "Comprobante de Ingreso",
+    "comprobante_diario": "Comprobante Diario",
+    "declaracion_iva": "Declaración IVA",
+    "declaracion_renta": "Declaración de Renta",
+    "certificado_tributario": "Certificado Tributario",
+    "otros": "Otros",
+}
+
+# extensión -> (ícono, clase de fondo)
+FILE_ICONS = {
+    "pdf": ("fas fa-file-pdf", "icon-pdf"),
+    "doc": ("fas fa-file-word", "icon-word"),
+    "docx": ("fas fa-file-word", "icon-word"),
+    "xls": ("fas fa-file-excel", "icon-excel"),
+    "xlsx": ("fas fa-file-excel", "icon-excel"),
+    "txt": ("fas fa-file-alt", "icon-text"),
+    "jpg": ("fas fa-file-image", "icon-image"),
+    "jpeg": ("fas fa-file-image", "icon-image"),
+    "png": ("fas fa-file-image", "icon-image"),
+}
+DEFAULT_FILE_ICON = ("fas fa-file", "icon-default")
+
+
+def file_size(size: Optional[int]) -> str:
+    """Mismo formato que formatFileSize() del frontend"""
+    if not size:
+        return "0 Bytes"
+    value = float(size)
+    for unit in ("Bytes", "KB", "MB", "GB"):
+        if value < 1024 or unit == "GB":
+            return f"{value:.2f}".rstrip("0").rstrip(".") + f" {unit}"
+        value /= 1024
+
+
+def document_type_label(document_type) -> str:
+    value = getattr(document_type, "value", document_type)
+    return DOCUMENT_TYPE_LABELS.get(value, value or "No identificado")
+
+
+def _extension(file_name: str) -> str:
+    return Path(file_name or "").suffix.lstrip(".").lower()
+
+
+def file_icon(file_name: str) -> str:
+    return FILE_ICONS.get(_extension(file_name), DEFAULT_FILE_ICON)[0]
+
+
+def file_icon_background(file_name: str) -> str:
+    return FILE_ICONS.get(_extension(file_name), DEFAULT_FILE_ICON)[1]
+
+
+TEMPLATE_FILTERS = {
+    "file_size": file_size,
+    "document_type_label": document_type_label,
+    "file_icon": file_icon,
+    "file_icon_background": file_icon_background,
+}
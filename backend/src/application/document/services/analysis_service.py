@@ -0,0 +1,129 @@
+import logging
+import random
+from pathlib import Path
+from typing import Optional
+
+from sqlalchemy import select
+
+from src.infrastructure.db.session import get_db_session
+from src.infrastructure.db.models.file import File
+from src.infrastructure.db.models.analysis_job import AnalysisJob
+from src.infrastructure.db.models.enums import AIMetadataResponse
+from src.infrastructure.db.repositories.analysis_job_repository import AnalysisJobRepository
+from src.infrastructure.db.repositories.fingerprint_repository import FingerprintRepository
+from src.application.document.services.metadata_service import (
+    add_analysis_result, add_duplicate_result, observe_committed
+)
+from src.application.document.services.duplicate_service import compute_file_fingerprint, find_duplicate
+from src.infrastructure.events import AnalysisStage, analysis_progress, progress_broker
+from src.infrastructure.analysis_ledger import RunStats, track_analysis_run
+from src.gemini_service import get_gemini_analyzer
+
+logger = logging.getLogger(__name__)
+
+
+
+MAX_BACKOFF_SECONDS = 3600
+
+
+def retry_backoff(attempts: int, base_seconds: float) -> float:
+    """Backoff exponencial con jitter: base * 2^(intentos-1), máximo 1 hora"""
+    delay = min(MAX_BACKOFF_SECONDS, base_seconds * 2 ** max(0, attempts - 1))
+    return delay * random.uniform(0.8, 1.2)
+
+
+async def analyze_file(file: File) -> Optional[AIMetadataResponse]:
+    """Analiza un archivo publicando sus etapas de progreso"""
+    analyzer = get_gemini_analyzer()
+    if not analyzer:
+        raise RuntimeError("Servicio de Gemini no inicializado")
+    with analysis_progress(file.id):
+        return await analyzer.analyze_document(file.path, file.original_name, compression=file.compression)
+
+
+async def run_analysis_job(job_id: int, worker_id: str, backoff_base_seconds: float) -> bool:
+    """
+    Ejecuta un job ya reclamado por `worker_id`. Retorna True si quedó completado.
+
+    La llamada al modelo se hace sin sesión abierta; al terminar se re-lee el job
+    con FOR UPDATE y solo se guarda si este worker sigue siendo su dueño (si el
+    lease venció y otro worker lo tomó, el resultado se descarta).
+    """
+    async with get_db_session() as session:
+        job = await session.get(AnalysisJob, job_id)
+        file = await session.get(File, job.file_id) if job else None
+
+    # Una fila en analysis_run por intento, con o sin llamada al modelo
+    async with track_analysis_run(file.id if file else None) as run:
+        return await _analyze_and_save(job_id, worker_id, backoff_base_seconds, file, run)
+
+
+async def _analyze_and_save(
+    job_id: int, worker_id: str, backoff_base_seconds: float, file: Optional[File], run: RunStats
+) -> bool:
+    error = None
+    permanent = False  # reintentar no lo arregla: directo a dead-letter
+    ai_response = None
+    fingerprint = None
+    match = None
+    if file is None:
+        error = "Archivo no encontrado"
+        permanent = True
+    elif not Path(file.path).exists():
+        error = f"Archivo no encontrado en disco: {file.path}"
+        permanent = True
+    else:
+        try:
+            # Casi duplicado de un documento ya analizado: no se llama al modelo
+            fingerprint = await compute_file_fingerprint(file.path, file.original_name, file.compression)
+            if fingerprint:
+                async with get_db_session() as session:
+                    match = await find_duplicate(session, file.id, fingerprint, owner_id=file.owner_id)
+
+            if not match:
+                ai_response = await analyze_file(file)
+                run.finish(ai_response)
+                if ai_response is None:
+                    error = "El análisis no retornó metadatos"
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+
+    async with get_db_session() as session:
+        job = (await session.execute(
+            select(AnalysisJob).where(AnalysisJob.id == job_id).with_for_update()
+        )).scalar_one_or_none()
+
+        if job is None or job.locked_by != worker_id:
+            logger.warning(f"Job {job_id}: lease perdido, se descarta el resultado")
+            run.outcome = "discarded"
+            return False
+
+        repository = AnalysisJobRepository(session)
+        if fingerprint:
+            await FingerprintRepository(session).save(job.file_id, fingerprint)
+
+        if error:
+            logger.error(f"Job {job_id} (intento {job.attempts}/{job.max_attempts}) falló: {error}")
+            await repository.fail(job, error, retry_backoff(job.attempts, backoff_base_seconds), permanent=permanent)
+            progress_broker.publish(job.file_id, AnalysisStage.FAILED, error)
+            return False
+
+        if match:
+            metadata = await add_duplicate_result(session, job.file_id, match, replace=True)
+            if metadata is None:
+                # El original perdió sus metadatos entre medio: reintentar vuelve a dar con la
+                # misma huella, así que va directo a dead-letter (se reanaliza a mano)
+                error = f"El original {match.source_file_id} ya no tiene metadatos"
+                logger.warning(f"Job {job_id}: {error}")
+                await repository.fail(job, error, 0, permanent=True)
+                progress_broker.publish(job.file_id, AnalysisStage.FAILED, error)
+                return False
+            run.finish_duplicate(metadata)
+        else:
+            metadata = await add_analysis_result(session, job.file_id, ai_response, replace=True)
+        await repository.complete(job)
+        await session.commit()
+
+    observe_committed(metadata)
+    progress_broker.publish(metadata.file_id, AnalysisStage.DONE)
+    return True
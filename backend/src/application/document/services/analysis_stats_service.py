@@ -0,0 +1,64 @@
+import math
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Callable, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.infrastructure.db.repositories.analysis_run_repository import AnalysisRunRepository
+from src.infrastructure.db.repositories.document_repository import DocumentPartition
+
+
+
+def percentile(sorted_values: list[int], fraction: float) -> int:
+    """Percentil por rango más cercano sobre valores ya ordenados"""
+    if not sorted_values:
+        return 0
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def _summarize(rows: list[tuple], key: Callable[[tuple], str]) -> list[dict]:
+    groups = defaultdict(list)
+    for row in rows:
+        groups[key(row)].append(row)
+
+    summary = []
+    for group, group_rows in groups.items():
+        latencies = sorted(row.latency_ms for row in group_rows)
+        cost = sum(row.cost_usd for row in group_rows)
+        summary.append({
+            "key": group,
+            "runs": len(group_rows),
+            "failed": sum(1 for row in group_rows if row.outcome == "failed"),
+            "cache_hit_rate": round(sum(1 for row in group_rows if row.cache_hit) / len(group_rows), 4),
+            "p50_latency_ms": percentile(latencies, 0.50),
+            "p95_latency_ms": percentile(latencies, 0.95),
+            "cost_usd": round(cost, 6),
+            "avg_cost_usd": round(cost / len(group_rows), 6),
+        })
+    return summary
+
+
+async def analysis_run_stats(
+    db: AsyncSession, date_from: datetime, date_to: datetime, partition: Optional[DocumentPartition] = None
+) -> dict:
+    """Latencia p50/p95 y costo de los análisis en [date_from, date_to), por tipo de documento y por día"""
+    rows = await AnalysisRunRepository(db).latency_rows(date_from, date_to, partition)
+
+    by_type = _summarize(rows, lambda row: row.document_type or "sin_clasificar")
+    by_type.sort(key=lambda item: item["cost_usd"], reverse=True)
+    by_day = _summarize(rows, lambda row: row.created_at.date().isoformat())
+    by_day.sort(key=lambda item: item["key"])
+
+    latencies = sorted(row.latency_ms for row in rows)
+    return {
+        "date_from": date_from.date().isoformat(),
+        "date_to": (date_to - timedelta(days=1)).date().isoformat(),  # inclusivo
+        "runs": len(rows),
+        "p50_latency_ms": percentile(latencies, 0.50),
+        "p95_latency_ms": percentile(latencies, 0.95),
+        "cost_usd": round(sum(row.cost_usd for row in rows), 6),
+        "by_document_type": by_type,
+        "by_day": by_day,
+    }
@@ -0,0 +1,184 @@
+"""
+Tier frío de documentos (estado ARCHIVADO).
+
+`archive_documents` reempaqueta los archivos de un grupo de documentos en un
+segmento comprimido (ver infrastructure/archive_storage.py), marca el File
+como archivado y los metadatos como ARCHIVADO. Listas, búsquedas, facetas y
+exportación los excluyen salvo `include_archived` (ver DocumentPartition);
+los metadatos siguen en su tabla, así que un documento frío se puede
+consultar por id y seguir sirviendo de original para casi duplicados.
+
+Cuando se pide el archivo de un documento frío (descarga, preview) se
+rehidrata una sola vez con `rehydrate_file`: vuelve a `uploads/`, recupera
+el estado que tenía y sale del segmento. Queda registrado en
+`File.rehydrated_at` y el job que archiva (`python -m src.infrastructure.db.archive`)
+no lo vuelve a tomar hasta pasados `archive_rehydrated_keep_days`.
+"""
+import asyncio
+import logging
+import time
+import weakref
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+
+from sqlalchemy import select, update
+
+from src.infrastructure.archive_storage import SegmentWriter, read_member, restore_member, write_atomic
+from src.infrastructure.db.session import get_db_session
+from src.infrastructure.db.models.file import File
+from src.infrastructure.db.models.document_metadata import DocumentMetadata, DocumentStatus
+from src.infrastructure.db.models.document_archive import ArchiveSegment, ArchivedDocument
+from src.infrastructure.db.repositories.archive_repository import ArchiveRepository
+from src.infrastructure.fragment_cache import file_list_cache
+from src.infrastructure.metrics import metrics
+from src.utils.timing import now
+
+logger = logging.getLogger(__name__)
+
+
+
+# Una rehidratación por archivo a la vez en este proceso; entre procesos decide ArchiveRepository.release
+_rehydrating: weakref.WeakValueDictionary = weakref.WeakValueDictionary()
+
+
+@dataclass
+class ArchiveResult:
+    segment_path: Optional[str] = None
+    documents: int = 0
+    raw_bytes: int = 0
+    stored_bytes: int = 0
+    missing: list[int] = field(default_factory=list)  # archivos que ya no estaban en disco
+
+
+def _pack(writer: SegmentWriter, files: list[File]) -> list[int]:
+    """Escribe los archivos en el segmento; devuelve los ids que no se encontraron"""
+    missing = []
+    for file in files:
+        if not Path(file.path).exists():
+            missing.append(file.id)
+            continue
+        writer.add(file.id, file.path, file.compression, file.size)
+    return missing
+
+
+def _remove_originals(paths: list[str]) -> None:
+    for path in paths:
+        Path(path).unlink(missing_ok=True)
+
+
+async def archive_documents(file_ids: list[int]) -> ArchiveResult:
+    """Mueve al tier frío los documentos indicados (los que sigan calientes) en un segmento nuevo"""
+    async with get_db_session() as session:
+        rows = (await session.execute(
+            select(File, DocumentMetadata)
+            .join(DocumentMetadata, File.id == DocumentMetadata.file_id)
+            .where(File.id.in_(file_ids), File.archived.is_(False))
+            .order_by(File.id)
+        )).tuples().all()
+        if not rows:
+            return ArchiveResult()
+
+        writer = SegmentWriter()
+        try:
+            missing = await asyncio.to_thread(_pack, writer, [file for file, _ in rows])
+            if not writer.members:
+                writer.abort()
+                return ArchiveResult(missing=missing)
+            segment_path = await asyncio.to_thread(writer.close)
+        except BaseException:
+            writer.abort()
+            raise
+
+        try:
+            segment = ArchiveSegment(
+                path=str(segment_path),
+                document_count=len(writer.members),
+                live_count=len(writer.members),
+                raw_bytes=writer.raw_bytes,
+                stored_bytes=writer.stored_bytes,
+            )
+            session.add(segment)
+            await session.flush()
+
+            by_id = {file.id: (file, metadata) for file, metadata in rows}
+            for member in writer.members:
+                file, metadata = by_id[member.file_id]
+                session.add(ArchivedDocument(
+                    file_id=file.id, segment_id=segment.id, offset=member.offset, length=member.length,
+                    previous_status=metadata.status,
+                ))
+                file.archived = True
+                metadata.status = DocumentStatus.ARCHIVADO.value
+            await session.commit()
+        except BaseException:
+            # El segmento no quedó referenciado: se descarta y los originales siguen donde estaban
+            await session.rollback()
+            segment_path.unlink(missing_ok=True)
+            raise
+
+        archived_paths = [by_id[member.file_id][0].path for member in writer.members]
+
+    # Recién confirmado el commit se borran los originales; si el proceso muere antes quedan
+    # copias huérfanas en uploads/ que la rehidratación sobrescribe
+    await asyncio.to_thread(_remove_originals, archived_paths)
+    for member in writer.members:
+        file_list_cache.invalidate(member.file_id)
+
+    metrics.increment("archive_documents", len(writer.members))
+    metrics.increment("archive_bytes", writer.raw_bytes, kind="raw")
+    metrics.increment("archive_bytes", writer.stored_bytes, kind="stored")
+    return ArchiveResult(
+        segment_path=str(segment_path),
+        documents=len(writer.members),
+        raw_bytes=writer.raw_bytes,
+        stored_bytes=writer.stored_bytes,
+        missing=missing,
+    )
+
+
+async def rehydrate_file(file_id: int) -> bool:
+    """
+    Devuelve al tier caliente el archivo de un documento archivado.
+    False si no estaba archivado (o alguien lo rehidrató antes).
+    Usa su propia sesión: la del request puede ser de la réplica.
+    """
+    lock = _rehydrating.setdefault(file_id, asyncio.Lock())
+    async with lock:
+        async with get_db_session() as session:
+            file = (await session.execute(select(File).where(File.id == file_id))).scalar_one_or_none()
+            if file is None or not file.archived:
+                return False
+
+            started = time.perf_counter()
+            repository = ArchiveRepository(session)
+            entry = await repository.get(file_id)
+            if entry is None:
+                metrics.increment("archive_rehydration", outcome="missing")
+                raise FileNotFoundError(f"Archivo {file_id} archivado sin segmento")
+            archived, segment = entry
+
+            frame = await asyncio.to_thread(read_member, segment.path, archived.offset, archived.length)
+            content = await asyncio.to_thread(restore_member, frame, file.compression)
+            await asyncio.to_thread(write_atomic, file.path, content)
+
+            file.archived = False
+            file.rehydrated_at = now().replace(tzinfo=None)
+            await session.execute(
+                update(DocumentMetadata)
+                .where(DocumentMetadata.file_id == file_id, DocumentMetadata.status == DocumentStatus.ARCHIVADO.value)
+                .values(status=archived.previous_status or DocumentStatus.PROCESADO.value)
+            )
+            empty_segment = await repository.release(file_id)
+            await session.commit()
+
+    if empty_segment:
+        await asyncio.to_thread(Path(empty_segment).unlink, missing_ok=True)
+    file_list_cache.invalidate(file_id)
+
+    metrics.increment("archive_rehydration", outcome="done")
+    metrics.increment("archive_rehydration_bytes", len(frame))
+    metrics.increment("archive_rehydration_ms", (time.perf_counter() - started) * 1000)
+    logger.info("Archivo %s rehidratado desde %s", file_id, segment.path)
+    return True
+
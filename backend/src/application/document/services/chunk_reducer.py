@@ -0,0 +1,135 @@
+"""
+Reducción determinista de los análisis parciales de un documento largo
+(map-reduce por rangos de páginas, ver `_analyze_long_pdf` en gemini_service).
+
+Cada campo tiene una regla fija para que el mismo conjunto de parciales dé
+siempre el mismo resultado:
+
+- document_type: voto ponderado por confianza (empate: el primero en aparecer).
+- Encabezado (número, fechas, período, moneda): el primer valor no nulo en
+  orden de páginas; suele estar en la primera página.
+- issuer, client: por sub-campo (name, rut, address), el primer valor no nulo;
+  un objeto con todo en null (lo que devuelven las páginas sin ese dato) no cuenta.
+- amounts: por campo, el último valor no nulo; los totales van al final.
+- tags, account_codes: unión en orden de aparición, sin repetidos.
+- key_data: unión; ante la misma clave gana el primer valor.
+
+Los valores distintos que se descartan quedan como `Conflict`, con los
+parciales de donde salieron: el analizador puede pedirle al modelo que los
+resuelva con el texto de esas páginas y si no, el documento queda para revisión.
+"""
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+from src.infrastructure.db.models.enums import AIMetadataResponse, DocumentType
+from src.utils.text import fold_text
+
+
+
+HEADER_FIELDS = ("document_number", "document_date", "due_date", "accounting_period")
+PARTY_FIELDS = ("issuer", "client")
+AMOUNT_FIELDS = ("total", "net", "tax", "other_taxes")
+MAX_TAGS = 20
+EXTRACTED_TEXT_MAX_CHARS = 20000
+
+
+@dataclass
+class Conflict:
+    field: str
+    chosen: Any
+    candidates: list
+    partials: list[int] = field(default_factory=list)  # índices de los parciales que traían un valor
+
+
+def _distinct(values: list) -> list:
+    result = []
+    for value in values:
+        if value not in result:
+            result.append(value)
+    return result
+
+
+def _missing(value: Any) -> bool:
+    if isinstance(value, dict):
+        return all(_missing(item) for item in value.values())
+    return value is None or value == ""
+
+
+def _pick(name: str, values: list, conflicts: list[Conflict], last: bool = False) -> Any:
+    """Primer (o último) valor no nulo (`values` en orden de parciales); si había otros distintos se registra el conflicto"""
+    sources = [index for index, value in enumerate(values) if not _missing(value)]
+    present = _distinct([values[index] for index in sources])
+    if not present:
+        return None
+    chosen = present[-1] if last else present[0]
+    if len(present) > 1:
+        conflicts.append(Conflict(field=name, chosen=chosen, candidates=present, partials=sources))
+    return chosen
+
+
+def _union(lists: list[list[str]], limit: Optional[int] = None) -> list[str]:
+    seen, result = set(), []
+    for items in lists:
+        for item in items:
+            key = fold_text(item).strip()
+            if key and key not in seen:
+                seen.add(key)
+                result.append(item)
+    return result[:limit] if limit else result
+
+
+def _vote_type(partials: list[AIMetadataResponse], conflicts: list[Conflict]) -> tuple[DocumentType, float]:
+    weights: dict[DocumentType, float] = defaultdict(float)
+    for partial in partials:
+        weights[partial.document_type] += partial.confidence_score
+    # max() se queda con el primero ante empates; el dict conserva el orden de aparición
+    chosen = max(weights, key=weights.get)
+    if len(weights) > 1:
+        conflicts.append(Conflict(
+            field="document_type", chosen=chosen.value, candidates=[t.value for t in weights],
+            partials=list(range(len(partials))),
+        ))
+    # La confianza baja cuando los fragmentos no coinciden en el tipo
+    return chosen, round(weights[chosen] / len(partials), 4)
+
+
+def reduce_partials(partials: list[AIMetadataResponse]) -> tuple[AIMetadataResponse, list[Conflict]]:
+    """Combina los parciales (en orden de páginas) en un solo resultado y sus conflictos"""
+    conflicts: list[Conflict] = []
+    document_type, confidence = _vote_type(partials, conflicts)
+
+    header = {field: _pick(field, [getattr(p, field) for p in partials], conflicts) for field in HEADER_FIELDS}
+
+    for party in PARTY_FIELDS:
+        values = [getattr(p, party) or {} for p in partials]
+        merged_party = {
+            key: _pick(f"{party}.{key}", [value.get(key) for value in values], conflicts)
+            for key in _distinct([key for value in values for key in value])
+        }
+        header[party] = None if _missing(merged_party) else merged_party
+
+    amounts = {
+        field: _pick(f"amounts.{field}", [(p.amounts or {}).get(field) for p in partials], conflicts, last=True)
+        for field in AMOUNT_FIELDS
+    }
+
+    keys = _distinct([key for partial in partials for key in partial.key_data])
+    key_data: dict[str, Optional[str]] = {
+        key: _pick(f"key_data.{key}", [partial.key_data.get(key) for partial in partials], conflicts) for key in keys
+    }
+
+    merged = AIMetadataResponse(
+        document_type=document_type,
+        confidence_score=confidence,
+        **header,
+        amounts=amounts if any(value is not None for value in amounts.values()) else None,
+        currency=_pick("currency", [p.currency for p in partials], conflicts) or "CLP",
+        description=next((p.description for p in partials if p.description), ""),
+        tags=_union([p.tags for p in partials], limit=MAX_TAGS),
+        account_codes=_union([p.account_codes for p in partials]),
+        requires_review=any(p.requires_review for p in partials),
+        extracted_text="\n".join(p.extracted_text for p in partials if p.extracted_text)[:EXTRACTED_TEXT_MAX_CHARS],
+        key_data=key_data,
+    )
+    return merged, conflicts
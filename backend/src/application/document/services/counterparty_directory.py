@@ -0,0 +1,143 @@
+import asyncio
+import time
+from bisect import bisect_left, insort
+from dataclasses import dataclass, replace
+from typing import Optional
+
+from src.infrastructure.db.session import get_db_session
+from src.infrastructure.db.repositories.counterparty_repository import CounterpartyRepository
+from src.infrastructure.trigram_index import TrigramIndex
+from src.utils.text import fold_text
+
+
+
+def _name_keys(name: str, rut: str) -> list[tuple[str, str]]:
+    """Una clave por cada palabra del nombre, para calzar "penal" con "Comercial Peñalolén" """
+    words = fold_text(name).split(" ")
+    return [(" ".join(words[index:]), rut) for index in range(len(words)) if words[index]]
+
+
+@dataclass
+class CounterpartyEntry:
+    rut: str
+    name: Optional[str]
+    document_count: int
+
+
+class CounterpartyDirectory:
+    """
+    Índice en memoria para autocompletar contrapartes por prefijo de RUT o de
+    cualquier palabra del nombre.
+
+    Se carga desde la tabla `counterparty` y se recarga cada `ttl_seconds` para
+    ver lo escrito por otros workers; lo escrito por este proceso se aplica al
+    instante. La búsqueda por prefijo es una bisección sobre claves ordenadas;
+    la difusa (`fuzzy_search`) usa un índice de trigramas de los nombres.
+    """
+
+    def __init__(self, ttl_seconds: float = 60.0, max_scan: int = 2000):
+        self.ttl_seconds = ttl_seconds
+        self.max_scan = max_scan
+        self._entries: dict[str, CounterpartyEntry] = {}
+        self._keys: list[tuple[str, str]] = []  # (clave normalizada, rut) ordenadas
+        self._names = TrigramIndex()  # rut -> nombre
+        self._loaded_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+
+    async def _ensure_loaded(self) -> None:
+        if self._loaded_at is not None and time.monotonic() - self._loaded_at < self.ttl_seconds:
+            return
+
+        async with self._lock:
+            if self._loaded_at is not None and time.monotonic() - self._loaded_at < self.ttl_seconds:
+                return
+
+            async with get_db_session() as session:
+                rows = await CounterpartyRepository(session).get_all()
+
+            self._entries = {
+                row.rut: CounterpartyEntry(rut=row.rut, name=row.name, document_count=row.document_count)
+                for row in rows
+            }
+            self._rebuild_keys()
+            self._loaded_at = time.monotonic()
+
+    def _rebuild_keys(self) -> None:
+        keys = []
+        names = TrigramIndex()
+        for entry in self._entries.values():
+            keys.append((entry.rut.lower(), entry.rut))
+            if entry.name:
+                keys.extend(_name_keys(entry.name, entry.rut))
+                names.add(entry.rut, entry.name)
+        keys.sort()
+        self._keys = keys
+        self._names = names
+
+    def observe(self, rut: str, name: Optional[str]) -> None:
+        """Aplica localmente un upsert recién escrito en la base de datos"""
+        if self._loaded_at is None:
+            return  # Se cargará completo en la primera búsqueda
+
+        entry = self._entries.get(rut)
+        if entry is None:
+            entry = self._entries[rut] = CounterpartyEntry(rut=rut, name=None, document_count=0)
+            insort(self._keys, (rut.lower(), rut))
+
+        entry.document_count += 1
+        if name and name != entry.name:
+            if entry.name:
+                for old_key in _name_keys(entry.name, rut):
+                    index = bisect_left(self._keys, old_key)
+                    if index < len(self._keys) and self._keys[index] == old_key:
+                        del self._keys[index]
+            entry.name = name
+            for key in _name_keys(name, rut):
+                insort(self._keys, key)
+            self._names.add(rut, name)
+
+    async def search(
+        self, prefix: str, limit: int = 10, counts: Optional[dict[str, int]] = None
+    ) -> list[CounterpartyEntry]:
+        """Por prefijo, de más a menos documentos. Con `counts` (rut -> documentos de una
+        partición) solo esos RUTs, ordenados por esa cuenta en vez de la global."""
+        await self._ensure_loaded()
+
+        needle = fold_text(prefix).replace(".", "").replace("-", "") if prefix[:1].isdigit() else fold_text(prefix)
+        if not needle:
+            return []
+
+        matches: dict[str, CounterpartyEntry] = {}
+        index = bisect_left(self._keys, (needle, ""))
+        while index < len(self._keys) and len(matches) < self.max_scan and self._keys[index][0].startswith(needle):
+            rut = self._keys[index][1]
+            if counts is None:
+                matches.setdefault(rut, self._entries[rut])
+            elif rut in counts and rut not in matches:
+                matches[rut] = replace(self._entries[rut], document_count=counts[rut])
+            index += 1
+
+        return sorted(matches.values(), key=lambda entry: -entry.document_count)[:limit]
+
+
+    async def fuzzy_search(
+        self, name: str, limit: Optional[int] = 10, min_score: float = 0.5, counts: Optional[dict[str, int]] = None
+    ) -> list[tuple[CounterpartyEntry, float]]:
+        """Contrapartes cuyo nombre se parece a `name` (typos, tildes), de mejor a peor (todas con `limit=None`).
+        `counts` restringe y desempata como en `search`."""
+        await self._ensure_loaded()
+
+        # Se piden más para desempatar por cantidad de documentos; con `counts` se filtra antes de cortar
+        wanted = limit * 2 if limit is not None and counts is None else None
+        matches = self._names.search(name, limit=wanted, min_score=min_score)
+        if counts is None:
+            entries = ((self._entries[rut], score) for rut, score in matches)
+        else:
+            entries = (
+                (replace(self._entries[rut], document_count=counts[rut]), score) for rut, score in matches if rut in counts
+            )
+        ranked = sorted(entries, key=lambda item: (-item[1], -item[0].document_count))
+        return ranked[:limit]
+
+
+counterparty_directory = CounterpartyDirectory()
@@ -0,0 +1,238 @@
+"""
+Clasificador local (reglas) para DTEs chilenos con capa de texto: facturas,
+boletas, notas de crédito/débito y guías de despacho electrónicas.
+
+El formato del SII deja tipo, folio, RUTs, fecha y totales en posiciones y
+rótulos fijos, así que basta con expresiones regulares. La confianza se arma
+sumando las verificaciones que pasan (incluida la cuadratura neto + IVA =
+total); el analizador solo usa este resultado si supera
+`local_classifier_threshold`, si no llama al modelo.
+"""
+import re
+from dataclasses import dataclass
+from datetime import date
+from typing import Optional
+
+from src.infrastructure.db.models.enums import AIMetadataResponse, DocumentType
+from src.utils.rut import normalize_rut
+from src.utils.text import fold_text
+
+
+
+LOCAL_SOURCE = "local_dte"
+EXTRACTED_TEXT_MAX_CHARS = 20000
+IVA_RATE = 0.19
+AMOUNT_TOLERANCE = 1.0  # pesos de diferencia por redondeo
+
+# Peso de cada verificación en la confianza (suman 1.0)
+WEIGHTS = {
+    "type": 0.30,
+    "sii": 0.05,
+    "folio": 0.10,
+    "issuer_rut": 0.15,
+    "date": 0.10,
+    "total": 0.15,
+    "amounts_match": 0.15,
+}
+
+# Sin estos datos el documento queda marcado para revisión
+ESSENTIAL_CHECKS = ("folio", "issuer_rut", "date", "total")
+
+
+@dataclass(frozen=True)
+class DteKind:
+    pattern: re.Pattern
+    document_type: DocumentType
+    code: str
+    label: str
+    exempt: bool = False
+
+
+# El orden importa: una nota de crédito menciona la factura que referencia
+DTE_KINDS = (
+    DteKind(re.compile(r"nota de credito electronica"), DocumentType.NOTA_CREDITO, "61", "Nota de crédito electrónica"),
+    DteKind(re.compile(r"nota de debito electronica"), DocumentType.NOTA_DEBITO, "56", "Nota de débito electrónica"),
+    DteKind(re.compile(r"guia de despacho electronica"), DocumentType.GUIA_DESPACHO, "52", "Guía de despacho electrónica"),
+    DteKind(re.compile(r"factura (?:no afecta o )?exenta electronica"), DocumentType.FACTURA, "34", "Factura exenta electrónica", exempt=True),
+    DteKind(re.compile(r"factura de compra electronica"), DocumentType.FACTURA, "46", "Factura de compra electrónica"),
+    DteKind(re.compile(r"factura electronica"), DocumentType.FACTURA, "33", "Factura electrónica"),
+    DteKind(re.compile(r"boleta (?:no afecta o )?exenta electronica"), DocumentType.BOLETA, "41", "Boleta exenta electrónica", exempt=True),
+    DteKind(re.compile(r"boleta electronica"), DocumentType.BOLETA, "39", "Boleta electrónica"),
+)
+
+_SII_RE = re.compile(r"\bs\.?\s?i\.?\s?i\b")
+_FOLIO_RE = re.compile(r"(?:\bfolio|\bn[°o]|\bnro|\bnumero)\.?\s*:?\s*(\d{1,10})\b")
+_RUT_RE = re.compile(r"\b(\d{1,2}\.\d{3}\.\d{3}\s?-\s?[\dk]|\d{7,8}\s?-\s?[\dk])\b")
+_CLIENT_LABEL_RE = re.compile(r"\b(?:senor(?:\(es\)|es)?|cliente|receptor)\b")
+_CLIENT_NAME_RE = re.compile(r"(?i)\b(?:se[ñn]or(?:\(es\)|es)?|cliente|receptor)\s*:\s*(.+)")
+_AMOUNT = r"\s*:?\s*\$?\s*(\d[\d.,]*)"
+_NET_RE = re.compile(r"\b(?:monto )?neto" + _AMOUNT)
+_TAX_RE = re.compile(r"\bi\.?v\.?a\.?(?:\s*\(?\s*19\s*%\s*\)?)?(?: de esta boleta es)?" + _AMOUNT)
+_EXEMPT_RE = re.compile(r"\b(?:monto )?exento" + _AMOUNT)
+_TOTAL_RE = re.compile(r"(?<!sub)\btotal(?: a pagar)?" + _AMOUNT)
+_DATE_LABEL_RE = re.compile(r"fecha(?: de)?(?: emision)?\s*:?\s*")
+
+_MONTHS = {
+    "enero": 1, "febrero": 2, "marzo": 3, "abril": 4, "mayo": 5, "junio": 6, "julio": 7,
+    "agosto": 8, "septiembre": 9, "setiembre": 9, "octubre": 10, "noviembre": 11, "diciembre": 12,
+}
+_DATE_PATTERNS = (
+    (re.compile(r"(\d{1,2})[/-](\d{1,2})[/-](\d{4})"), lambda m: (int(m[3]), int(m[2]), int(m[1]))),
+    (re.compile(r"(\d{4})-(\d{2})-(\d{2})"), lambda m: (int(m[1]), int(m[2]), int(m[3]))),
+    (
+        re.compile(r"(\d{1,2}) de (" + "|".join(_MONTHS) + r") (?:de |del )?(\d{4})"),
+        lambda m: (int(m[3]), _MONTHS[m[2]], int(m[1])),
+    ),
+)
+
+
+def parse_amount(raw: str) -> Optional[float]:
+    """Monto en formato chileno: punto de miles y coma decimal ("1.234.567,5")"""
+    raw = raw.strip(".,")
+    if not raw:
+        return None
+    if "," in raw:
+        raw = raw.replace(".", "").replace(",", ".")
+    else:
+        raw = raw.replace(".", "")
+    try:
+        return float(raw)
+    except ValueError:
+        return None
+
+
+def _first_amount(pattern: re.Pattern, text: str) -> Optional[float]:
+    match = pattern.search(text)
+    return parse_amount(match.group(1)) if match else None
+
+
+def _parse_date(text: str) -> Optional[date]:
+    """Fecha junto al rótulo "fecha emisión"; si no hay, la primera del documento"""
+    candidates = [text[label.end():label.end() + 40] for label in _DATE_LABEL_RE.finditer(text)]
+    candidates.append(text)
+
+    for fragment in candidates:
+        for pattern, to_parts in _DATE_PATTERNS:
+            match = pattern.search(fragment)
+            if not match:
+                continue
+            try:
+                return date(*to_parts(match))
+            except ValueError:
+                continue
+    return None
+
+
+def _parse_ruts(folded: str) -> tuple[Optional[str], Optional[str]]:
+    """(emisor, receptor): el receptor es el primer RUT válido después del rótulo
+    "señor(es)/cliente"; el emisor, el primer RUT válido que no sea ese"""
+    found = [(match.start(), normalize_rut(match.group(1))) for match in _RUT_RE.finditer(folded)]
+    found = [(position, rut) for position, rut in found if rut]
+
+    client_rut = None
+    label = _CLIENT_LABEL_RE.search(folded)
+    if label:
+        client_rut = next((rut for position, rut in found if position > label.end()), None)
+
+    issuer_rut = next((rut for _, rut in found if rut != client_rut), None)
+    return issuer_rut, client_rut
+
+
+def _parse_names(text: str) -> tuple[Optional[str], Optional[str]]:
+    """Razón social del emisor (primera línea con texto) y del receptor (tras "Señor(es):")"""
+    issuer_name = None
+    for line in text.splitlines():
+        line = line.strip()
+        folded = fold_text(line)
+        if (
+            sum(char.isalpha() for char in line) >= 3
+            and not _RUT_RE.search(folded)
+            and not any(kind.pattern.search(folded) for kind in DTE_KINDS)
+        ):
+            issuer_name = line[:255]
+            break
+
+    client_match = _CLIENT_NAME_RE.search(text)
+    client_name = client_match.group(1).strip()[:255] if client_match else None
+    return issuer_name, client_name or None
+
+
+def classify_dte(text: str) -> Optional[AIMetadataResponse]:
+    """Extrae los metadatos de un DTE desde su texto; None si no parece un DTE"""
+    if not text or not text.strip():
+        return None
+
+    folded = fold_text(text)
+    kind = next((kind for kind in DTE_KINDS if kind.pattern.search(folded)), None)
+    if kind is None:
+        return None
+
+    checks = {"type": True, "sii": bool(_SII_RE.search(folded))}
+
+    folio_match = _FOLIO_RE.search(folded, kind.pattern.search(folded).start())
+    folio = (folio_match.group(1).lstrip("0") or None) if folio_match else None
+    checks["folio"] = folio is not None
+
+    issuer_rut, client_rut = _parse_ruts(folded)
+    checks["issuer_rut"] = issuer_rut is not None
+
+    document_date = _parse_date(folded)
+    checks["date"] = document_date is not None
+
+    net = _first_amount(_NET_RE, folded)
+    tax = _first_amount(_TAX_RE, folded)
+    exempt = _first_amount(_EXEMPT_RE, folded)
+    totals = [parse_amount(match.group(1)) for match in _TOTAL_RE.finditer(folded)]
+    total = max((amount for amount in totals if amount is not None), default=None)
+    checks["total"] = total is not None
+
+    # Cuadratura: IVA = 19% del neto y neto + IVA + exento = total
+    amounts_mismatch = False
+    if total is not None and net is not None and tax is not None:
+        tax_ok = abs(round(net * IVA_RATE) - tax) <= AMOUNT_TOLERANCE
+        total_ok = abs(net + tax + (exempt or 0) - total) <= AMOUNT_TOLERANCE
+        checks["amounts_match"] = tax_ok and total_ok
+        amounts_mismatch = not checks["amounts_match"]
+    elif total is not None and kind.exempt:
+        checks["amounts_match"] = exempt is None or abs(exempt - total) <= AMOUNT_TOLERANCE
+    elif total is not None and tax is not None:
+        # Boletas: total con IVA incluido y el IVA informado aparte
+        checks["amounts_match"] = abs(round(total * IVA_RATE / (1 + IVA_RATE)) - tax) <= AMOUNT_TOLERANCE
+        amounts_mismatch = not checks["amounts_match"]
+    else:
+        checks["amounts_match"] = False
+
+    confidence = round(sum(WEIGHTS[name] for name, passed in checks.items() if passed), 2)
+
+    issuer_name, client_name = _parse_names(text)
+    issuer_label = issuer_name or issuer_rut or "emisor no identificado"
+    description = f"{kind.label} N° {folio or 's/n'} emitida por {issuer_label}"
+    if document_date:
+        description += f" el {document_date.isoformat()}"
+    if total is not None:
+        description += f" por un total de ${total:,.0f}".replace(",", ".")
+
+    tags = [kind.document_type.value, "dte", "electronica"]
+    if kind.exempt:
+        tags.append("exenta")
+
+    return AIMetadataResponse(
+        document_type=kind.document_type,
+        confidence_score=confidence,
+        document_number=folio,
+        document_date=document_date.isoformat() if document_date else None,
+        issuer={"name": issuer_name, "rut": issuer_rut, "address": None},
+        client={"name": client_name, "rut": client_rut, "address": None},
+        amounts={"total": total, "net": net, "tax": tax, "other_taxes": None},
+        currency="CLP",
+        description=description,
+        tags=tags,
+        accounting_period=document_date.strftime("%Y-%m") if document_date else None,
+        requires_review=amounts_mismatch or not all(checks[name] for name in ESSENTIAL_CHECKS),
+        extracted_text=text.strip()[:EXTRACTED_TEXT_MAX_CHARS],
+        key_data={
+            "source": LOCAL_SOURCE,
+            "tipo_dte": kind.code,
+            "exento": str(exempt) if exempt is not None else None,
+        },
+    )
@@ -0,0 +1,86 @@
+import logging
+from dataclasses import dataclass
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.config.settings import env_vars
+from src.infrastructure.db.models.document_metadata import DocumentMetadata
+from src.infrastructure.db.repositories.fingerprint_repository import FingerprintRepository
+from src.infrastructure.fingerprints import Fingerprint, compute_fingerprint, compare, identifier_tokens
+from src.infrastructure.process_pool import run_in_process
+
+logger = logging.getLogger(__name__)
+
+
+
+@dataclass
+class DuplicateMatch:
+    source_file_id: int
+    score: float
+    reason: str  # exact | text | image
+
+
+async def compute_file_fingerprint(
+    file_path: str, original_name: str, compression: Optional[str] = None
+) -> Optional[Fingerprint]:
+    """Huella del archivo calculada en el pool de procesos; None si falla o está deshabilitado"""
+    if not env_vars.duplicate_detection:
+        return None
+    try:
+        return await run_in_process(compute_fingerprint, str(file_path), original_name, compression)
+    except Exception as e:
+        logger.error(f"Error calculando huella de {original_name}: {str(e)}")
+        return None
+
+
+def _match_score(fingerprint: Fingerprint, candidate: Fingerprint) -> Optional[tuple[float, str]]:
+    similarity = compare(fingerprint, candidate)
+    if similarity.exact:
+        return 1.0, "exact"
+
+    # Entre documentos con texto decide el texto (ver infrastructure/fingerprints.py)
+    if similarity.jaccard is not None:
+        if similarity.jaccard >= env_vars.duplicate_min_jaccard:
+            return similarity.jaccard, "text"
+        return None
+
+    if similarity.hamming is not None and similarity.hamming <= env_vars.duplicate_max_hamming:
+        return 1 - similarity.hamming / 64, "image"
+
+    return None
+
+
+async def _same_identifiers(db: AsyncSession, fingerprint: Fingerprint, source_file_id: int) -> bool:
+    """El folio, total y RUT guardados del original aparecen entre los números del texto nuevo"""
+    source = (await db.execute(
+        select(DocumentMetadata.document_number, DocumentMetadata.total_amount, DocumentMetadata.company_rut)
+        .where(DocumentMetadata.file_id == source_file_id)
+    )).first()
+    if source is None:
+        return False
+    return identifier_tokens(*source) <= fingerprint.numbers
+
+
+async def find_duplicate(
+    db: AsyncSession, file_id: int, fingerprint: Fingerprint, owner_id: Optional[int] = None
+) -> Optional[DuplicateMatch]:
+    """Mejor coincidencia entre los archivos ya analizados del mismo dueño, si supera los umbrales.
+
+    Una coincidencia por texto solo vale si el texto nuevo trae el mismo folio,
+    total y RUT que el original; si no, se prueba la siguiente (o se analiza).
+    """
+    matches = []
+    for candidate in await FingerprintRepository(db).candidates(fingerprint, exclude_file_id=file_id, owner_id=owner_id):
+        scored = _match_score(fingerprint, candidate.to_fingerprint())
+        if scored:
+            matches.append(DuplicateMatch(source_file_id=candidate.file_id, score=scored[0], reason=scored[1]))
+
+    for match in sorted(matches, key=lambda match: match.score, reverse=True):
+        if match.reason == "text" and not await _same_identifiers(db, fingerprint, match.source_file_id):
+            logger.info(f"Archivo {file_id}: texto parecido a {match.source_file_id} pero con otros folio/monto/RUT")
+            continue
+        logger.info(f"Archivo {file_id}: duplicado de {match.source_file_id} ({match.reason}, {match.score:.2f})")
+        return match
+    return None
@@ -0,0 +1,121 @@
+import csv
+import io
+import json
+import zlib
+from datetime import datetime
+from typing import AsyncIterator, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.infrastructure.db.models.file import File
+from src.infrastructure.db.models.document_metadata import DocumentMetadata
+from src.infrastructure.db.repositories.document_repository import DocumentPartition, DocumentSearchFilters, apply_partition
+from src.infrastructure.db.session import AsyncSessionLocal
+
+
+
+EXPORT_FORMATS = ("csv", "ndjson")
+EXPORT_BATCH_SIZE = 1000
+
+# (nombre en el export, columna)
+EXPORT_COLUMNS = (
+    ("file_id", File.id),
+    ("original_name", File.original_name),
+    ("description", File.description),
+    ("size", File.size),
+    ("document_type", DocumentMetadata.document_type),
+    ("document_number", DocumentMetadata.document_number),
+    ("document_date", DocumentMetadata.document_date),
+    ("due_date", DocumentMetadata.due_date),
+    ("company_name", DocumentMetadata.company_name),
+    ("company_rut", DocumentMetadata.company_rut),
+    ("client_name", DocumentMetadata.client_name),
+    ("client_rut", DocumentMetadata.client_rut),
+    ("total_amount", DocumentMetadata.total_amount),
+    ("net_amount", DocumentMetadata.net_amount),
+    ("tax_amount", DocumentMetadata.tax_amount),
+    ("currency", DocumentMetadata.currency),
+    ("tags", DocumentMetadata.tags),
+    ("confidence_score", DocumentMetadata.confidence_score),
+    ("status", DocumentMetadata.status),
+    ("needs_review", DocumentMetadata.needs_review),
+    ("processed_at", DocumentMetadata.processed_at),
+)
+
+
+def export_query(filters: DocumentSearchFilters, partition: Optional[DocumentPartition] = None):
+    """Solo columnas (sin entidades ORM) para no llenar el identity map"""
+    statement = (
+        select(*(column for _, column in EXPORT_COLUMNS))
+        .select_from(File)
+        .outerjoin(DocumentMetadata, File.id == DocumentMetadata.file_id)
+        .order_by(File.id)
+    )
+    return apply_partition(filters.apply(statement), partition, filters)
+
+
+def _to_jsonable(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def _encode_batch(rows, export_format: str, include_header: bool) -> bytes:
+    names = [name for name, _ in EXPORT_COLUMNS]
+
+    if export_format == "ndjson":
+        return "".join(
+            json.dumps({name: _to_jsonable(value) for name, value in zip(names, row)}, ensure_ascii=False) + "\n"
+            for row in rows
+        ).encode("utf-8")
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if include_header:
+        writer.writerow(names)
+    for row in rows:
+        writer.writerow([
+            "|".join(value) if isinstance(value, list) else _to_jsonable(value)
+            for value in row
+        ])
+    return buffer.getvalue().encode("utf-8")
+
+
+async def stream_export(
+    filters: DocumentSearchFilters,
+    export_format: str = "csv",
+    gzip: bool = False,
+    batch_size: int = EXPORT_BATCH_SIZE,
+    session_factory: Optional[async_sessionmaker[AsyncSession]] = None,
+    partition: Optional[DocumentPartition] = None,
+) -> AsyncIterator[bytes]:
+    """
+    Genera el export por lotes leyendo con un cursor del lado del servidor.
+
+    Usa su propia sesión: la del plugin se cierra apenas empieza la respuesta,
+    antes de que se envíe el cuerpo. `session_factory` permite leer de la réplica.
+    """
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if gzip else None  # wbits=31 -> formato gzip
+    include_header = export_format == "csv"
+
+    async with (session_factory or AsyncSessionLocal)() as session:
+        result = await session.stream(
+            export_query(filters, partition).execution_options(yield_per=batch_size)
+        )
+        async for rows in result.partitions(batch_size):
+            chunk = _encode_batch(rows, export_format, include_header)
+            include_header = False
+
+            if compressor:
+                chunk = compressor.compress(chunk)
+            if chunk:
+                yield chunk
+
+    if include_header:
+        # Export vacío: el CSV igual lleva encabezado
+        chunk = _encode_batch([], export_format, True)
+        yield compressor.compress(chunk) if compressor else chunk
+
+    if compressor:
+        yield compressor.flush()
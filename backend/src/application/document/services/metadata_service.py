@@ -0,0 +1,154 @@
+from typing import Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+
+from src.infrastructure.db.models.enums import AIMetadataResponse, DocumentMetadata, ai_response_to_db_metadata
+from src.infrastructure.db.repositories.counterparty_repository import CounterpartyRepository
+from src.infrastructure.db.models.document_extraction import DocumentExtraction
+from src.infrastructure.db.models.document_tag import DocumentTag
+from src.infrastructure.db.models.file import File
+from src.infrastructure.db.repositories.document_repository import delete_metadata_for_file
+from src.infrastructure.fragment_cache import file_list_cache
+from src.application.document.services.counterparty_directory import counterparty_directory
+from src.application.document.services.duplicate_service import DuplicateMatch
+from src.utils.timing import now
+
+
+# Columnas que no se copian de un documento a su duplicado
+_NOT_COPIED = {"id", "file_id", "owner_id", "status", "processed_at", "duplicate_of_file_id", "duplicate_score"}
+
+
+def _counterparties(metadata: DocumentMetadata) -> dict[str, str | None]:
+    counterparties = {}
+    for rut, name in ((metadata.company_rut, metadata.company_name), (metadata.client_rut, metadata.client_name)):
+        if rut and rut not in counterparties:
+            counterparties[rut] = name
+    return counterparties
+
+
+async def _file_owner(db: AsyncSession, file_id: int) -> int | None:
+    """Dueño del archivo; se copia a los metadatos para el índice (owner_id, document_date)"""
+    return (await db.execute(select(File.owner_id).where(File.id == file_id))).scalar_one_or_none()
+
+
+async def delete_metadata(db: AsyncSession, file_id: int) -> None:
+    """Borra los metadatos del archivo (sin commit) y descuenta sus contrapartes del directorio.
+
+    El directorio en memoria de otros procesos (y de este) se corrige al recargarse.
+    """
+    previous = (await db.execute(select(DocumentMetadata).where(DocumentMetadata.file_id == file_id))).scalars().all()
+    repository = CounterpartyRepository(db)
+    for metadata in previous:
+        for rut in _counterparties(metadata):
+            await repository.forget(rut)
+    await delete_metadata_for_file(db, file_id)
+
+
+async def add_analysis_result(
+    db: AsyncSession, file_id: int, ai_response: AIMetadataResponse, replace: bool = False
+) -> DocumentMetadata:
+    """Agrega los metadatos de un análisis a la sesión, sin hacer commit.
+
+    Con `replace=True` primero borra los metadatos previos del archivo (upsert).
+    """
+    if replace:
+        await delete_metadata(db, file_id)
+
+    metadata = ai_response_to_db_metadata(ai_response, file_id)
+    metadata.owner_id = await _file_owner(db, file_id)
+    db.add(metadata)
+
+    repository = CounterpartyRepository(db)
+    for rut, name in _counterparties(metadata).items():
+        await repository.record(rut, name)
+
+    return metadata
+
+
+async def add_duplicate_result(
+    db: AsyncSession, file_id: int, match: DuplicateMatch, replace: bool = False
+) -> Optional[DocumentMetadata]:
+    """Copia los metadatos (extracción y tags incluidos) del documento original, sin commit.
+
+    Si el original también es un duplicado se apunta a su raíz. None si el original
+    ya no tiene metadatos (se borró o reanalizó entre medio): hay que analizar el archivo.
+    """
+    source = (await db.execute(
+        select(DocumentMetadata).where(DocumentMetadata.file_id == match.source_file_id)
+    )).scalar_one_or_none()
+    if source is None:
+        return None
+
+    if replace:
+        await delete_metadata(db, file_id)
+
+    metadata = DocumentMetadata(
+        file_id=file_id,
+        owner_id=await _file_owner(db, file_id),
+        processed_at=now(),
+        duplicate_of_file_id=source.duplicate_of_file_id or source.file_id,
+        duplicate_score=match.score,
+        **{
+            column.key: getattr(source, column.key)
+            for column in DocumentMetadata.__table__.columns
+            if column.key not in _NOT_COPIED
+        },
+    )
+    if match.reason != "exact":
+        # Ni el dHash ni MinHash garantizan que sean el mismo documento: se copian datos ajenos
+        metadata.needs_review = True
+
+    extraction = (await db.execute(
+        select(DocumentExtraction).where(DocumentExtraction.metadata_id == source.id)
+    )).scalar_one_or_none()
+    if extraction:
+        metadata.extraction = DocumentExtraction(
+            codec=extraction.codec, raw_size=extraction.raw_size, payload=extraction.payload
+        )
+
+    tags = (await db.execute(
+        select(DocumentTag.tag).where(DocumentTag.metadata_id == source.id)
+    )).scalars().all()
+    metadata.tag_links = [DocumentTag(tag=tag) for tag in tags]
+
+    db.add(metadata)
+
+    repository = CounterpartyRepository(db)
+    for rut, name in _counterparties(metadata).items():
+        await repository.record(rut, name)
+
+    return metadata
+
+
+def observe_committed(metadata: DocumentMetadata) -> None:
+    """Refleja en los índices en memoria (y la caché de la lista) unos metadatos ya confirmados"""
+    for rut, name in _counterparties(metadata).items():
+        counterparty_directory.observe(rut, name)
+    file_list_cache.invalidate(metadata.file_id)
+
+
+async def save_analysis_result(db: AsyncSession, file_id: int, ai_response: AIMetadataResponse) -> DocumentMetadata:
+    """Guarda los metadatos de un análisis y actualiza el directorio de contrapartes"""
+    metadata = await add_analysis_result(db, file_id, ai_response)
+
+    await db.commit()
+    await db.refresh(metadata)
+
+    observe_committed(metadata)
+
+    return metadata
+
+
+async def save_duplicate_result(db: AsyncSession, file_id: int, match: DuplicateMatch) -> Optional[DocumentMetadata]:
+    """Guarda los metadatos copiados de un duplicado y actualiza el directorio de contrapartes (None si ya no hay original)"""
+    metadata = await add_duplicate_result(db, file_id, match)
+    if metadata is None:
+        return None
+
+    await db.commit()
+    await db.refresh(metadata)
+
+    observe_committed(metadata)
+
+    return metadata
@@ -1,5 +1,7 @@
 """ SETTINGS & CONSTANTS FILE """
 
+from typing import Optional
+
 from pydantic_settings import BaseSettings
 
 from src.core.config.constants import ROOT_PATH
@@ -8,11 +10,15 @@ from src.core.config.constants import ROOT_PATH
 
 # Env vars
 class Settings(BaseSettings):
-    database_name: str
-    database_user: str
-    database_password: str
-    database_host: str
-    database_port: str
+    # "mysql" o "sqlite" (embebido, ver infrastructure/db/sqlite.py); con sqlite los database_* no se usan
+    database_backend: str = "mysql"
+    sqlite_path: str = str(ROOT_PATH / "var" / "nolandocs.sqlite3")  # ":memory:" para pruebas
+    sqlite_writer_timeout_seconds: float = 30  # espera máxima por el turno de escritura (ver sqlite.py)
+    database_name: str = ""
+    database_user: str = ""
+    database_password: str = ""
+    database_host: str = ""
+    database_port: str = ""
     environment: str
     url_domain: str
     secret_key: str
@@ -21,14 +27,114 @@ class Settings(BaseSettings):
     gemini_api_key: str
     gemini_model: str
 
+    # Ruteo por tipo/tamaño y escalamiento a un modelo más fuerte (ver infrastructure/model_routing.py)
+    gemini_escalation_model: Optional[str] = None
+    model_escalation_confidence: float = 0.7  # bajo este confidence_score se escala
+    model_routes: list[dict] = []  # JSON: [{"name", "kind", "max_bytes", "model", "escalate_to"}]
+
+    # Precios (USD por millón de tokens) para el costo en analysis_run
+    gemini_input_cost_per_million: float = 0.10
+    gemini_output_cost_per_million: float = 0.40
+    # Por modelo (JSON): {"gemini-2.5-pro": {"input": 1.25, "output": 10.0}}; los que falten usan los de arriba
+    model_prices: dict[str, dict] = {}
+
+    # Cuota de Gemini compartida entre workers (ver infrastructure/rate_limiter.py)
+    gemini_rate_limiter: str = "sqlite"  # sqlite | db | memory
+    gemini_rate_limiter_path: str = str(ROOT_PATH / "var" / "gemini_rate_limit.sqlite3")
+    gemini_requests_per_minute: float = 60
+    gemini_tokens_per_minute: float = 1_000_000
+
+    # Análisis: "inline" (dentro de /upload) o "queue" (tabla analysis_job + src.worker)
+    analysis_mode: str = "inline"
+    analysis_job_max_attempts: int = 5
+    analysis_job_lease_seconds: int = 120
+    analysis_job_backoff_seconds: float = 30
+    analysis_worker_concurrency: int = 4
+
+    # Control de admisión (ver api/middlewares/admission.py)
+    upload_max_body_bytes: int = 50 * 1024 * 1024
+    upload_max_concurrency: int = 8
+    upload_max_queue: int = 32
+    upload_queue_timeout_seconds: float = 10
+    upload_max_per_client: int = 4
+    analysis_max_concurrency: int = 4  # análisis inline simultáneos por proceso
+    analysis_max_queue: int = 16
+    analysis_queue_timeout_seconds: float = 30
+    analysis_max_queue_depth: int = 5000  # modo queue: jobs pendientes antes de rechazar subidas
+
+    # Clasificador local de DTEs: sobre este umbral de confianza no se llama al modelo
+    local_classifier: bool = True
+    local_classifier_threshold: float = 0.9
+
+    # Casi duplicados: reutilizar metadatos en vez de llamar al modelo
+    duplicate_detection: bool = True
+    duplicate_min_jaccard: float = 0.97  # similitud de texto (MinHash); además deben coincidir folio, total y RUT
+    duplicate_max_hamming: int = 4  # bits distintos del dHash (documentos sin texto)
+
+    # PDFs escaneados: páginas rasterizadas en el pool y enviadas en un solo request
+    scanned_pdf_dpi: int = 150
+    scanned_pdf_max_pages: int = 6  # páginas que se envían al modelo
+    scanned_pdf_scan_pages: int = 30  # páginas que se rasterizan para elegir
+
+    # Documentos largos (PDF con texto): map-reduce por rangos de páginas (ver chunk_reducer.py)
+    long_document_min_pages: int = 30  # desde aquí se analiza por fragmentos
+    long_document_chunk_pages: int = 15
+    long_document_concurrency: int = 4  # fragmentos simultáneos (además del rate limiter)
+    long_document_resolve_conflicts: bool = True  # una llamada extra al modelo si los fragmentos discrepan
+
+    # Réplica de lectura (opcional): mismos usuario/clave/base que la primaria
+    database_replica_host: Optional[str] = None
+    database_replica_port: Optional[str] = None
+    # Con sqlite: copia de la base mantenida aparte (Litestream, `.backup`, rsync), abierta solo para leer
+    sqlite_replica_path: Optional[str] = None
+    read_your_writes_seconds: float = 5  # tras escribir, el cliente lee de la primaria
+
+    # Directorio de las subidas (y sus miniaturas)
+    upload_dir: str = str(ROOT_PATH / "uploads")
+
+    # Compresión zstd de las subidas (ver infrastructure/file_storage.py)
+    upload_compression: bool = False
+    upload_compression_level: int = 3
+
+    # Tier frío (ver application/document/services/archive_service.py y src.infrastructure.db.archive)
+    archive_dir: str = str(ROOT_PATH / "archive")  # puede ser un disco más barato que upload_dir
+    archive_after_days: int = 730  # antigüedad del documento (document_date, o processed_at si no tiene)
+    archive_statuses: list[str] = []  # estados que se archivan sin importar la antigüedad, ej: ["rechazado"]
+    archive_segment_max_bytes: int = 256 * 1024 * 1024
+    archive_compression_level: int = 19  # se paga una vez al archivar
+    archive_rehydrated_keep_days: int = 90  # un documento rehidratado no se vuelve a archivar antes de esto
+
+    # Pool de procesos para trabajo CPU (previews, rasterizado de PDFs)
+    process_pool_workers: int = 2
+
+    @property
+    def sqlite_target(self) -> str:
+        # En memoria: base con nombre y caché compartida para que todas las conexiones del proceso la vean
+        if self.sqlite_path == ":memory:":
+            return "file:nolandocs?mode=memory&cache=shared&uri=true"
+        return self.sqlite_path
+
     @property
     def url_db(self) -> str:
+        if self.database_backend == "sqlite":
+            return f"sqlite+aiosqlite:///{self.sqlite_target}"
         return f"mysql+asyncmy://{self.database_user}:{self.database_password}@{self.database_host}:{self.database_port}/{self.database_name}"
 
     @property
     def url_db_sync(self) -> str:
+        if self.database_backend == "sqlite":
+            return f"sqlite:///{self.sqlite_target}"
         return f"mysql+pymysql://{self.database_user}:{self.database_password}@{self.database_host}:{self.database_port}/{self.database_name}"
 
+    @property
+    def url_db_replica(self) -> Optional[str]:
+        if self.database_backend == "sqlite":
+            return f"sqlite+aiosqlite:///{self.sqlite_replica_path}" if self.sqlite_replica_path else None
+        if not self.database_replica_host:
+            return None
+        port = self.database_replica_port or self.database_port
+        return f"mysql+asyncmy://{self.database_user}:{self.database_password}@{self.database_replica_host}:{port}/{self.database_name}"
+
     class Config:
         extra = "allow"
         env_file = f"{ROOT_PATH}/.env"
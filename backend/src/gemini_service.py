@@ -1,42 +1,144 @@
 # services/gemini_service.py
 import google.generativeai as genai
-import json
 from pathlib import Path
 from typing import Optional
 import logging
 from PIL import Image
-import PyPDF2
 import io
+import json
+import asyncio
 import mimetypes
+import math
+import os
+import msgspec
+from dataclasses import replace
+from google.api_core import exceptions as google_exceptions
 
 from src.infrastructure.db.models.enums import AIMetadataResponse, DocumentType
+from src.infrastructure.rate_limiter import RateLimiter, build_rate_limiter
+from src.infrastructure.events import AnalysisStage, report_stage
+from src.infrastructure.metrics import metrics
+from src.infrastructure.analysis_ledger import record_model_call, record_retry
+from src.infrastructure.ai_response_codec import response_schema, decode_ai_response
+from src.infrastructure.model_routing import ModelRouter, analyze_routed, build_model_router
+from src.application.document.services.dte_classifier import classify_dte, LOCAL_SOURCE
+from src.application.document.services.chunk_reducer import Conflict, reduce_partials
+from src.utils.pdf import extract_pdf_pages_text
+from src.infrastructure.pdf_raster import rasterize_pdf
+from src.infrastructure.file_storage import plain_file_async
+from src.core.config.settings import env_vars
 
 logger = logging.getLogger(__name__)
 
+# Estimación de tokens para el rate limiter (se corrige con usage_metadata)
+CHARS_PER_TOKEN = 4
+TOKENS_PER_IMAGE_TILE = 258
+IMAGE_TILE_SIZE = 768
+ESTIMATED_OUTPUT_TOKENS = 1024
+MAX_THROTTLE_RETRIES = 3
+MAX_REPAIR_CHARS = 30000  # JSON roto que se re-envía en la reparación
+MAX_CONFLICT_CONTEXT_CHARS = 60000  # texto de las páginas en conflicto que se envía al resolverlos
+
+
+def estimate_tokens(contents) -> int:
+    """Estimación gruesa de tokens de entrada + salida para un request"""
+    parts = contents if isinstance(contents, list) else [contents]
+    total = ESTIMATED_OUTPUT_TOKENS
+    for part in parts:
+        if isinstance(part, str):
+            total += len(part) // CHARS_PER_TOKEN
+        elif isinstance(part, Image.Image):
+            width, height = part.size
+            total += TOKENS_PER_IMAGE_TILE * math.ceil(width / IMAGE_TILE_SIZE) * math.ceil(height / IMAGE_TILE_SIZE)
+    return total
+
+
 class GeminiDocumentAnalyzer:
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, rate_limiter: Optional[RateLimiter] = None, router: Optional[ModelRouter] = None):
         """Inicializa el analizador de documentos con Gemini"""
         genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel('gemini-2.0-flash')
-
-    async def analyze_document(self, file_path: str, original_filename: str) -> Optional[AIMetadataResponse]:
+        self.router = router or build_model_router()
+        self.models: dict[str, genai.GenerativeModel] = {}
+        self.rate_limiter = rate_limiter
+        # Salida JSON restringida al esquema de AIMetadataResponse
+        self.generation_config = genai.GenerationConfig(
+            response_mime_type="application/json",
+            response_schema=response_schema(),
+        )
+
+    def _model(self, name: str) -> genai.GenerativeModel:
+        if name not in self.models:
+            self.models[name] = genai.GenerativeModel(name)
+        return self.models[name]
+
+    async def _generate(self, contents, model_name: str):
+        """Llama al modelo respetando la cuota compartida; reintenta ante 429"""
+        model = self._model(model_name)
+        estimated_tokens = estimate_tokens(contents)
+
+        for attempt in range(MAX_THROTTLE_RETRIES + 1):
+            if self.rate_limiter:
+                await self.rate_limiter.acquire(estimated_tokens)
+            report_stage(AnalysisStage.CALLING_MODEL)
+            try:
+                response = await model.generate_content_async(contents, generation_config=self.generation_config)
+            except google_exceptions.ResourceExhausted:
+                if not self.rate_limiter or attempt == MAX_THROTTLE_RETRIES:
+                    raise
+                await self.rate_limiter.report_throttled()
+                continue
+
+            usage = getattr(response, "usage_metadata", None)
+            record_model_call(model_name.removeprefix("models/"), contents, usage, retries=attempt)
+            if self.rate_limiter:
+                await self.rate_limiter.report_success(
+                    estimated_tokens, usage.total_token_count if usage else None
+                )
+            report_stage(AnalysisStage.PARSING)
+            return response
+
+    async def analyze_document(
+        self, file_path: str, original_filename: str, compression: Optional[str] = None
+    ) -> Optional[AIMetadataResponse]:
         """
         Analiza un documento usando Gemini y retorna metadatos estructurados
         """
         try:
-            file_path = Path(file_path)
+            report_stage(AnalysisStage.EXTRACTING)
 
             # Determinar tipo de archivo
             mime_type, _ = mimetypes.guess_type(original_filename)
 
-            # Extraer contenido según el tipo de archivo
-            if mime_type and mime_type.startswith('image/'):
-                content = await self._analyze_image(file_path)
-            elif mime_type == 'application/pdf':
-                content = await self._analyze_pdf(file_path)
-            else:
-                # Intentar como texto plano
-                content = await self._analyze_text_file(file_path)
+            # Subidas comprimidas (File.compression) se descomprimen a un temporal
+            async with plain_file_async(file_path, compression) as file_path:
+                # Extraer contenido según el tipo de archivo
+                text, pages = None, None
+                if mime_type and mime_type.startswith('image/'):
+                    kind = "image"
+                elif mime_type == 'application/pdf':
+                    pages = extract_pdf_pages_text(file_path)
+                    text = "".join(page + "\n" for page in pages)
+                    kind = "pdf" if text.strip() else "scanned_pdf"
+                else:
+                    # Intentar como texto plano
+                    with open(file_path, 'r', encoding='utf-8') as file:
+                        text = file.read()
+                    kind = "text"
+
+                content = self._classify_locally(text) if text is not None else None
+                if content is None:
+                    # Modelo según tipo y tamaño; se escala solo si la respuesta no convence
+                    route = self.router.route(kind, os.path.getsize(file_path))
+                    if self._is_long_document(kind, pages):
+                        # Escalar repetiría todo el map-reduce con el modelo fuerte; las dudas
+                        # del resultado combinado (conflictos, fragmentos perdidos) van a revisión
+                        route = replace(route, escalate_to=None)
+                    content = await analyze_routed(
+                        route, lambda model_name: self._analyze_with_model(kind, file_path, text, pages, model_name)
+                    )
+
+            local = content is not None and content.key_data.get("source") == LOCAL_SOURCE
+            metrics.increment("analysis_route", route="local" if local else "model")
 
             return content
 
@@ -44,7 +146,37 @@ class GeminiDocumentAnalyzer:
             logger.error(f"Error analizando documento {original_filename}: {str(e)}")
             return None
 
-    async def _analyze_image(self, file_path: Path) -> Optional[AIMetadataResponse]:
+    async def _analyze_with_model(
+        self, kind: str, file_path: Path, text: Optional[str], pages: Optional[list[str]], model_name: str
+    ) -> Optional[AIMetadataResponse]:
+        if kind == "image":
+            return await self._analyze_image(file_path, model_name)
+        if kind == "text":
+            return await self._analyze_text_file(text, model_name)
+        if self._is_long_document(kind, pages):
+            return await self._analyze_long_pdf(pages, model_name)
+        return await self._analyze_pdf(file_path, text, model_name)
+
+    @staticmethod
+    def _is_long_document(kind: str, pages: Optional[list[str]]) -> bool:
+        return kind == "pdf" and len(pages) >= env_vars.long_document_min_pages
+
+    def _classify_locally(self, text: str) -> Optional[AIMetadataResponse]:
+        """DTEs con capa de texto: reglas locales; None si hay que llamar al modelo"""
+        if not env_vars.local_classifier:
+            return None
+
+        result = classify_dte(text)
+        if result is None:
+            metrics.increment("local_classifier", outcome="not_dte")
+        elif result.confidence_score < env_vars.local_classifier_threshold:
+            metrics.increment("local_classifier", outcome="low_confidence")
+        else:
+            metrics.increment("local_classifier", outcome="accepted", document_type=result.document_type.value)
+            return result
+        return None
+
+    async def _analyze_image(self, file_path: Path, model_name: str) -> Optional[AIMetadataResponse]:
         """Analiza una imagen usando Gemini Vision"""
         try:
             # Cargar imagen
@@ -52,52 +184,145 @@ class GeminiDocumentAnalyzer:
 
             prompt = self._get_analysis_prompt()
 
-            response = self.model.generate_content([prompt, image])
+            response = await self._generate([prompt, image], model_name)
 
             # Parsear respuesta JSON
-            return self._parse_ai_response(response.text)
+            return await self._parse_ai_response(response.text, model_name)
 
         except Exception as e:
             logger.error(f"Error analizando imagen: {str(e)}")
             return None
 
-    async def _analyze_pdf(self, file_path: Path) -> Optional[AIMetadataResponse]:
-        """Analiza un PDF extrayendo texto y analizándolo"""
+    async def _analyze_pdf(self, file_path: Path, text: str, model_name: str) -> Optional[AIMetadataResponse]:
+        """Analiza un PDF a partir de su texto ya extraído"""
         try:
-            # Extraer texto del PDF
-            with open(file_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                text = ""
-                for page in pdf_reader.pages:
-                    text += page.extract_text() + "\n"
-
             if not text.strip():
                 # Si no hay texto, intentar como imagen (PDF escaneado)
-                return await self._analyze_scanned_pdf(file_path)
+                return await self._analyze_scanned_pdf(file_path, model_name)
 
             prompt = self._get_analysis_prompt()
             full_prompt = f"{prompt}\n\nTexto del documento:\n{text}"
 
-            response = self.model.generate_content(full_prompt)
-            return self._parse_ai_response(response.text)
+            response = await self._generate(full_prompt, model_name)
+            return await self._parse_ai_response(response.text, model_name)
 
         except Exception as e:
             logger.error(f"Error analizando PDF: {str(e)}")
             return None
 
-    async def _analyze_scanned_pdf(self, file_path: Path) -> Optional[AIMetadataResponse]:
-        """Analiza un PDF escaneado usando Gemini"""
+    async def _analyze_pdf_chunk(
+        self, pages: list[str], first_page: int, total_pages: int, model_name: str, semaphore: asyncio.Semaphore
+    ) -> Optional[AIMetadataResponse]:
+        """Fase map: un rango de páginas como si fuera el documento completo"""
+        last_page = first_page + len(pages) - 1
+        text = "".join(page + "\n" for page in pages)
+        if not text.strip():
+            return None
+        full_prompt = (
+            f"{self._get_analysis_prompt()}\n\n"
+            f"Este es un fragmento (páginas {first_page} a {last_page} de {total_pages}) de un documento más largo. "
+            "Extrae solo los datos que aparecen en estas páginas; usa null para lo que no esté aquí.\n\n"
+            f"Texto del fragmento:\n{text}"
+        )
+        async with semaphore:
+            try:
+                response = await self._generate(full_prompt, model_name)
+                return await self._parse_ai_response(response.text, model_name)
+            except Exception as e:
+                logger.error(f"Error analizando páginas {first_page}-{last_page}: {str(e)}")
+                return None
+
+    async def _analyze_long_pdf(self, pages: list[str], model_name: str) -> Optional[AIMetadataResponse]:
+        """Map-reduce: rangos de páginas en paralelo (dentro del rate limiter) y reducción determinista"""
+        chunk_size = env_vars.long_document_chunk_pages
+        semaphore = asyncio.Semaphore(env_vars.long_document_concurrency)
+        starts = range(0, len(pages), chunk_size)
+        results = await asyncio.gather(*(
+            self._analyze_pdf_chunk(pages[start:start + chunk_size], start + 1, len(pages), model_name, semaphore)
+            for start in starts
+        ))
+        # Página inicial de cada parcial (los fragmentos fallidos no están)
+        partial_starts = [start for start, result in zip(starts, results) if result is not None]
+        partials = [result for result in results if result is not None]
+        metrics.increment("long_document_chunks", len(results), outcome="total")
+        metrics.increment("long_document_chunks", len(results) - len(partials), outcome="failed")
+        if not partials:
+            return None
+
+        merged, conflicts = reduce_partials(partials)
+        if conflicts and env_vars.long_document_resolve_conflicts:
+            involved = sorted({partial_starts[index] for conflict in conflicts for index in conflict.partials})
+            context = "".join(
+                f"[Páginas {start + 1} a {min(start + chunk_size, len(pages))}]\n"
+                + "".join(page + "\n" for page in pages[start:start + chunk_size])
+                for start in involved
+            )
+            if len(context) > MAX_CONFLICT_CONTEXT_CHARS:
+                context = None
+            resolved = await self._resolve_conflicts(merged, conflicts, context, model_name)
+            metrics.increment("long_document", outcome="resolved" if resolved else "unresolved")
+            if resolved is not None:
+                resolved.extracted_text = merged.extracted_text
+                # Sin el texto de las páginas la elección del modelo es una suposición: se revisa
+                resolved.requires_review = resolved.requires_review or context is None
+                merged = resolved
+            else:
+                merged.requires_review = True
+        else:
+            metrics.increment("long_document", outcome="conflicts" if conflicts else "merged")
+            merged.requires_review = merged.requires_review or bool(conflicts)
+
+        # Fragmentos perdidos: el resultado puede estar incompleto
+        if len(partials) < len(results):
+            merged.requires_review = True
+        return merged
+
+    async def _resolve_conflicts(
+        self, merged: AIMetadataResponse, conflicts: list[Conflict], context: Optional[str], model_name: str
+    ) -> Optional[AIMetadataResponse]:
+        """Una sola llamada con el resultado combinado, los valores en conflicto y, si cabe, el texto de sus páginas"""
+        listed = "\n".join(
+            f"- {conflict.field}: elegido {json.dumps(conflict.chosen, ensure_ascii=False)}; "
+            f"candidatos {json.dumps(conflict.candidates, ensure_ascii=False)}"
+            for conflict in conflicts
+        )
+        summary = merged.model_dump(mode="json", exclude={"extracted_text"})
+        source = f"\n\nTexto de las páginas donde aparecen esos valores:\n{context}" if context else ""
         try:
-            # Para PDFs escaneados, convertir a imagen y analizar
-            # Esto requiere pdf2image: pip install pdf2image
-            from pdf2image import convert_from_path
+            response = await self._generate(
+                "Estos metadatos resultan de analizar por separado los fragmentos de un documento contable largo. "
+                "Algunos campos tenían valores distintos según el fragmento. Decide el valor correcto de cada "
+                "campo en conflicto (los totales del documento suelen estar en las últimas páginas) y responde "
+                "el JSON completo corregido, con extracted_text vacío.\n\n"
+                f"Conflictos:\n{listed}\n\n"
+                f"Metadatos combinados:\n{json.dumps(summary, ensure_ascii=False)}"
+                f"{source}",
+                model_name,
+            )
+            return await self._parse_ai_response(response.text, model_name)
+        except Exception as e:
+            logger.error(f"Error resolviendo conflictos del documento largo: {str(e)}")
+            return None
 
-            images = convert_from_path(file_path, first_page=1, last_page=1)
-            if images:
-                # Analizar solo la primera página
-                prompt = self._get_analysis_prompt()
-                response = self.model.generate_content([prompt, images[0]])
-                return self._parse_ai_response(response.text)
+    async def _analyze_scanned_pdf(self, file_path: Path, model_name: str) -> Optional[AIMetadataResponse]:
+        """Analiza un PDF escaneado enviando varias páginas en un solo request"""
+        try:
+            # Rasterizado en paralelo en el pool de procesos (requiere pdf2image + poppler)
+            pages, total_pages = await rasterize_pdf(
+                file_path,
+                dpi=env_vars.scanned_pdf_dpi,
+                max_pages=env_vars.scanned_pdf_max_pages,
+                scan_pages=env_vars.scanned_pdf_scan_pages,
+            )
+            if pages:
+                page_list = ", ".join(str(page.page_number) for page in pages)
+                prompt = (
+                    f"{self._get_analysis_prompt()}\n\n"
+                    f"Documento escaneado de {total_pages} páginas; se adjuntan las páginas {page_list} "
+                    "en orden. Considera todas al extraer los datos (los totales suelen estar al final)."
+                )
+                response = await self._generate([prompt, *(page.to_image() for page in pages)], model_name)
+                return await self._parse_ai_response(response.text, model_name)
 
         except ImportError:
             logger.warning("pdf2image no instalado. No se puede procesar PDF escaneado")
@@ -106,17 +331,14 @@ class GeminiDocumentAnalyzer:
 
         return None
 
-    async def _analyze_text_file(self, file_path: Path) -> Optional[AIMetadataResponse]:
-        """Analiza un archivo de texto plano"""
+    async def _analyze_text_file(self, text: str, model_name: str) -> Optional[AIMetadataResponse]:
+        """Analiza el contenido de un archivo de texto plano"""
         try:
-            with open(file_path, 'r', encoding='utf-8') as file:
-                text = file.read()
-
             prompt = self._get_analysis_prompt()
             full_prompt = f"{prompt}\n\nContenido del documento:\n{text}"
 
-            response = self.model.generate_content(full_prompt)
-            return self._parse_ai_response(response.text)
+            response = await self._generate(full_prompt, model_name)
+            return await self._parse_ai_response(response.text, model_name)
 
         except Exception as e:
             logger.error(f"Error analizando archivo de texto: {str(e)}")
@@ -160,7 +382,7 @@ Responde ÚNICAMENTE con un JSON válido que siga exactamente esta estructura:
     "account_codes": ["cuenta1", "cuenta2"],
     "requires_review": false,
     "extracted_text": "texto principal extraído",
-    "key_data": {{}}
+    "key_data": [{{"key": "dato clave", "value": "valor"}}]
 }}
 
 INSTRUCCIONES ESPECÍFICAS:
@@ -176,43 +398,59 @@ INSTRUCCIONES ESPECÍFICAS:
 - Responde SOLO el JSON, sin texto adicional
 """
 
-    def _parse_ai_response(self, response_text: str) -> Optional[AIMetadataResponse]:
-        """Parsea la respuesta de texto del AI a un objeto AIMetadataResponse"""
+    async def _parse_ai_response(self, response_text: str, model_name: str) -> Optional[AIMetadataResponse]:
+        """Decodifica la respuesta; si no cumple el esquema, un reintento de reparación"""
         try:
-            # Limpiar respuesta para extraer solo el JSON
-            response_text = response_text.strip()
-
-            # Buscar JSON en la respuesta
-            start_idx = response_text.find('{')
-            end_idx = response_text.rfind('}') + 1
-
-            if start_idx == -1 or end_idx == 0:
-                logger.error("No se encontró JSON válido en la respuesta del AI")
-                return None
-
-            json_text = response_text[start_idx:end_idx]
-
-            # Parsear JSON
-            data = json.loads(json_text)
-
-            # Crear objeto AIMetadataResponse
-            return AIMetadataResponse(**data)
-
-        except json.JSONDecodeError as e:
-            logger.error(f"Error parseando JSON de AI: {str(e)}")
-            logger.error(f"Respuesta recibida: {response_text}")
-            return None
+            result = decode_ai_response(response_text)
+            metrics.increment("ai_response_parse", outcome="ok")
+            return result
+        except (msgspec.DecodeError, msgspec.ValidationError) as e:
+            error = str(e)
+
+        # Texto alrededor del JSON (respuestas sin esquema): probar solo el objeto
+        start_idx = response_text.find('{')
+        end_idx = response_text.rfind('}') + 1
+        if start_idx != -1 and end_idx > start_idx and (start_idx, end_idx) != (0, len(response_text)):
+            try:
+                result = decode_ai_response(response_text[start_idx:end_idx])
+                metrics.increment("ai_response_parse", outcome="trimmed")
+                return result
+            except (msgspec.DecodeError, msgspec.ValidationError) as e:
+                error = str(e)
+
+        logger.warning(f"Respuesta del AI no cumple el esquema ({error}); reintentando reparación")
+        record_retry()
+        try:
+            # Solo el error y el JSON roto: mucho más barato que re-enviar el documento
+            response = await self._generate(
+                "Corrige este JSON para que cumpla el esquema indicado. "
+                "Responde solo el JSON corregido, sin cambiar los datos que ya son válidos.\n\n"
+                f"Error: {error}\n\nJSON:\n{response_text[:MAX_REPAIR_CHARS]}",
+                model_name,
+            )
+            result = decode_ai_response(response.text)
+            metrics.increment("ai_response_parse", outcome="repaired")
+            return result
         except Exception as e:
+            metrics.increment("ai_response_parse", outcome="failed")
             logger.error(f"Error procesando respuesta de AI: {str(e)}")
+            logger.error(f"Respuesta recibida: {response_text}")
             return None
 
 # Instancia global del analizador (inicializar con tu API key)
 gemini_analyzer = None
 
-def init_gemini_service(api_key: str):
-    """Inicializa el servicio de Gemini con la API key"""
+def init_gemini_service(api_key: str, rate_limiter: Optional[RateLimiter] = None):
+    """Inicializa el servicio de Gemini con la API key (y el rate limiter de la config)"""
     global gemini_analyzer
-    gemini_analyzer = GeminiDocumentAnalyzer(api_key)
+    if rate_limiter is None:
+        rate_limiter = build_rate_limiter(
+            env_vars.gemini_rate_limiter,
+            requests_per_minute=env_vars.gemini_requests_per_minute,
+            tokens_per_minute=env_vars.gemini_tokens_per_minute,
+            path=Path(env_vars.gemini_rate_limiter_path),
+        )
+    gemini_analyzer = GeminiDocumentAnalyzer(api_key, rate_limiter)
 
 def get_gemini_analyzer() -> Optional[GeminiDocumentAnalyzer]:
     """Obtiene la instancia del analizador de Gemini"""
@@ -0,0 +1,105 @@
+"""
+Control de admisión: limita cuánto trabajo pesado corre a la vez por proceso.
+
+Cada `AdmissionController` deja pasar `max_concurrency` tareas; las siguientes
+esperan en una cola de a lo más `max_queue` lugares durante `queue_timeout`.
+Si la cola está llena o se agota la espera se lanza `Overloaded` con un
+`retry_after` estimado a partir del tiempo promedio de servicio, para responder
+rápido (503 + Retry-After) en vez de acumular memoria y conexiones.
+"""
+import asyncio
+import math
+import time
+from contextlib import asynccontextmanager
+from typing import Optional
+
+from src.core.config.settings import env_vars
+from src.infrastructure.metrics import metrics
+
+
+
+MIN_RETRY_AFTER = 1
+MAX_RETRY_AFTER = 120
+EWMA_ALPHA = 0.2
+
+
+class Overloaded(Exception):
+    def __init__(self, gate: str, reason: str, retry_after: int):  # reason: queue_full | timeout
+        super().__init__(f"{gate}: {reason}")
+        self.gate = gate
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    def __init__(self, name: str, max_concurrency: int, max_queue: int, queue_timeout: float):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.in_flight = 0
+        self.waiting = 0
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._service_seconds = 1.0  # promedio móvil del tiempo de cada tarea
+
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        # Se crea perezosamente dentro del event loop que lo usa
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    def retry_after(self) -> int:
+        """Segundos estimados hasta que se libere un lugar para alguien que llega ahora"""
+        rounds = (self.waiting + 1) / max(1, self.max_concurrency)
+        return max(MIN_RETRY_AFTER, min(MAX_RETRY_AFTER, math.ceil(self._service_seconds * rounds)))
+
+    async def acquire(self) -> None:
+        if not self.semaphore.locked():
+            # Hay lugar libre: se toma sin ceder el event loop
+            await self.semaphore.acquire()
+        elif self.waiting >= self.max_queue:
+            metrics.increment("admission", gate=self.name, outcome="queue_full")
+            raise Overloaded(self.name, "queue_full", self.retry_after())
+        else:
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(self.semaphore.acquire(), timeout=self.queue_timeout)
+            except asyncio.TimeoutError:
+                metrics.increment("admission", gate=self.name, outcome="timeout")
+                raise Overloaded(self.name, "timeout", self.retry_after())
+            finally:
+                self.waiting -= 1
+
+        self.in_flight += 1
+        metrics.increment("admission", gate=self.name, outcome="admitted")
+
+    def release(self, elapsed_seconds: float) -> None:
+        self.in_flight -= 1
+        self._service_seconds += EWMA_ALPHA * (elapsed_seconds - self._service_seconds)
+        self.semaphore.release()
+
+    @asynccontextmanager
+    async def admit(self):
+        await self.acquire()
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.release(time.monotonic() - started)
+
+
+upload_admission = AdmissionController(
+    "upload",
+    max_concurrency=env_vars.upload_max_concurrency,
+    max_queue=env_vars.upload_max_queue,
+    queue_timeout=env_vars.upload_queue_timeout_seconds,
+)
+
+# Análisis inline (dentro de /upload): las subidas son I/O, el modelo es el recurso escaso
+analysis_admission = AdmissionController(
+    "analysis",
+    max_concurrency=env_vars.analysis_max_concurrency,
+    max_queue=env_vars.analysis_max_queue,
+    queue_timeout=env_vars.analysis_queue_timeout_seconds,
+)
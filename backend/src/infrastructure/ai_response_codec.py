@@ -0,0 +1,137 @@
+"""
+Esquema de salida para Gemini y decodificación tipada de sus respuestas.
+
+- `response_schema()` deriva de `AIMetadataResponse` el esquema que se envía
+  como `response_schema` (subconjunto OpenAPI que acepta Gemini: sin $ref ni
+  anyOf, y sin objetos de claves libres). Por eso los dicts de claves conocidas
+  (issuer, client, amounts) se declaran con sus propiedades y `key_data` viaja
+  como lista de pares {key, value}.
+- `decode_ai_response()` decodifica con msgspec contra `AIMetadataWire` (mismo
+  formato de cable) y arma el `AIMetadataResponse`.
+"""
+from typing import Annotated, Any, Optional, Union
+
+import msgspec
+
+from src.infrastructure.db.models.enums import AIMetadataResponse, DocumentType
+
+
+
+# Propiedades de los campos que en el modelo son Dict[str, ...]
+OBJECT_KEYS = {
+    "issuer": ("name", "rut", "address"),
+    "client": ("name", "rut", "address"),
+    "amounts": ("total", "net", "tax", "other_taxes"),
+}
+KEY_VALUE_FIELDS = ("key_data",)
+
+# Claves de JSON Schema que Gemini acepta en response_schema
+_ALLOWED_KEYS = {"type", "format", "description", "nullable", "enum", "properties", "required", "items"}
+
+
+class Party(msgspec.Struct):
+    name: Optional[str] = None
+    rut: Optional[str] = None
+    address: Optional[str] = None
+
+
+class Amounts(msgspec.Struct):
+    total: Optional[float] = None
+    net: Optional[float] = None
+    tax: Optional[float] = None
+    other_taxes: Optional[float] = None
+
+
+class KeyValue(msgspec.Struct):
+    key: str
+    value: Optional[str] = None
+
+
+class AIMetadataWire(msgspec.Struct):
+    """Formato de cable de AIMetadataResponse (mantener en sincronía con el modelo)"""
+    document_type: DocumentType
+    confidence_score: Annotated[float, msgspec.Meta(ge=0.0, le=1.0)]
+    description: str
+    extracted_text: str
+    document_number: Optional[str] = None
+    document_date: Optional[str] = None
+    due_date: Optional[str] = None
+    issuer: Optional[Party] = None
+    client: Optional[Party] = None
+    amounts: Optional[Amounts] = None
+    currency: str = "CLP"
+    tags: list[str] = []
+    accounting_period: Optional[str] = None
+    account_codes: list[str] = []
+    requires_review: bool = False
+    # Lista de pares según el esquema; se acepta también un objeto plano
+    key_data: Union[list[KeyValue], dict[str, Optional[str]]] = []
+
+
+_decoder = msgspec.json.Decoder(AIMetadataWire)
+
+
+def _convert(node: dict, defs: dict, field_name: Optional[str] = None) -> dict:
+    if "$ref" in node:
+        resolved = dict(defs[node["$ref"].split("/")[-1]])
+        resolved.update({key: value for key, value in node.items() if key != "$ref"})
+        node = resolved
+
+    if "anyOf" in node:
+        options = [option for option in node["anyOf"] if option.get("type") != "null"]
+        merged = {key: value for key, value in node.items() if key != "anyOf"}
+        merged.update(options[0])
+        converted = _convert(merged, defs, field_name)
+        if len(options) < len(node["anyOf"]):
+            converted["nullable"] = True
+        return converted
+
+    if field_name in KEY_VALUE_FIELDS:
+        return {
+            "type": "array",
+            "description": node.get("description", ""),
+            "items": {
+                "type": "object",
+                "properties": {"key": {"type": "string"}, "value": {"type": "string", "nullable": True}},
+                "required": ["key"],
+            },
+        }
+
+    if node.get("type") == "object" and field_name in OBJECT_KEYS:
+        value_schema = _convert(node.get("additionalProperties", {"type": "string"}), defs)
+        node = {
+            **node,
+            "properties": {key: dict(value_schema) for key in OBJECT_KEYS[field_name]},
+        }
+
+    converted = {key: value for key, value in node.items() if key in _ALLOWED_KEYS and key not in ("properties", "items")}
+    if "properties" in node:
+        converted["properties"] = {
+            name: _convert(child, defs, name) for name, child in node["properties"].items()
+        }
+    if "items" in node:
+        converted["items"] = _convert(node["items"], defs)
+    return converted
+
+
+def response_schema() -> dict[str, Any]:
+    """Esquema de `AIMetadataResponse` en el formato que acepta Gemini"""
+    schema = AIMetadataResponse.model_json_schema()
+    converted = _convert(schema, schema.get("$defs", {}))
+    converted["required"] = schema.get("required", [])
+    return converted
+
+
+def decode_ai_response(raw: str | bytes) -> AIMetadataResponse:
+    """Decodifica y valida una respuesta del modelo. Lanza msgspec.DecodeError/ValidationError"""
+    wire = _decoder.decode(raw)
+    data = msgspec.structs.asdict(wire)
+
+    for name in OBJECT_KEYS:
+        if data[name] is not None:
+            data[name] = msgspec.structs.asdict(data[name])
+    if isinstance(wire.key_data, list):
+        data["key_data"] = {pair.key: pair.value for pair in wire.key_data}
+
+    # Los tipos ya vienen validados por msgspec: no hace falta otra pasada de pydantic
+    return AIMetadataResponse.model_construct(**data)
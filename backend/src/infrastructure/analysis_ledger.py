@@ -0,0 +1,153 @@
+"""
+Ledger de análisis: una fila en `analysis_run` por cada análisis de un archivo.
+
+`track_analysis_run(file_id)` abre un contexto (ContextVar, como los eventos de
+progreso) donde `_generate` del analizador va sumando cada llamada al modelo
+con `record_model_call`, que también suma el costo de cada llamada con el
+precio de su modelo (`model_prices`; si no está, los globales). Con
+escalamiento `model` queda como "primero>escalado". Al salir se mide la
+latencia y se guarda la fila en su propia sesión:
+un error al registrar nunca hace fallar el análisis. Si el análisis escribe en
+una sesión de quien llama (`session`), esa transacción se cierra antes: con
+SQLite la sesión del ledger esperaría el turno de escritura que aquella retiene.
+"""
+import logging
+import time
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Optional
+
+from PIL import Image
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.config.settings import env_vars
+from src.infrastructure.db.models.analysis_run import AnalysisRun
+from src.infrastructure.db.repositories.analysis_run_repository import AnalysisRunRepository
+from src.infrastructure.db.session import get_db_session
+
+logger = logging.getLogger(__name__)
+
+
+
+MODEL_COLUMN_LENGTH = 64
+
+
+def model_price(model: str) -> tuple[float, float]:
+    """(entrada, salida) en USD por millón de tokens"""
+    price = env_vars.model_prices.get(model) or {}
+    return (
+        float(price.get("input", env_vars.gemini_input_cost_per_million)),
+        float(price.get("output", env_vars.gemini_output_cost_per_million)),
+    )
+
+
+@dataclass
+class RunStats:
+    file_id: Optional[int]
+    models: list[str] = field(default_factory=list)  # en orden de uso, sin repetir
+    document_type: Optional[str] = None
+    outcome: str = "failed"  # completed | failed | discarded (lease perdido)
+    cache_hit: bool = False
+    model_calls: int = 0
+    retries: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    image_count: int = 0
+    prompt_bytes: int = 0
+    cost_usd: float = 0.0
+
+    def finish(self, result) -> None:
+        """Marca el resultado del análisis (AIMetadataResponse o None)"""
+        if result is None:
+            self.outcome = "failed"
+            return
+        self.outcome = "completed"
+        self.document_type = getattr(result.document_type, "value", result.document_type)
+
+    def finish_duplicate(self, metadata) -> None:
+        """Metadatos copiados de un duplicado: no hubo llamada al modelo"""
+        self.outcome = "completed"
+        self.cache_hit = True
+        self.document_type = metadata.document_type
+
+    @property
+    def model(self) -> Optional[str]:
+        return ">".join(self.models)[:MODEL_COLUMN_LENGTH] if self.models else None
+
+
+_current_run: ContextVar[Optional[RunStats]] = ContextVar("analysis_run", default=None)
+
+
+def record_model_call(model: str, contents, usage=None, retries: int = 0) -> None:
+    """Suma una llamada al modelo al análisis del contexto actual (no hace nada fuera de contexto)"""
+    run = _current_run.get()
+    if run is None:
+        return
+
+    parts = contents if isinstance(contents, list) else [contents]
+    if model not in run.models:
+        run.models.append(model)
+    run.model_calls += 1
+    run.retries += retries
+    run.image_count += sum(1 for part in parts if isinstance(part, Image.Image))
+    run.prompt_bytes += sum(len(part.encode("utf-8")) for part in parts if isinstance(part, str))
+    if usage is not None:
+        input_tokens = usage.prompt_token_count or 0
+        output_tokens = usage.candidates_token_count or 0
+        input_price, output_price = model_price(model)
+        run.input_tokens += input_tokens
+        run.output_tokens += output_tokens
+        run.cost_usd += (input_tokens * input_price + output_tokens * output_price) / 1_000_000
+
+
+def record_retry() -> None:
+    """Una llamada extra que no produjo resultado útil (ej. reparación de JSON)"""
+    run = _current_run.get()
+    if run is not None:
+        run.retries += 1
+
+
+@asynccontextmanager
+async def track_analysis_run(file_id: Optional[int], session: Optional[AsyncSession] = None):
+    run = RunStats(file_id=file_id)
+    token = _current_run.set(run)
+    started = time.monotonic()
+    failed = False
+    try:
+        yield run
+    except BaseException:
+        failed = True
+        raise
+    finally:
+        _current_run.reset(token)
+        latency_ms = int((time.monotonic() - started) * 1000)
+        try:
+            if session is not None and session.in_transaction():
+                # Error a medias: se deshace lo escrito; si no, se confirma
+                await (session.rollback() if failed else session.commit())
+        finally:
+            await _save_run(run, latency_ms=latency_ms)
+
+
+async def _save_run(run: RunStats, latency_ms: int) -> None:
+    try:
+        async with get_db_session() as session:
+            await AnalysisRunRepository(session).add(AnalysisRun(
+                file_id=run.file_id,
+                model=run.model,
+                document_type=run.document_type,
+                outcome=run.outcome,
+                cache_hit=run.cache_hit,
+                model_calls=run.model_calls,
+                retries=run.retries,
+                input_tokens=run.input_tokens,
+                output_tokens=run.output_tokens,
+                image_count=run.image_count,
+                prompt_bytes=run.prompt_bytes,
+                latency_ms=latency_ms,
+                cost_usd=run.cost_usd,
+            ))
+            await session.commit()
+    except Exception as e:
+        logger.error(f"No se pudo registrar el análisis del archivo {run.file_id}: {str(e)}")
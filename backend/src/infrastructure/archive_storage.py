@@ -0,0 +1,97 @@
+"""
+Segmentos del tier frío: los archivos de muchos documentos reempaquetados
+en un solo archivo `segment-<timestamp>.zst`, cada uno como un frame zstd
+independiente. Con el offset y el largo de un frame se recupera un archivo
+sin leer el resto del segmento.
+
+Las subidas ya guardadas con zstd (ver file_storage.py) se copian tal cual:
+ya son un frame. El resto se comprime con `archive_compression_level`, más
+alto que el de las subidas porque se paga una sola vez.
+
+Los segmentos se escriben con un sufijo temporal y se renombran al cerrar:
+un segmento a medio escribir nunca queda referenciado en la base.
+"""
+import os
+import secrets
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+import zstandard
+
+from src.core.config.settings import env_vars
+from src.infrastructure.file_storage import ZSTD_ENCODING
+from src.utils.timing import now
+
+
+
+SEGMENT_SUFFIX = ".zst"
+PARTIAL_SUFFIX = ".partial"
+
+
+@dataclass
+class SegmentMember:
+    file_id: int
+    offset: int
+    length: int
+    raw_size: int
+
+
+class SegmentWriter:
+    """Agrega archivos a un segmento nuevo; `close()` lo deja en su ruta definitiva"""
+
+    def __init__(self, directory: Optional[Path] = None):
+        directory = Path(directory or env_vars.archive_dir)
+        directory.mkdir(parents=True, exist_ok=True)
+        self.path = directory / f"segment-{now():%Y%m%d%H%M%S}-{secrets.token_hex(4)}{SEGMENT_SUFFIX}"
+        self._partial = self.path.with_name(self.path.name + PARTIAL_SUFFIX)
+        self._output = open(self._partial, "wb")
+        self._compressor = zstandard.ZstdCompressor(level=env_vars.archive_compression_level, write_checksum=True)
+        self.members: list[SegmentMember] = []
+        self.raw_bytes = 0
+        self.stored_bytes = 0
+
+    def add(self, file_id: int, path: str | Path, compression: Optional[str], raw_size: int) -> SegmentMember:
+        content = Path(path).read_bytes()
+        frame = content if compression == ZSTD_ENCODING else self._compressor.compress(content)
+        member = SegmentMember(file_id=file_id, offset=self.stored_bytes, length=len(frame), raw_size=raw_size)
+        self._output.write(frame)
+        self.members.append(member)
+        self.raw_bytes += raw_size
+        self.stored_bytes += len(frame)
+        return member
+
+    def close(self) -> Path:
+        self._output.flush()
+        os.fsync(self._output.fileno())
+        self._output.close()
+        self._partial.replace(self.path)
+        return self.path
+
+    def abort(self) -> None:
+        self._output.close()
+        self._partial.unlink(missing_ok=True)
+
+
+def read_member(segment_path: str | Path, offset: int, length: int) -> bytes:
+    with open(segment_path, "rb") as segment:
+        segment.seek(offset)
+        frame = segment.read(length)
+    if len(frame) != length:
+        raise ValueError(f"Segmento truncado: {segment_path} (offset {offset}, largo {length})")
+    return frame
+
+
+def restore_member(frame: bytes, compression: Optional[str]) -> bytes:
+    """Los bytes tal como estaban en `uploads/` (comprimidos si la subida lo estaba)"""
+    if compression == ZSTD_ENCODING:
+        return frame
+    return zstandard.ZstdDecompressor().decompress(frame)
+
+
+def write_atomic(target: str | Path, content: bytes) -> None:
+    target = Path(target)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    partial = target.with_name(target.name + PARTIAL_SUFFIX)
+    partial.write_bytes(content)
+    partial.replace(target)
@@ -0,0 +1,100 @@
+"""
+Archiva documentos antiguos en el tier frío (ver application/document/services/archive_service.py).
+
+Ejemplos:
+    python -m src.infrastructure.db.archive
+    python -m src.infrastructure.db.archive --before 2024-01-01 --status rechazado
+    python -m src.infrastructure.db.archive --older-than-days 365 --dry-run
+
+Cada segmento se confirma por separado: si el proceso muere, volver a correr
+el mismo comando sigue con los documentos que aún están calientes. Los
+rehidratados hace menos de --rehydrated-keep-days se dejan calientes.
+"""
+import argparse
+import asyncio
+from datetime import datetime, timedelta
+from typing import Optional
+
+from src.core.config.settings import env_vars
+from src.infrastructure.db.session import get_db_session
+from src.infrastructure.db.repositories.archive_repository import ArchiveRepository
+from src.application.document.services.archive_service import archive_documents
+from src.utils.timing import now
+
+
+
+CANDIDATES_PAGE_SIZE = 500
+
+
+async def archive(args: argparse.Namespace) -> None:
+    before = args.before or (now() - timedelta(days=args.older_than_days)).replace(tzinfo=None)
+    statuses = args.status if args.status is not None else env_vars.archive_statuses
+    rehydrated_before = (now() - timedelta(days=args.rehydrated_keep_days)).replace(tzinfo=None)
+    print(f"Archivando documentos anteriores a {before:%Y-%m-%d}" + (f" o con estado {', '.join(statuses)}" if statuses else ""))
+
+    last_file_id, remaining = 0, args.limit
+    totals = {"documents": 0, "segments": 0, "raw_bytes": 0, "stored_bytes": 0, "missing": 0}
+    segment_ids, segment_bytes = [], 0
+
+    async def flush() -> None:
+        nonlocal segment_ids, segment_bytes
+        if segment_ids and not args.dry_run:
+            result = await archive_documents(segment_ids)
+            totals["documents"] += result.documents
+            totals["segments"] += 1 if result.segment_path else 0
+            totals["raw_bytes"] += result.raw_bytes
+            totals["stored_bytes"] += result.stored_bytes
+            totals["missing"] += len(result.missing)
+            print(f"Segmento {result.segment_path}: {result.documents} documentos, "
+                  f"{result.raw_bytes:,} -> {result.stored_bytes:,} bytes")
+        segment_ids, segment_bytes = [], 0
+
+    while remaining is None or remaining > 0:
+        page_size = CANDIDATES_PAGE_SIZE if remaining is None else min(CANDIDATES_PAGE_SIZE, remaining)
+        async with get_db_session() as session:
+            candidates = await ArchiveRepository(session).candidates(
+                before, statuses, after_file_id=last_file_id, limit=page_size, rehydrated_before=rehydrated_before
+            )
+        if not candidates:
+            break
+
+        for candidate in candidates:
+            if args.dry_run:
+                print(f"[dry-run] {candidate.id} {candidate.original_name}")
+            segment_ids.append(candidate.id)
+            segment_bytes += candidate.stored_size or 0
+            if segment_bytes >= args.segment_max_bytes:
+                await flush()
+
+        last_file_id = candidates[-1].id
+        if remaining is not None:
+            remaining -= len(candidates)
+    await flush()
+
+    if args.dry_run:
+        return
+    print(f"Archivados {totals['documents']} documentos en {totals['segments']} segmentos "
+          f"({totals['raw_bytes']:,} -> {totals['stored_bytes']:,} bytes); sin archivo en disco: {totals['missing']}")
+
+
+def parse_date(value: str) -> datetime:
+    return datetime.strptime(value, "%Y-%m-%d")
+
+
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Mueve documentos antiguos al tier frío (segmentos comprimidos)")
+    parser.add_argument("--before", type=parse_date, help="Documentos con fecha anterior a YYYY-MM-DD")
+    parser.add_argument("--older-than-days", type=int, default=env_vars.archive_after_days,
+                        help="Documentos con más de N días (si no se indica --before)")
+    parser.add_argument("--status", nargs="*", help="Estados que se archivan sin importar la fecha (ej: rechazado)")
+    parser.add_argument("--rehydrated-keep-days", type=int, default=env_vars.archive_rehydrated_keep_days,
+                        help="No archivar documentos rehidratados hace menos de N días")
+    parser.add_argument("--segment-max-bytes", type=int, default=env_vars.archive_segment_max_bytes,
+                        help="Bytes de uploads/ que se reempaquetan en cada segmento")
+    parser.add_argument("--limit", type=int, help="Máximo de documentos a archivar en esta corrida")
+    parser.add_argument("--dry-run", action="store_true", help="Solo listar los documentos seleccionados")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    asyncio.run(archive(parse_args()))
@@ -5,12 +5,16 @@ from src.infrastructure.db.models.base import BaseModel
 
 
 from src.core.config.settings import env_vars
+from src.infrastructure.db.session import engine
 
 config_db = SQLAlchemyAsyncConfig(
-    connection_string=env_vars.url_db,
-    create_all=False,
+    # Mismo engine que get_db_session: un solo pool (y con SQLite, una sola cola de escritura)
+    engine_instance=engine,
+    # SQLite en memoria no pasa por Alembic: el esquema se crea al iniciar
+    create_all=env_vars.database_backend == "sqlite" and env_vars.sqlite_path == ":memory:",
     metadata=BaseModel.metadata,
-    session_dependency_key="db",
+    # Los handlers reciben `db` de api/dependencies/db.py (primaria o réplica)
+    session_dependency_key="db_primary",
     engine_dependency_key="db_engine",
     before_send_handler="autocommit"
 )
@@ -12,16 +12,31 @@ from src.infrastructure.db.models.base import BaseModel
 from src.infrastructure.db.models.user import User
 from src.infrastructure.db.models.file import File
 from src.infrastructure.db.models.document_metadata import DocumentMetadata
+from src.infrastructure.db.models.document_extraction import DocumentExtraction
+from src.infrastructure.db.models.document_tag import DocumentTag
+from src.infrastructure.db.models.counterparty import Counterparty
+from src.infrastructure.db.models.rate_limit_bucket import RateLimitBucket
+from src.infrastructure.db.models.analysis_job import AnalysisJob
+from src.infrastructure.db.models.document_fingerprint import DocumentFingerprint, FingerprintBucket
+from src.infrastructure.db.models.analysis_run import AnalysisRun
+from src.infrastructure.db.models.document_archive import ArchiveSegment, ArchivedDocument
+from src.infrastructure.db.models.analysis_event import AnalysisEvent
 from src.core.config.constants import ROOT_PATH
 
 
 load_dotenv(ROOT_PATH / '.env')
-DB_USER = os.getenv("DATABASE_USER")
-DB_PASS = os.getenv("DATABASE_PASSWORD")
-DB_HOST = os.getenv("DATABASE_HOST")
-DB_PORT = os.getenv("DATABASE_PORT")
-DB_NAME = os.getenv("DATABASE_NAME")
-DATABASE_URL = f"mysql+pymysql://{DB_USER}:{DB_PASS}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+DB_BACKEND = os.getenv("DATABASE_BACKEND", "mysql")
+if DB_BACKEND == "sqlite":
+    DB_PATH = os.getenv("SQLITE_PATH", str(ROOT_PATH / "var" / "nolandocs.sqlite3"))
+    os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
+    DATABASE_URL = f"sqlite:///{DB_PATH}"
+else:
+    DB_USER = os.getenv("DATABASE_USER")
+    DB_PASS = os.getenv("DATABASE_PASSWORD")
+    DB_HOST = os.getenv("DATABASE_HOST")
+    DB_PORT = os.getenv("DATABASE_PORT")
+    DB_NAME = os.getenv("DATABASE_NAME")
+    DATABASE_URL = f"mysql+pymysql://{DB_USER}:{DB_PASS}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -63,6 +78,7 @@ def run_migrations_offline() -> None:
         target_metadata=target_metadata,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
+        render_as_batch=DB_BACKEND == "sqlite",
     )
 
     with context.begin_transaction():
@@ -84,7 +100,9 @@ def run_migrations_online() -> None:
 
     with connectable.connect() as connection:
         context.configure(
-            connection=connection, target_metadata=target_metadata
+            connection=connection, target_metadata=target_metadata,
+            # SQLite no soporta ALTER de FKs/columnas: Alembic recrea la tabla
+            render_as_batch=connection.dialect.name == "sqlite",
         )
 
         with context.begin_transaction():
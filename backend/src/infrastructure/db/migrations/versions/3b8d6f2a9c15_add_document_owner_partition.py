@@ -0,0 +1,45 @@
+"""add document owner partition
+
+Revision ID: 3b8d6f2a9c15
+Revises: a7c41e9d3b82
+Create Date: 2026-10-19 23:12:44.518302
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b8d6f2a9c15'
+down_revision: Union[str, Sequence[str], None] = 'a7c41e9d3b82'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Los documentos existentes quedan sin dueño (owner_id NULL): los ve la instalación sin login
+    with op.batch_alter_table('file') as batch_op:
+        batch_op.add_column(sa.Column('owner_id', sa.Integer(), nullable=True))
+        batch_op.create_index('ix_file_owner_id_id', ['owner_id', 'id'], unique=False)
+        batch_op.create_foreign_key('fk_file_owner_id', 'user', ['owner_id'], ['id'])
+
+    with op.batch_alter_table('document_metadata') as batch_op:
+        batch_op.add_column(sa.Column('owner_id', sa.Integer(), nullable=True))
+        batch_op.create_index(
+            'ix_document_metadata_owner_id_document_date', ['owner_id', 'document_date'], unique=False
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('document_metadata') as batch_op:
+        batch_op.drop_index('ix_document_metadata_owner_id_document_date')
+        batch_op.drop_column('owner_id')
+
+    with op.batch_alter_table('file') as batch_op:
+        batch_op.drop_constraint('fk_file_owner_id', type_='foreignkey')
+        batch_op.drop_index('ix_file_owner_id_id')
+        batch_op.drop_column('owner_id')
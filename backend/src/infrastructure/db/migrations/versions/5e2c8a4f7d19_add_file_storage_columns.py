@@ -0,0 +1,32 @@
+"""add file stored_size and compression
+
+Revision ID: 5e2c8a4f7d19
+Revises: 9d3f5a8e2b60
+Create Date: 2026-10-19 19:12:40.518233
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e2c8a4f7d19'
+down_revision: Union[str, Sequence[str], None] = '9d3f5a8e2b60'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('file', sa.Column('stored_size', sa.Integer(), nullable=True))
+    op.add_column('file', sa.Column('compression', sa.String(length=16), nullable=True))
+    # Los archivos existentes están guardados sin comprimir
+    op.execute("UPDATE file SET stored_size = size")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('file', 'compression')
+    op.drop_column('file', 'stored_size')
@@ -0,0 +1,39 @@
+"""add analysis event table
+
+Revision ID: 6f1b3d8a2e47
+Revises: d4a9e27c1f60
+Create Date: 2026-10-19 23:59:41.207311
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6f1b3d8a2e47'
+down_revision: Union[str, Sequence[str], None] = 'd4a9e27c1f60'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('analysis_event',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('file_id', sa.Integer(), nullable=False),
+    sa.Column('stage', sa.String(length=20), nullable=False),
+    sa.Column('detail', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_analysis_event_file_id'), 'analysis_event', ['file_id'], unique=False)
+    op.create_index(op.f('ix_analysis_event_created_at'), 'analysis_event', ['created_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_analysis_event_created_at'), table_name='analysis_event')
+    op.drop_index(op.f('ix_analysis_event_file_id'), table_name='analysis_event')
+    op.drop_table('analysis_event')
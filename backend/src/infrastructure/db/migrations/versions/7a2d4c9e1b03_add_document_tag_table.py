@@ -0,0 +1,66 @@
+"""add document tag table
+
+Revision ID: 7a2d4c9e1b03
+Revises: 3c1f9a7d2e41
+Create Date: 2026-10-19 11:02:17.530912
+
+"""
+import json
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from src.infrastructure.db.models.document_tag import normalize_tags
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7a2d4c9e1b03'
+down_revision: Union[str, Sequence[str], None] = '3c1f9a7d2e41'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+BACKFILL_BATCH_SIZE = 1000
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    document_tag = op.create_table('document_tag',
+    sa.Column('metadata_id', sa.Integer(), nullable=False),
+    sa.Column('tag', sa.String(length=100), nullable=False),
+    sa.ForeignKeyConstraint(['metadata_id'], ['document_metadata.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('metadata_id', 'tag')
+    )
+    op.create_index('ix_document_tag_tag_metadata_id', 'document_tag', ['tag', 'metadata_id'], unique=False)
+
+    # Backfill desde la columna JSON existente
+    bind = op.get_bind()
+    document_metadata = sa.table('document_metadata', sa.column('id', sa.Integer), sa.column('tags', sa.JSON))
+
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(document_metadata.c.id, document_metadata.c.tags)
+            .where(document_metadata.c.id > last_id)
+            .order_by(document_metadata.c.id)
+            .limit(BACKFILL_BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+
+        links = []
+        for metadata_id, tags in rows:
+            if isinstance(tags, str):
+                tags = json.loads(tags)
+            links.extend({"metadata_id": metadata_id, "tag": tag} for tag in normalize_tags(tags))
+
+        if links:
+            op.bulk_insert(document_tag, links)
+        last_id = rows[-1][0]
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_document_tag_tag_metadata_id', table_name='document_tag')
+    op.drop_table('document_tag')
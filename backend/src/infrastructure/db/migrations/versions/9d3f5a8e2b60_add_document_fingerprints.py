@@ -0,0 +1,63 @@
+"""add document fingerprints and duplicate columns
+
+Revision ID: 9d3f5a8e2b60
+Revises: 4b7e0d21c9fa
+Create Date: 2026-10-19 15:22:47.390125
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d3f5a8e2b60'
+down_revision: Union[str, Sequence[str], None] = '4b7e0d21c9fa'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('document_fingerprint',
+    sa.Column('file_id', sa.Integer(), nullable=False),
+    sa.Column('content_hash', sa.String(length=64), nullable=False),
+    sa.Column('phash', sa.String(length=16), nullable=True),
+    sa.Column('minhash', sa.LargeBinary(), nullable=True),
+    sa.Column('shingle_count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['file_id'], ['file.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('file_id')
+    )
+    op.create_index(op.f('ix_document_fingerprint_content_hash'), 'document_fingerprint', ['content_hash'], unique=False)
+
+    op.create_table('fingerprint_bucket',
+    sa.Column('kind', sa.String(length=10), nullable=False),
+    sa.Column('bucket_key', sa.String(length=40), nullable=False),
+    sa.Column('file_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['file_id'], ['file.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('kind', 'bucket_key', 'file_id')
+    )
+    op.create_index('ix_fingerprint_bucket_file_id', 'fingerprint_bucket', ['file_id'], unique=False)
+
+    with op.batch_alter_table('document_metadata') as batch_op:
+        batch_op.add_column(sa.Column('duplicate_of_file_id', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('duplicate_score', sa.Float(), nullable=True))
+        batch_op.create_index(batch_op.f('ix_document_metadata_duplicate_of_file_id'), ['duplicate_of_file_id'], unique=False)
+        batch_op.create_foreign_key(
+            'fk_document_metadata_duplicate_of_file_id', 'file', ['duplicate_of_file_id'], ['id'], ondelete='SET NULL'
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('document_metadata') as batch_op:
+        batch_op.drop_constraint('fk_document_metadata_duplicate_of_file_id', type_='foreignkey')
+        batch_op.drop_index(batch_op.f('ix_document_metadata_duplicate_of_file_id'))
+        batch_op.drop_column('duplicate_score')
+        batch_op.drop_column('duplicate_of_file_id')
+
+    op.drop_index('ix_fingerprint_bucket_file_id', table_name='fingerprint_bucket')
+    op.drop_table('fingerprint_bucket')
+    op.drop_index(op.f('ix_document_fingerprint_content_hash'), table_name='document_fingerprint')
+    op.drop_table('document_fingerprint')
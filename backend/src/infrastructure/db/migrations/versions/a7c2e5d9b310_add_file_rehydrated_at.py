@@ -0,0 +1,30 @@
+"""add file rehydrated_at
+
+Revision ID: a7c2e5d9b310
+Revises: 6f1b3d8a2e47
+Create Date: 2026-10-20 00:04:12.518337
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7c2e5d9b310'
+down_revision: Union[str, Sequence[str], None] = '6f1b3d8a2e47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('file') as batch_op:
+        batch_op.add_column(sa.Column('rehydrated_at', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('file') as batch_op:
+        batch_op.drop_column('rehydrated_at')
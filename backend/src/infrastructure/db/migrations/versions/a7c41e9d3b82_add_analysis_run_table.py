@@ -0,0 +1,52 @@
+"""add analysis run table
+
+Revision ID: a7c41e9d3b82
+Revises: 5e2c8a4f7d19
+Create Date: 2026-10-19 20:31:07.204118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7c41e9d3b82'
+down_revision: Union[str, Sequence[str], None] = '5e2c8a4f7d19'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('analysis_run',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('file_id', sa.Integer(), nullable=True),
+    sa.Column('model', sa.String(length=64), nullable=True),
+    sa.Column('document_type', sa.String(length=50), nullable=True),
+    sa.Column('outcome', sa.String(length=20), nullable=False),
+    sa.Column('cache_hit', sa.Boolean(), nullable=False),
+    sa.Column('model_calls', sa.Integer(), nullable=False),
+    sa.Column('retries', sa.Integer(), nullable=False),
+    sa.Column('input_tokens', sa.Integer(), nullable=False),
+    sa.Column('output_tokens', sa.Integer(), nullable=False),
+    sa.Column('image_count', sa.Integer(), nullable=False),
+    sa.Column('prompt_bytes', sa.Integer(), nullable=False),
+    sa.Column('latency_ms', sa.Integer(), nullable=False),
+    sa.Column('cost_usd', sa.Float(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['file_id'], ['file.id'], ondelete='SET NULL'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_analysis_run_file_id'), 'analysis_run', ['file_id'], unique=False)
+    op.create_index('ix_analysis_run_created_at', 'analysis_run', ['created_at'], unique=False)
+    op.create_index('ix_analysis_run_document_type_created_at', 'analysis_run', ['document_type', 'created_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_analysis_run_document_type_created_at', table_name='analysis_run')
+    op.drop_index('ix_analysis_run_created_at', table_name='analysis_run')
+    op.drop_index(op.f('ix_analysis_run_file_id'), table_name='analysis_run')
+    op.drop_table('analysis_run')
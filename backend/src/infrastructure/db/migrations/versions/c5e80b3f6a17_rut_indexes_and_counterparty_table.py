@@ -0,0 +1,93 @@
+"""rut indexes and counterparty table
+
+Revision ID: c5e80b3f6a17
+Revises: 7a2d4c9e1b03
+Create Date: 2026-10-19 11:48:05.204117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from src.utils.rut import normalize_rut
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5e80b3f6a17'
+down_revision: Union[str, Sequence[str], None] = '7a2d4c9e1b03'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+BACKFILL_BATCH_SIZE = 1000
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    counterparty = op.create_table('counterparty',
+    sa.Column('rut', sa.String(length=20), nullable=False),
+    sa.Column('name', sa.String(length=255), nullable=True),
+    sa.Column('document_count', sa.Integer(), nullable=False),
+    sa.Column('last_seen_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('rut')
+    )
+
+    # Canonicalizar RUTs existentes (los inválidos se dejan tal cual) y
+    # poblar el directorio de contrapartes
+    bind = op.get_bind()
+    document_metadata = sa.table(
+        'document_metadata',
+        sa.column('id', sa.Integer),
+        sa.column('company_name', sa.String),
+        sa.column('company_rut', sa.String),
+        sa.column('client_name', sa.String),
+        sa.column('client_rut', sa.String),
+        sa.column('processed_at', sa.DateTime),
+    )
+
+    directory = {}
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(document_metadata)
+            .where(document_metadata.c.id > last_id)
+            .order_by(document_metadata.c.id)
+            .limit(BACKFILL_BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+
+        for row in rows:
+            changes = {}
+            parties = set()
+            for name_column, rut_column in (('company_name', 'company_rut'), ('client_name', 'client_rut')):
+                raw = getattr(row, rut_column)
+                rut = normalize_rut(raw)
+                if rut and rut != raw:
+                    changes[rut_column] = rut
+                if rut and rut not in parties:
+                    parties.add(rut)
+                    entry = directory.setdefault(rut, {'rut': rut, 'name': None, 'document_count': 0, 'last_seen_at': None})
+                    entry['document_count'] += 1
+                    entry['name'] = getattr(row, name_column) or entry['name']
+                    entry['last_seen_at'] = row.processed_at
+
+            if changes:
+                bind.execute(
+                    document_metadata.update().where(document_metadata.c.id == row.id).values(**changes)
+                )
+        last_id = rows[-1].id
+
+    if directory:
+        op.bulk_insert(counterparty, list(directory.values()))
+
+    op.create_index(op.f('ix_document_metadata_company_rut'), 'document_metadata', ['company_rut'], unique=False)
+    op.create_index(op.f('ix_document_metadata_client_rut'), 'document_metadata', ['client_rut'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_document_metadata_client_rut'), table_name='document_metadata')
+    op.drop_index(op.f('ix_document_metadata_company_rut'), table_name='document_metadata')
+    op.drop_table('counterparty')
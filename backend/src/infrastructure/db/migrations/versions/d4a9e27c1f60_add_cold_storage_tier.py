@@ -0,0 +1,64 @@
+"""add cold storage tier
+
+Revision ID: d4a9e27c1f60
+Revises: 3b8d6f2a9c15
+Create Date: 2026-10-19 23:58:06.734915
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4a9e27c1f60'
+down_revision: Union[str, Sequence[str], None] = '3b8d6f2a9c15'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('archive_segment',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('path', sa.String(length=255), nullable=False),
+    sa.Column('document_count', sa.Integer(), nullable=False),
+    sa.Column('live_count', sa.Integer(), nullable=False),
+    sa.Column('raw_bytes', sa.BigInteger(), nullable=False),
+    sa.Column('stored_bytes', sa.BigInteger(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('archived_document',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('file_id', sa.Integer(), nullable=False),
+    sa.Column('segment_id', sa.Integer(), nullable=False),
+    sa.Column('offset', sa.BigInteger(), nullable=False),
+    sa.Column('length', sa.Integer(), nullable=False),
+    sa.Column('previous_status', sa.String(length=20), nullable=True),
+    sa.Column('archived_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['file_id'], ['file.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['segment_id'], ['archive_segment.id']),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('file_id')
+    )
+    op.create_index(op.f('ix_archived_document_segment_id'), 'archived_document', ['segment_id'], unique=False)
+
+    # Todos los documentos existentes quedan en el tier caliente
+    with op.batch_alter_table('file') as batch_op:
+        batch_op.add_column(sa.Column('archived', sa.Boolean(), nullable=False, server_default=sa.false()))
+        batch_op.drop_index('ix_file_owner_id_id')
+        batch_op.create_index('ix_file_owner_id_archived_id', ['owner_id', 'archived', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('file') as batch_op:
+        batch_op.drop_index('ix_file_owner_id_archived_id')
+        batch_op.create_index('ix_file_owner_id_id', ['owner_id', 'id'], unique=False)
+        batch_op.drop_column('archived')
+
+    op.drop_index(op.f('ix_archived_document_segment_id'), table_name='archived_document')
+    op.drop_table('archived_document')
+    op.drop_table('archive_segment')
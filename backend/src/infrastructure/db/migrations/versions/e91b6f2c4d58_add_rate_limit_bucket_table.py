@@ -0,0 +1,36 @@
+"""add rate limit bucket table
+
+Revision ID: e91b6f2c4d58
+Revises: c5e80b3f6a17
+Create Date: 2026-10-19 13:21:52.640371
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e91b6f2c4d58'
+down_revision: Union[str, Sequence[str], None] = 'c5e80b3f6a17'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('rate_limit_bucket',
+    sa.Column('name', sa.String(length=64), nullable=False),
+    sa.Column('requests', sa.Float(), nullable=False),
+    sa.Column('tokens', sa.Float(), nullable=False),
+    sa.Column('updated_at', sa.Float(), nullable=False),
+    sa.Column('rate_factor', sa.Float(), nullable=False),
+    sa.Column('blocked_until', sa.Float(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('rate_limit_bucket')
@@ -0,0 +1,22 @@
+from datetime import datetime
+
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import String, Integer, DateTime, Text
+
+from src.utils.timing import now
+
+from .base import BaseModel
+
+
+
+class AnalysisEvent(BaseModel):
+    """Etapas de progreso de los análisis, compartidas entre procesos (ver infrastructure/events.py)"""
+    __tablename__ = "analysis_event"
+
+    # El id es el del evento SSE: igual en todos los procesos, sirve para Last-Event-ID
+    id: Mapped[int] = mapped_column(primary_key=True)
+    # Sin FK: un evento en buffer de un archivo recién borrado no debe tumbar el lote
+    file_id: Mapped[int] = mapped_column(Integer, nullable=False, index=True)
+    stage: Mapped[str] = mapped_column(String(20), nullable=False)
+    detail: Mapped[str] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=now, index=True)
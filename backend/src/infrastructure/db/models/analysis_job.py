@@ -0,0 +1,37 @@
+from datetime import datetime
+from enum import Enum
+
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import String, Integer, DateTime, ForeignKey, Text, Index
+
+from src.utils.timing import now
+
+from .base import BaseModel
+
+
+
+class AnalysisJobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    DEAD = "dead"  # Reintentos agotados
+
+
+class AnalysisJob(BaseModel):
+    """Cola durable de análisis; la consumen los procesos de `src.worker`"""
+    __tablename__ = "analysis_job"
+    __table_args__ = (
+        Index("ix_analysis_job_status_run_after", "status", "run_after"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    file_id: Mapped[int] = mapped_column(Integer, ForeignKey("file.id", ondelete="CASCADE"), nullable=False, index=True)
+    status: Mapped[str] = mapped_column(String(20), nullable=False, default=AnalysisJobStatus.QUEUED.value)
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    max_attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=5)
+    run_after: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=now)
+    locked_by: Mapped[str] = mapped_column(String(100), nullable=True)
+    lease_expires_at: Mapped[datetime] = mapped_column(DateTime, nullable=True)
+    last_error: Mapped[str] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=now)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=now, onupdate=now)
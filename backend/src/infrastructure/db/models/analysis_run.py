@@ -0,0 +1,35 @@
+from datetime import datetime
+
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import String, Integer, Float, Boolean, DateTime, ForeignKey, Index
+
+from src.utils.timing import now
+
+from .base import BaseModel
+
+
+
+class AnalysisRun(BaseModel):
+    """Registro (ledger) de cada análisis: modelo, tokens, latencia y costo"""
+    __tablename__ = "analysis_run"
+    __table_args__ = (
+        Index("ix_analysis_run_created_at", "created_at"),
+        Index("ix_analysis_run_document_type_created_at", "document_type", "created_at"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    # SET NULL: el costo sigue contando aunque se borre el archivo
+    file_id: Mapped[int] = mapped_column(Integer, ForeignKey("file.id", ondelete="SET NULL"), nullable=True, index=True)
+    model: Mapped[str] = mapped_column(String(64), nullable=True)  # NULL si no se llamó al modelo
+    document_type: Mapped[str] = mapped_column(String(50), nullable=True)
+    outcome: Mapped[str] = mapped_column(String(20), nullable=False)  # completed | failed
+    cache_hit: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)  # metadatos reutilizados de un duplicado
+    model_calls: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    retries: Mapped[int] = mapped_column(Integer, nullable=False, default=0)  # 429 + reparaciones de JSON
+    input_tokens: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    output_tokens: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    image_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    prompt_bytes: Mapped[int] = mapped_column(Integer, nullable=False, default=0)  # texto enviado (UTF-8)
+    latency_ms: Mapped[int] = mapped_column(Integer, nullable=False)
+    cost_usd: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=now)
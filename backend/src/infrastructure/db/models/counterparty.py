@@ -0,0 +1,19 @@
+from datetime import datetime
+
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import String, Integer, DateTime
+
+from src.utils.timing import now
+
+from .base import BaseModel
+
+
+
+class Counterparty(BaseModel):
+    """Directorio de emisores/clientes vistos en documentos analizados, por RUT canónico"""
+    __tablename__ = "counterparty"
+
+    rut: Mapped[str] = mapped_column(String(20), primary_key=True)
+    name: Mapped[str] = mapped_column(String(255), nullable=True)
+    document_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    last_seen_at: Mapped[datetime] = mapped_column(DateTime, nullable=True, default=now)
@@ -0,0 +1,35 @@
+from datetime import datetime
+
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import String, Integer, BigInteger, DateTime, ForeignKey
+
+from src.utils.timing import now
+
+from .base import BaseModel
+
+
+
+class ArchiveSegment(BaseModel):
+    """Segmento del tier frío: los archivos de varios documentos, uno tras otro como frames zstd"""
+    __tablename__ = "archive_segment"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    path: Mapped[str] = mapped_column(String(255), nullable=False)
+    document_count: Mapped[int] = mapped_column(Integer, nullable=False)
+    live_count: Mapped[int] = mapped_column(Integer, nullable=False)  # aún archivados; en 0 se borra el segmento
+    raw_bytes: Mapped[int] = mapped_column(BigInteger, nullable=False)  # tamaño lógico de los archivos
+    stored_bytes: Mapped[int] = mapped_column(BigInteger, nullable=False)  # tamaño del segmento en disco
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=now)
+
+
+class ArchivedDocument(BaseModel):
+    """Documento en el tier frío: dónde quedó su archivo y el estado que tenía al archivarse"""
+    __tablename__ = "archived_document"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    file_id: Mapped[int] = mapped_column(Integer, ForeignKey("file.id", ondelete="CASCADE"), unique=True, nullable=False)
+    segment_id: Mapped[int] = mapped_column(Integer, ForeignKey("archive_segment.id"), nullable=False, index=True)
+    offset: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    length: Mapped[int] = mapped_column(Integer, nullable=False)
+    previous_status: Mapped[str] = mapped_column(String(20), nullable=True)  # se restaura al rehidratar
+    archived_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=now)
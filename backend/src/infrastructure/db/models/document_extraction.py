@@ -0,0 +1,48 @@
+import json
+import zlib
+
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy import String, Integer, ForeignKey, LargeBinary
+
+from .base import BaseModel
+
+
+
+# Campos de AIMetadataResponse que no caben en document_metadata
+EXTRACTION_FIELDS = (
+    "extracted_text",
+    "accounting_period",
+    "account_codes",
+    "key_data",
+    "due_date",
+    "issuer",
+    "client",
+    "amounts",
+)
+
+
+class DocumentExtraction(BaseModel):
+    """Extracción completa del AI, comprimida y separada de la fila principal.
+
+    Solo se lee cuando un endpoint la pide explícitamente, así las filas de
+    document_metadata se mantienen angostas.
+    """
+    __tablename__ = "document_extraction"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    metadata_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("document_metadata.id", ondelete="CASCADE"), unique=True, nullable=False
+    )
+    codec: Mapped[str] = mapped_column(String(10), nullable=False, default="zlib")
+    raw_size: Mapped[int] = mapped_column(Integer, nullable=False)
+    payload: Mapped[bytes] = mapped_column(LargeBinary(length=2**24 - 1), nullable=False)
+
+    document_metadata = relationship("DocumentMetadata", back_populates="extraction")
+
+    @classmethod
+    def from_data(cls, data: dict) -> "DocumentExtraction":
+        raw = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        return cls(codec="zlib", raw_size=len(raw), payload=zlib.compress(raw, 6))
+
+    def load(self) -> dict:
+        return json.loads(zlib.decompress(self.payload))
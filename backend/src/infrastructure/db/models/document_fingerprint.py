@@ -0,0 +1,49 @@
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import String, Integer, ForeignKey, LargeBinary, Index
+
+from src.infrastructure.fingerprints import Fingerprint, pack_minhash, unpack_minhash
+
+from .base import BaseModel
+
+
+
+class DocumentFingerprint(BaseModel):
+    """Huella de un archivo para detectar casi duplicados (ver infrastructure/fingerprints.py)"""
+    __tablename__ = "document_fingerprint"
+
+    file_id: Mapped[int] = mapped_column(Integer, ForeignKey("file.id", ondelete="CASCADE"), primary_key=True)
+    content_hash: Mapped[str] = mapped_column(String(64), nullable=False, index=True)  # sha256 del archivo
+    phash: Mapped[str] = mapped_column(String(16), nullable=True)  # dHash de 64 bits en hex
+    minhash: Mapped[bytes] = mapped_column(LargeBinary, nullable=True)
+    shingle_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+    @classmethod
+    def from_fingerprint(cls, file_id: int, fingerprint: Fingerprint) -> "DocumentFingerprint":
+        return cls(
+            file_id=file_id,
+            content_hash=fingerprint.content_hash,
+            phash=f"{fingerprint.phash:016x}" if fingerprint.phash is not None else None,
+            minhash=pack_minhash(fingerprint.minhash) if fingerprint.minhash else None,
+            shingle_count=fingerprint.shingle_count,
+        )
+
+    def to_fingerprint(self) -> Fingerprint:
+        return Fingerprint(
+            content_hash=self.content_hash,
+            phash=int(self.phash, 16) if self.phash else None,
+            minhash=unpack_minhash(self.minhash) if self.minhash else None,
+            shingle_count=self.shingle_count,
+        )
+
+
+class FingerprintBucket(BaseModel):
+    """Índice de candidatos: archivos que comparten una banda LSH o un segmento del dHash"""
+    __tablename__ = "fingerprint_bucket"
+
+    kind: Mapped[str] = mapped_column(String(10), primary_key=True)  # minhash | phash
+    bucket_key: Mapped[str] = mapped_column(String(40), primary_key=True)
+    file_id: Mapped[int] = mapped_column(Integer, ForeignKey("file.id", ondelete="CASCADE"), primary_key=True)
+
+    __table_args__ = (
+        Index("ix_fingerprint_bucket_file_id", "file_id"),
+    )
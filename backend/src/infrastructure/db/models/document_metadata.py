@@ -1,5 +1,5 @@
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy import String, Integer, Boolean, ForeignKey, DateTime, Float, Text, JSON, Column
+from sqlalchemy import String, Integer, Boolean, ForeignKey, DateTime, Float, Text, JSON, Column, Index
 from datetime import datetime
 from src.utils.timing import now
 
@@ -20,9 +20,14 @@ class DocumentStatus(str, Enum):
 # Modelo SQLAlchemy para la base de datos
 class DocumentMetadata(BaseModel):
     __tablename__ = "document_metadata"
+    __table_args__ = (
+        # Búsquedas por rango de fechas dentro de la partición del dueño
+        Index("ix_document_metadata_owner_id_document_date", "owner_id", "document_date"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     file_id = Column(Integer, ForeignKey("file.id"), nullable=False)
+    owner_id = Column(Integer, nullable=True)  # copia de File.owner_id
 
     # Información básica del documento
     document_type = Column(String(50), nullable=True)
@@ -32,9 +37,9 @@ class DocumentMetadata(BaseModel):
 
     # Información de empresa/cliente
     company_name = Column(String(255), nullable=True)
-    company_rut = Column(String(20), nullable=True)
+    company_rut = Column(String(20), nullable=True, index=True)  # RUT canónico (utils.rut)
     client_name = Column(String(255), nullable=True)
-    client_rut = Column(String(20), nullable=True)
+    client_rut = Column(String(20), nullable=True, index=True)
 
     # Información financiera
     total_amount = Column(Float, nullable=True)
@@ -52,5 +57,28 @@ class DocumentMetadata(BaseModel):
     processed_at = Column(DateTime, default=now)
     needs_review = Column(Boolean, default=False)
 
+    # Casi duplicado: metadatos copiados de este archivo en vez de llamar al modelo
+    duplicate_of_file_id = Column(Integer, ForeignKey("file.id", ondelete="SET NULL"), nullable=True, index=True)
+    duplicate_score = Column(Float, nullable=True)
+
     # Relación con el archivo principal
-    file = relationship("File", back_populates="document_metadata")
+    file = relationship("File", back_populates="document_metadata", foreign_keys=[file_id])
+
+    # Extracción completa (comprimida); no se carga salvo que se pida
+    extraction = relationship(
+        "DocumentExtraction",
+        back_populates="document_metadata",
+        uselist=False,
+        lazy="noload",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+    )
+
+    # Tags normalizados (tabla indexada); `tags` conserva la lista original
+    tag_links = relationship(
+        "DocumentTag",
+        back_populates="document_metadata",
+        lazy="noload",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+    )
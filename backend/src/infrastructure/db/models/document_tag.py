@@ -0,0 +1,44 @@
+import re
+
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy import String, Integer, ForeignKey, Index
+
+from .base import BaseModel
+
+
+
+TAG_MAX_LENGTH = 100
+
+
+def normalize_tag(tag: str) -> str:
+    """Normaliza un tag para indexarlo: minúsculas y espacios colapsados"""
+    return re.sub(r"\s+", " ", str(tag)).strip().lower()[:TAG_MAX_LENGTH]
+
+
+def normalize_tags(tags) -> list[str]:
+    """Normaliza una lista de tags quitando vacíos y duplicados (conserva el orden)"""
+    normalized = []
+    for tag in tags or []:
+        value = normalize_tag(tag)
+        if value and value not in normalized:
+            normalized.append(value)
+    return normalized
+
+
+class DocumentTag(BaseModel):
+    """Tabla de asociación documento <-> tag, indexada por tag.
+
+    Reemplaza el escaneo de la columna JSON `document_metadata.tags` para
+    filtrar y contar documentos por tag.
+    """
+    __tablename__ = "document_tag"
+    __table_args__ = (
+        Index("ix_document_tag_tag_metadata_id", "tag", "metadata_id"),
+    )
+
+    metadata_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("document_metadata.id", ondelete="CASCADE"), primary_key=True
+    )
+    tag: Mapped[str] = mapped_column(String(TAG_MAX_LENGTH), primary_key=True)
+
+    document_metadata = relationship("DocumentMetadata", back_populates="tag_links")
@@ -3,11 +3,14 @@ from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, Float,
 from sqlalchemy.orm import relationship
 from sqlalchemy.ext.declarative import declarative_base
 from pydantic import BaseModel, Field
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Any
 from datetime import datetime
 from enum import Enum
 
 from src.infrastructure.db.models.document_metadata import DocumentMetadata, DocumentStatus
+from src.infrastructure.db.models.document_extraction import DocumentExtraction, EXTRACTION_FIELDS
+from src.infrastructure.db.models.document_tag import DocumentTag, normalize_tags
+from src.utils.rut import normalize_rut
 
 
 Base = declarative_base()
@@ -94,6 +97,9 @@ class MetadataResponse(BaseModel):
     status: str
     processed_at: datetime
     needs_review: bool
+    duplicate_of_file_id: Optional[int] = None  # Metadatos copiados de ese archivo
+    duplicate_score: Optional[float] = None
+    extraction: Optional[Dict[str, Any]] = None  # Solo con include=...
 
     class Config:
         from_attributes = True
@@ -132,6 +138,15 @@ def ai_response_to_db_metadata(ai_response: AIMetadataResponse, file_id: int) ->
         client_name = ai_response.client.get("name")
         client_rut = ai_response.client.get("rut")
 
+    # RUTs en forma canónica; si el dígito verificador no cuadra se descarta
+    # (el valor original queda en la extracción) y se marca para revisión
+    needs_review = ai_response.requires_review
+    raw_company_rut, raw_client_rut = company_rut, client_rut
+    company_rut = normalize_rut(raw_company_rut)
+    client_rut = normalize_rut(raw_client_rut)
+    if (raw_company_rut and not company_rut) or (raw_client_rut and not client_rut):
+        needs_review = True
+
     # Extraer montos con manejo seguro de None
     total_amount = None
     net_amount = None
@@ -142,7 +157,7 @@ def ai_response_to_db_metadata(ai_response: AIMetadataResponse, file_id: int) ->
         net_amount = ai_response.amounts.get("net")
         tax_amount = ai_response.amounts.get("tax")
 
-    return DocumentMetadata(
+    metadata = DocumentMetadata(
         file_id=file_id,
         document_type=ai_response.document_type.value,
         document_number=ai_response.document_number,
@@ -159,6 +174,15 @@ def ai_response_to_db_metadata(ai_response: AIMetadataResponse, file_id: int) ->
         description=ai_response.description,
         tags=ai_response.tags,
         confidence_score=ai_response.confidence_score,
-        needs_review=ai_response.requires_review,
+        needs_review=needs_review,
         status=DocumentStatus.PROCESADO.value
-    )
\ No newline at end of file
+    )
+
+    # Guardar la extracción completa para no tener que volver a llamar al AI
+    metadata.extraction = DocumentExtraction.from_data(
+        ai_response.model_dump(mode="json", include=set(EXTRACTION_FIELDS))
+    )
+
+    metadata.tag_links = [DocumentTag(tag=tag) for tag in normalize_tags(ai_response.tags)]
+
+    return metadata
\ No newline at end of file
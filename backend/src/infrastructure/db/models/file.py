@@ -1,17 +1,34 @@
+from datetime import datetime
+
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
-from sqlalchemy import String, Integer, Boolean
+from sqlalchemy import String, Integer, Boolean, DateTime, ForeignKey, Index, false
 
 from .base import BaseModel
 
 
 class File(BaseModel):
     __tablename__ = "file"
+    __table_args__ = (
+        # Listas por dueño paginadas por id, solo del tier caliente (ver DocumentPartition)
+        Index("ix_file_owner_id_archived_id", "owner_id", "archived", "id"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
+    # Dueño (user.id); NULL = documentos sin dueño, los de la instalación sin login
+    owner_id: Mapped[int] = mapped_column(Integer, ForeignKey("user.id"), nullable=True)
     original_name: Mapped[str] = mapped_column(String(255), nullable=False)
     stored_name: Mapped[str] = mapped_column(String(255), nullable=False)
     description: Mapped[str] = mapped_column(String(255), nullable=True)
-    size: Mapped[int] = mapped_column(Integer, nullable=False)
+    size: Mapped[int] = mapped_column(Integer, nullable=False)  # tamaño lógico (sin comprimir)
     path: Mapped[int] = mapped_column(String(255), nullable=False)
+    stored_size: Mapped[int] = mapped_column(Integer, nullable=True)  # bytes en disco
+    compression: Mapped[str] = mapped_column(String(16), nullable=True)  # "zstd" o NULL
+    # Tier frío: el archivo está en un segmento (ver ArchivedDocument); `path` es dónde vuelve al rehidratarse
+    archived: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False, server_default=false())
+    # Última rehidratación: el documento se acaba de usar y el job de archivo lo deja caliente un tiempo
+    rehydrated_at: Mapped[datetime] = mapped_column(DateTime, nullable=True)
 
-    document_metadata = relationship("DocumentMetadata", back_populates="file", cascade="all, delete-orphan")
+    document_metadata = relationship(
+        "DocumentMetadata", back_populates="file", cascade="all, delete-orphan",
+        foreign_keys="DocumentMetadata.file_id",
+    )
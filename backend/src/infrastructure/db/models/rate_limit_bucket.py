@@ -0,0 +1,17 @@
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import String, Float
+
+from .base import BaseModel
+
+
+
+class RateLimitBucket(BaseModel):
+    """Estado compartido del token bucket (ver infrastructure/rate_limiter.py)"""
+    __tablename__ = "rate_limit_bucket"
+
+    name: Mapped[str] = mapped_column(String(64), primary_key=True)
+    requests: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    tokens: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    updated_at: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)  # epoch
+    rate_factor: Mapped[float] = mapped_column(Float, nullable=False, default=1.0)
+    blocked_until: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)  # epoch
@@ -0,0 +1,236 @@
+"""
+Re-análisis masivo de documentos existentes con Gemini.
+
+Ejemplos:
+    python -m src.infrastructure.db.reanalyze --missing-metadata
+    python -m src.infrastructure.db.reanalyze --needs-review --concurrency 8 --rate 120
+    python -m src.infrastructure.db.reanalyze --status pendiente --processed-before 2025-08-01
+
+El progreso se guarda en un checkpoint después de cada lote; si el proceso
+muere, volver a correr el mismo comando continúa desde el último lote confirmado.
+Los archivos que fallaron se guardan aparte y se reintentan al volver a correrlo.
+"""
+import argparse
+import asyncio
+import json
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+from sqlalchemy import select, or_, and_
+
+from src.core.config.constants import ROOT_PATH
+from src.core.config.settings import env_vars
+from src.infrastructure.db.session import get_db_session
+from src.infrastructure.db.models.file import File
+from src.infrastructure.db.models.document_metadata import DocumentMetadata
+from src.application.document.services.metadata_service import add_analysis_result
+from src.infrastructure.analysis_ledger import track_analysis_run
+from src.gemini_service import init_gemini_service, get_gemini_analyzer
+
+
+
+DEFAULT_CHECKPOINT = ROOT_PATH / "reanalyze_checkpoint.json"
+
+
+class RateLimiter:
+    """Espacia las llamadas para no superar `per_minute` llamadas por minuto"""
+
+    def __init__(self, per_minute: float):
+        self.interval = 60.0 / per_minute if per_minute > 0 else 0.0
+        self._next_at = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self) -> None:
+        if not self.interval:
+            return
+        async with self._lock:
+            delay = self._next_at - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self._next_at = max(self._next_at, time.monotonic()) + self.interval
+
+
+class Checkpoint:
+    def __init__(self, path: Path, criteria: dict):
+        self.path = path
+        self.criteria = criteria
+        self.last_file_id = 0
+        self.processed = 0
+        self.failed: list[int] = []
+
+    def load(self, reset: bool) -> None:
+        if reset or not self.path.exists():
+            return
+
+        data = json.loads(self.path.read_text())
+        if data.get("criteria") != self.criteria:
+            raise SystemExit(
+                f"El checkpoint {self.path} es de otra selección ({data.get('criteria')}). "
+                "Usa --reset o --checkpoint con otra ruta."
+            )
+
+        self.last_file_id = data["last_file_id"]
+        self.processed = data["processed"]
+        self.failed = data["failed"]
+
+    def save(self) -> None:
+        # Escritura atómica: un kill a mitad de escritura no corrompe el checkpoint
+        tmp_path = self.path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps({
+            "criteria": self.criteria,
+            "last_file_id": self.last_file_id,
+            "processed": self.processed,
+            "failed": self.failed,
+        }))
+        tmp_path.replace(self.path)
+
+
+def build_query(args: argparse.Namespace):
+    """Archivos objetivo según los criterios (los de metadatos se combinan con AND;
+    --missing-metadata se suma con OR)"""
+    metadata_conditions = []
+    if args.status:
+        metadata_conditions.append(DocumentMetadata.status.in_(args.status))
+    if args.needs_review:
+        metadata_conditions.append(DocumentMetadata.needs_review.is_(True))
+    if args.processed_after:
+        metadata_conditions.append(DocumentMetadata.processed_at >= args.processed_after)
+    if args.processed_before:
+        metadata_conditions.append(DocumentMetadata.processed_at < args.processed_before)
+
+    targets = []
+    if metadata_conditions:
+        targets.append(and_(*metadata_conditions))
+    if args.missing_metadata:
+        targets.append(DocumentMetadata.id.is_(None))
+
+    query = (
+        select(File.id, File.path, File.original_name, File.compression)
+        .outerjoin(DocumentMetadata, File.id == DocumentMetadata.file_id)
+        .where(File.archived.is_(False))  # los del tier frío no tienen archivo en uploads/
+        .order_by(File.id)
+    )
+    if targets:
+        query = query.where(or_(*targets))
+    return query
+
+
+async def analyze_file(file_row, semaphore: asyncio.Semaphore, rate_limiter: RateLimiter):
+    analyzer = get_gemini_analyzer()
+    async with semaphore:
+        await rate_limiter.wait()
+        async with track_analysis_run(file_row.id) as run:
+            result = await analyzer.analyze_document(file_row.path, file_row.original_name, compression=file_row.compression)
+            run.finish(result)
+        return result
+
+
+async def reanalyze(args: argparse.Namespace) -> None:
+    if not args.dry_run:
+        if not env_vars.gemini_api_key:
+            raise SystemExit("GEMINI_API_KEY no configurada.")
+        init_gemini_service(env_vars.gemini_api_key)
+
+    criteria = {
+        "status": args.status,
+        "needs_review": args.needs_review,
+        "missing_metadata": args.missing_metadata,
+        "processed_after": args.processed_after.isoformat() if args.processed_after else None,
+        "processed_before": args.processed_before.isoformat() if args.processed_before else None,
+    }
+    checkpoint = Checkpoint(args.checkpoint, criteria)
+    checkpoint.load(reset=args.reset)
+    if checkpoint.last_file_id:
+        print(f"Retomando desde file_id > {checkpoint.last_file_id} ({checkpoint.processed} procesados).")
+
+    semaphore = asyncio.Semaphore(args.concurrency)
+    rate_limiter = RateLimiter(args.rate)
+    query = build_query(args)
+    remaining = args.limit
+
+    async def process(batch) -> None:
+        if args.dry_run:
+            for file_row in batch:
+                print(f"[dry-run] {file_row.id} {file_row.original_name}")
+            return
+
+        responses = await asyncio.gather(
+            *(analyze_file(file_row, semaphore, rate_limiter) for file_row in batch)
+        )
+
+        # Un commit por lote
+        async with get_db_session() as session:
+            for file_row, ai_response in zip(batch, responses):
+                if ai_response:
+                    await add_analysis_result(session, file_row.id, ai_response, replace=True)
+                else:
+                    checkpoint.failed.append(file_row.id)
+            await session.commit()
+
+    # Los fallidos de corridas anteriores quedaron atrás del cursor: se reintentan primero
+    retry, checkpoint.failed = checkpoint.failed, []
+    if retry and not args.dry_run:
+        print(f"Reintentando {len(retry)} archivos fallidos.")
+    for start in range(0, len(retry), args.batch_size):
+        async with get_db_session() as session:
+            batch = (await session.execute(query.where(File.id.in_(retry[start:start + args.batch_size])))).all()
+        if batch:
+            await process(batch)
+        if not args.dry_run:
+            checkpoint.save()
+
+    while remaining is None or remaining > 0:
+        batch_size = args.batch_size if remaining is None else min(args.batch_size, remaining)
+
+        async with get_db_session() as session:
+            result = await session.execute(
+                query.where(File.id > checkpoint.last_file_id).limit(batch_size)
+            )
+            batch = result.all()
+
+        if not batch:
+            break
+
+        await process(batch)
+
+        checkpoint.last_file_id = batch[-1].id
+        checkpoint.processed += len(batch)
+        if not args.dry_run:
+            checkpoint.save()
+        if remaining is not None:
+            remaining -= len(batch)
+
+        print(f"Procesados {checkpoint.processed} (fallidos: {len(checkpoint.failed)}), último file_id {checkpoint.last_file_id}")
+
+    print("Re-análisis terminado.")
+
+
+def parse_date(value: str) -> datetime:
+    return datetime.strptime(value, "%Y-%m-%d")
+
+
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Re-analiza documentos existentes con Gemini")
+    parser.add_argument("--status", nargs="+", help="Estados de metadatos a re-analizar (ej: pendiente rechazado)")
+    parser.add_argument("--needs-review", action="store_true", help="Documentos marcados para revisión")
+    parser.add_argument("--missing-metadata", action="store_true", help="Archivos sin metadatos (análisis fallido)")
+    parser.add_argument("--processed-after", type=parse_date, help="Analizados desde YYYY-MM-DD")
+    parser.add_argument("--processed-before", type=parse_date, help="Analizados antes de YYYY-MM-DD")
+    parser.add_argument("--concurrency", type=int, default=4, help="Análisis simultáneos")
+    parser.add_argument("--rate", type=float, default=60, help="Máximo de llamadas por minuto (0 = sin límite)")
+    parser.add_argument("--batch-size", type=int, default=50, help="Archivos por lote/commit")
+    parser.add_argument("--limit", type=int, help="Máximo de archivos a procesar en esta corrida")
+    parser.add_argument("--checkpoint", type=Path, default=DEFAULT_CHECKPOINT, help="Archivo de checkpoint")
+    parser.add_argument("--reset", action="store_true", help="Ignorar el checkpoint existente")
+    parser.add_argument("--dry-run", action="store_true", help="Solo listar los archivos seleccionados")
+
+    args = parser.parse_args(argv)
+    if not (args.status or args.needs_review or args.missing_metadata or args.processed_after or args.processed_before):
+        parser.error("Indica al menos un criterio de selección")
+    return args
+
+
+if __name__ == "__main__":
+    asyncio.run(reanalyze(parse_args()))
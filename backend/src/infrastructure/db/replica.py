@@ -0,0 +1,148 @@
+"""
+Ruteo de lecturas a la réplica (si `database_replica_host` o, con sqlite,
+`sqlite_replica_path` está configurado).
+
+Las peticiones GET/HEAD leen de la réplica salvo que:
+- el handler la desactive con `opt={"read_replica": False}`, o
+- el cliente haya escrito hace menos de `read_your_writes_seconds`: la réplica
+  puede ir atrasada y el cliente no vería su propio cambio (read-your-writes).
+  Cada proceso lo recuerda en memoria y además la respuesta a la escritura lleva
+  la cookie `PIN_COOKIE` (ver api/middlewares/read_your_writes.py), así el GET
+  siguiente respeta el pin aunque lo atienda otro proceso.
+
+Cada decisión se cuenta en /metrics como `db_route` (route, reason).
+"""
+import math
+import time
+from http.cookies import SimpleCookie
+
+from litestar.types import Scope
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from src.core.config.settings import env_vars
+from src.infrastructure.db import sqlite
+from src.infrastructure.db.session import AsyncSessionLocal
+from src.infrastructure.metrics import metrics
+
+
+
+SAFE_METHODS = {"GET", "HEAD"}
+MAX_PINNED_CLIENTS = 10_000
+PIN_COOKIE = "db_pinned_until"  # epoch (segundos) hasta el que el cliente lee de la primaria
+
+
+def _create_replica_engine():
+    if not env_vars.url_db_replica:
+        return None
+    if env_vars.database_backend != "sqlite":
+        return create_async_engine(env_vars.url_db_replica)
+    path = env_vars.sqlite_replica_path
+    engine = create_async_engine(env_vars.url_db_replica, **sqlite.engine_options(path, is_async=True))
+    sqlite.configure_engine(engine.sync_engine, path, read_only=True)
+    return engine
+
+
+replica_engine = _create_replica_engine()
+ReplicaSessionLocal = async_sessionmaker(
+    bind=replica_engine,
+    expire_on_commit=False,
+    class_=AsyncSession,
+) if replica_engine else None
+
+
+class ReadYourWrites:
+    """Clientes que escribieron hace poco (por proceso, como los demás contadores)"""
+
+    def __init__(self, window_seconds: float):
+        self.window_seconds = window_seconds
+        self._pinned_until: dict[str, float] = {}
+
+    def pin(self, client: str) -> None:
+        if len(self._pinned_until) >= MAX_PINNED_CLIENTS:
+            self._prune()
+        self._pinned_until[client] = time.monotonic() + self.window_seconds
+
+    def is_pinned(self, client: str) -> bool:
+        until = self._pinned_until.get(client)
+        if until is None:
+            return False
+        if until <= time.monotonic():
+            del self._pinned_until[client]
+            return False
+        return True
+
+    def _prune(self) -> None:
+        current = time.monotonic()
+        self._pinned_until = {client: until for client, until in self._pinned_until.items() if until > current}
+
+
+read_your_writes = ReadYourWrites(env_vars.read_your_writes_seconds)
+
+
+def pin_cookie() -> bytes:
+    """Valor de Set-Cookie que fija al cliente a la primaria durante la ventana"""
+    window = env_vars.read_your_writes_seconds
+    return (
+        f"{PIN_COOKIE}={time.time() + window:.3f}; Max-Age={math.ceil(window)}; Path=/; HttpOnly; SameSite=Lax"
+    ).encode("latin-1")
+
+
+def _cookie_pinned(scope: Scope) -> bool:
+    for name, value in scope.get("headers", ()):
+        if name != b"cookie":
+            continue
+        morsel = SimpleCookie(value.decode("latin-1")).get(PIN_COOKIE)
+        if morsel is None:
+            continue
+        try:
+            return float(morsel.value) > time.time()
+        except ValueError:
+            return False
+    return False
+
+
+def client_key(scope: Scope) -> str:
+    """Usuario autenticado (AuthMiddleware) o, si no hay, la IP del cliente"""
+    user = scope.get("user")
+    if user:
+        return f"user:{user}"
+    client = scope.get("client")
+    return f"ip:{client[0]}" if client else "ip:unknown"
+
+
+def route_request(scope: Scope) -> str:
+    """Decide dónde lee la petición: "replica" o "primary" (y registra la métrica).
+
+    Las peticiones que escriben dejan al cliente fijado a la primaria.
+    """
+    client = client_key(scope)
+    if scope.get("method") not in SAFE_METHODS:
+        read_your_writes.pin(client)
+        route, reason = "primary", "write"
+    elif ReplicaSessionLocal is None:
+        route, reason = "primary", "no_replica"
+    elif not _handler_opt(scope).get("read_replica", True):
+        route, reason = "primary", "opt_out"
+    elif read_your_writes.is_pinned(client) or _cookie_pinned(scope):
+        route, reason = "primary", "pinned"
+    else:
+        route, reason = "replica", "read"
+
+    metrics.increment("db_route", route=route, reason=reason)
+    return route
+
+
+def _handler_opt(scope: Scope) -> dict:
+    handler = scope.get("route_handler")
+    return getattr(handler, "opt", None) or {}
+
+
+async def dispose_replica() -> None:
+    """Cierra las conexiones de la réplica al apagar la app"""
+    if replica_engine is not None:
+        await replica_engine.dispose()
+
+
+def read_session_factory(scope: Scope) -> async_sessionmaker[AsyncSession]:
+    """Sessionmaker para leer fuera de la sesión del plugin (ej. streaming), según `route_request`"""
+    return ReplicaSessionLocal if route_request(scope) == "replica" else AsyncSessionLocal
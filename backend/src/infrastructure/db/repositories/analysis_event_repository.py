@@ -0,0 +1,45 @@
+from datetime import datetime
+from typing import Collection, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, delete, func, or_
+
+from src.infrastructure.db.models.analysis_event import AnalysisEvent
+from src.infrastructure.db.models.file import File
+
+
+
+class AnalysisEventRepository:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+
+    async def add_all(self, events: list[AnalysisEvent]) -> None:
+        self.db.add_all(events)
+        await self.db.commit()
+
+
+    async def since(
+        self, last_id: int, file_id: Optional[int] = None, limit: int = 500, also_ids: Collection[int] = ()
+    ) -> list[tuple[AnalysisEvent, Optional[int]]]:
+        """(evento, dueño del archivo) posteriores a `last_id` (más los de `also_ids`), en orden;
+        sin los de archivos ya borrados"""
+        after = AnalysisEvent.id > last_id
+        statement = (
+            select(AnalysisEvent, File.owner_id)
+            .join(File, File.id == AnalysisEvent.file_id)
+            .where(or_(after, AnalysisEvent.id.in_(also_ids)) if also_ids else after)
+        )
+        if file_id is not None:
+            statement = statement.where(AnalysisEvent.file_id == file_id)
+        result = await self.db.execute(statement.order_by(AnalysisEvent.id).limit(limit))
+        return list(result.tuples())
+
+
+    async def last_id(self) -> int:
+        return (await self.db.execute(select(func.coalesce(func.max(AnalysisEvent.id), 0)))).scalar_one()
+
+
+    async def prune(self, before: datetime) -> None:
+        await self.db.execute(delete(AnalysisEvent).where(AnalysisEvent.created_at < before))
+        await self.db.commit()
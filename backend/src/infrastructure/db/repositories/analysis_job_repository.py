@@ -0,0 +1,105 @@
+from datetime import timedelta
+from typing import Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update, func, or_, and_
+
+from src.infrastructure.db.models.analysis_job import AnalysisJob, AnalysisJobStatus
+from src.utils.timing import now
+
+
+
+class AnalysisJobRepository:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+
+    async def enqueue(self, file_id: int, max_attempts: int = 5) -> AnalysisJob:
+        job = AnalysisJob(file_id=file_id, max_attempts=max_attempts)
+        self.db.add(job)
+        await self.db.flush()
+        return job
+
+
+    async def claim(self, worker_id: str, limit: int, lease_seconds: int) -> list[AnalysisJob]:
+        """
+        Toma hasta `limit` jobs disponibles (en cola o con lease vencido).
+        SKIP LOCKED evita que dos workers tomen el mismo job sin bloquearse entre sí.
+        Los de lease vencido que ya agotaron sus intentos pasan a dead-letter.
+        """
+        current_time = now()
+        result = await self.db.execute(
+            select(AnalysisJob)
+            .where(or_(
+                and_(AnalysisJob.status == AnalysisJobStatus.QUEUED.value, AnalysisJob.run_after <= current_time),
+                and_(AnalysisJob.status == AnalysisJobStatus.RUNNING.value, AnalysisJob.lease_expires_at < current_time),
+            ))
+            .order_by(AnalysisJob.run_after, AnalysisJob.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        jobs = []
+        for job in result.scalars():
+            if job.status == AnalysisJobStatus.RUNNING.value and job.attempts >= job.max_attempts:
+                # El lease venció en el último intento: el documento mató o colgó al worker
+                job.status = AnalysisJobStatus.DEAD.value
+                job.locked_by = None
+                job.lease_expires_at = None
+                job.last_error = f"Lease vencido en el intento {job.attempts}/{job.max_attempts} (worker caído o colgado)"
+                continue
+            jobs.append(job)
+
+        for job in jobs:
+            job.status = AnalysisJobStatus.RUNNING.value
+            job.locked_by = worker_id
+            job.lease_expires_at = current_time + timedelta(seconds=lease_seconds)
+            job.attempts += 1
+
+        await self.db.commit()
+        return jobs
+
+
+    async def heartbeat(self, job_ids: list[int], worker_id: str, lease_seconds: int) -> None:
+        if not job_ids:
+            return
+        await self.db.execute(
+            update(AnalysisJob)
+            .where(AnalysisJob.id.in_(job_ids), AnalysisJob.locked_by == worker_id)
+            .values(lease_expires_at=now() + timedelta(seconds=lease_seconds))
+        )
+        await self.db.commit()
+
+
+    async def complete(self, job: AnalysisJob) -> None:
+        """Marca el job como terminado (el commit lo hace quien llama)"""
+        job.status = AnalysisJobStatus.DONE.value
+        job.locked_by = None
+        job.lease_expires_at = None
+        job.last_error = None
+
+
+    async def fail(self, job: AnalysisJob, error: str, backoff_seconds: float, permanent: bool = False) -> None:
+        """Reprograma el job o lo manda a dead-letter si agotó sus intentos (o el error no se arregla reintentando)"""
+        job.last_error = error[:10000]
+        job.locked_by = None
+        job.lease_expires_at = None
+        if permanent or job.attempts >= job.max_attempts:
+            job.status = AnalysisJobStatus.DEAD.value
+        else:
+            job.status = AnalysisJobStatus.QUEUED.value
+            job.run_after = now() + timedelta(seconds=backoff_seconds)
+        await self.db.commit()
+
+
+    async def get(self, job_id: int) -> Optional[AnalysisJob]:
+        return await self.db.get(AnalysisJob, job_id)
+
+
+    async def count_pending(self) -> int:
+        """Jobs en cola o en curso (profundidad del backlog)"""
+        result = await self.db.execute(
+            select(func.count()).select_from(AnalysisJob).where(
+                AnalysisJob.status.in_([AnalysisJobStatus.QUEUED.value, AnalysisJobStatus.RUNNING.value])
+            )
+        )
+        return result.scalar_one()
@@ -0,0 +1,42 @@
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+
+from src.infrastructure.db.models.analysis_run import AnalysisRun
+from src.infrastructure.db.models.file import File
+from src.infrastructure.db.repositories.document_repository import DocumentPartition, apply_partition
+
+
+
+class AnalysisRunRepository:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+
+    async def add(self, run: AnalysisRun) -> AnalysisRun:
+        self.db.add(run)
+        await self.db.flush()
+        return run
+
+
+    async def latency_rows(
+        self, date_from: datetime, date_to: datetime, partition: Optional[DocumentPartition] = None
+    ) -> list[tuple]:
+        """(document_type, created_at, latency_ms, cost_usd, cache_hit, outcome) del rango, para agregar en Python.
+
+        Con una partición que no es la del admin, solo los análisis de sus archivos (archivados incluidos).
+        """
+        statement = (
+            select(
+                AnalysisRun.document_type, AnalysisRun.created_at, AnalysisRun.latency_ms,
+                AnalysisRun.cost_usd, AnalysisRun.cache_hit, AnalysisRun.outcome,
+            )
+            .where(AnalysisRun.created_at >= date_from, AnalysisRun.created_at < date_to)
+        )
+        if partition is not None and not partition.all_owners:
+            owned = apply_partition(select(File.id), partition.including_archived())
+            statement = statement.where(AnalysisRun.file_id.in_(owned))
+        result = await self.db.execute(statement)
+        return list(result.all())
@@ -0,0 +1,81 @@
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, delete, update, func, or_
+
+from src.infrastructure.db.models.file import File
+from src.infrastructure.db.models.document_metadata import DocumentMetadata
+from src.infrastructure.db.models.document_archive import ArchiveSegment, ArchivedDocument
+
+
+
+class ArchiveRepository:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+
+    async def candidates(
+        self, before: datetime, statuses: list[str], after_file_id: int = 0, limit: int = 100,
+        rehydrated_before: Optional[datetime] = None,
+    ) -> list:
+        """(id, original_name, stored_size) de los documentos calientes más antiguos que `before`
+        (fecha del documento, o del análisis si no tiene) o con estado en `statuses`, por id.
+        Con `rehydrated_before` se omiten los rehidratados desde esa fecha (se acaban de usar)."""
+        document_date = func.coalesce(DocumentMetadata.document_date, DocumentMetadata.processed_at)
+        selected = [document_date < before]
+        if statuses:
+            selected.append(DocumentMetadata.status.in_(statuses))
+
+        conditions = [File.archived.is_(False), File.id > after_file_id, or_(*selected)]
+        if rehydrated_before is not None:
+            conditions.append(or_(File.rehydrated_at.is_(None), File.rehydrated_at < rehydrated_before))
+
+        result = await self.db.execute(
+            select(File.id, File.original_name, func.coalesce(File.stored_size, File.size).label("stored_size"))
+            .join(DocumentMetadata, File.id == DocumentMetadata.file_id)
+            .where(*conditions)
+            .order_by(File.id)
+            .limit(limit)
+        )
+        return list(result.all())
+
+
+    async def get(self, file_id: int) -> Optional[tuple[ArchivedDocument, ArchiveSegment]]:
+        result = await self.db.execute(
+            select(ArchivedDocument, ArchiveSegment)
+            .join(ArchiveSegment, ArchiveSegment.id == ArchivedDocument.segment_id)
+            .where(ArchivedDocument.file_id == file_id)
+        )
+        return result.tuples().first()
+
+
+    async def release(self, file_id: int) -> Optional[str]:
+        """
+        Saca el archivo del tier frío (sin commit). Si era el último vivo de su
+        segmento, borra el segmento y devuelve su ruta para borrarlo del disco tras el commit.
+        """
+        segment_id = (await self.db.execute(
+            select(ArchivedDocument.segment_id).where(ArchivedDocument.file_id == file_id)
+        )).scalar_one_or_none()
+        if segment_id is None:
+            return None
+        deleted = await self.db.execute(delete(ArchivedDocument).where(ArchivedDocument.file_id == file_id))
+        # Ya liberado entre medio (otro proceso rehidrató o borró el mismo archivo)
+        if deleted.rowcount == 0:
+            return None
+
+        await self.db.execute(
+            update(ArchiveSegment)
+            .where(ArchiveSegment.id == segment_id)
+            .values(live_count=ArchiveSegment.live_count - 1)
+        )
+        segment = (await self.db.execute(
+            select(ArchiveSegment).where(ArchiveSegment.id == segment_id).execution_options(populate_existing=True)
+        )).scalar_one()
+        if segment.live_count > 0:
+            return None
+
+        await self.db.delete(segment)
+        return segment.path
+
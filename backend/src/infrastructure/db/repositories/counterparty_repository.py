@@ -0,0 +1,82 @@
+from typing import Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update, func, union
+from sqlalchemy.dialects import mysql, sqlite, postgresql
+
+from src.infrastructure.db.models.counterparty import Counterparty
+from src.infrastructure.db.models.document_metadata import DocumentMetadata
+from src.infrastructure.db.models.file import File
+from src.infrastructure.db.repositories.document_repository import DocumentPartition, apply_partition
+from src.utils.timing import now
+
+
+
+class CounterpartyRepository:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+
+    async def record(self, rut: str, name: Optional[str]) -> None:
+        """Upsert atómico: suma un documento a la contraparte y actualiza su nombre"""
+        values = {"rut": rut, "name": name, "document_count": 1, "last_seen_at": now()}
+        dialect = self.db.get_bind().dialect.name
+
+        if dialect == "mysql":
+            statement = mysql.insert(Counterparty).values(**values)
+            statement = statement.on_duplicate_key_update(
+                name=func.coalesce(statement.inserted.name, Counterparty.name),
+                document_count=Counterparty.document_count + 1,
+                last_seen_at=statement.inserted.last_seen_at,
+            )
+        else:
+            insert = sqlite.insert if dialect == "sqlite" else postgresql.insert
+            statement = insert(Counterparty).values(**values)
+            statement = statement.on_conflict_do_update(
+                index_elements=[Counterparty.rut],
+                set_={
+                    "name": func.coalesce(statement.excluded.name, Counterparty.name),
+                    "document_count": Counterparty.document_count + 1,
+                    "last_seen_at": statement.excluded.last_seen_at,
+                },
+            )
+
+        await self.db.execute(statement)
+
+
+    async def forget(self, rut: str) -> None:
+        """Resta un documento a la contraparte (al reemplazar o borrar sus metadatos)"""
+        await self.db.execute(
+            update(Counterparty)
+            .where(Counterparty.rut == rut, Counterparty.document_count > 0)
+            .values(document_count=Counterparty.document_count - 1)
+        )
+
+
+    async def document_counts(self, ruts: Optional[list[str]], partition: DocumentPartition) -> dict[str, int]:
+        """Documentos de la partición donde aparece cada RUT (como emisor o cliente); sin los que no aparecen.
+        Con `ruts=None`, todos los RUTs de la partición."""
+        if ruts is not None and not ruts:
+            return {}
+
+        def appearances_of(column):
+            statement = (
+                select(column.label("rut"), DocumentMetadata.file_id)
+                .join(File, File.id == DocumentMetadata.file_id)
+                .where(column.in_(ruts) if ruts is not None else column.is_not(None))
+            )
+            return apply_partition(statement, partition)
+
+        # union (no union all): un documento con el mismo RUT en ambos lados cuenta una vez
+        appearances = union(
+            *(appearances_of(column) for column in (DocumentMetadata.company_rut, DocumentMetadata.client_rut))
+        ).subquery()
+        result = await self.db.execute(
+            select(appearances.c.rut, func.count()).group_by(appearances.c.rut)
+        )
+        return dict(result.tuples().all())
+
+
+    async def get_all(self) -> list[Counterparty]:
+        result = await self.db.execute(select(Counterparty))
+        return list(result.scalars())
@@ -0,0 +1,182 @@
+from dataclasses import dataclass, field, replace
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, delete, func
+
+from src.infrastructure.db.models.file import File
+from src.infrastructure.db.models.document_metadata import DocumentMetadata
+from src.infrastructure.db.models.document_extraction import DocumentExtraction
+from src.infrastructure.db.models.document_tag import DocumentTag
+
+
+
+@dataclass(frozen=True)
+class DocumentPartition:
+    """Documentos visibles para quien consulta: los de su dueño (owner_id NULL = sin dueño) o todos (admin).
+
+    `owner_id` es también el dueño de lo que se sube (el admin incluido, con `all_owners`).
+    Por defecto solo el tier caliente; los archivados (ver archive_service) con `include_archived`.
+    """
+    owner_id: Optional[int] = None
+    all_owners: bool = False
+    include_archived: bool = False
+
+    @property
+    def cache_key(self) -> tuple:
+        return ("*" if self.all_owners else self.owner_id, self.include_archived)
+
+    def including_archived(self) -> "DocumentPartition":
+        """Acceso a un documento por id: también alcanza el tier frío"""
+        return replace(self, include_archived=True)
+
+    def _owned(self, column):
+        return column.is_(None) if self.owner_id is None else column == self.owner_id
+
+    def conditions(self, filters: Optional["DocumentSearchFilters"] = None) -> list:
+        """Condiciones WHERE de la partición (sobre File y, con filtros de fecha, DocumentMetadata)"""
+        conditions = [] if self.include_archived else [File.archived.is_(False)]
+        if self.all_owners:
+            return conditions
+        conditions.append(self._owned(File.owner_id))
+        if filters and (filters.date_from is not None or filters.date_to is not None):
+            # Redundante con File.owner_id, pero permite usar (owner_id, document_date)
+            conditions.append(self._owned(DocumentMetadata.owner_id))
+        return conditions
+
+    def owns(self, item) -> bool:
+        """`item` es un File o cualquier objeto con `owner_id` (ej. un evento de progreso)"""
+        return self.all_owners or item.owner_id == self.owner_id
+
+
+@dataclass
+class DocumentSearchFilters:
+    """Filtros comunes de /search y de los endpoints que comparten sus parámetros"""
+    query: Optional[str] = None
+    document_type: Optional[str] = None
+    company: Optional[str] = None
+    company_ruts: Optional[list[str]] = None  # RUTs que el índice difuso asocia a `company` (se suman al ILIKE)
+    rut: Optional[str] = None  # emisor o cliente
+    company_rut: Optional[str] = None
+    client_rut: Optional[str] = None
+    date_from: Optional[datetime] = None
+    date_to: Optional[datetime] = None
+    min_amount: Optional[float] = None
+    max_amount: Optional[float] = None
+    tags: list[str] = field(default_factory=list)
+    tags_mode: str = "all"
+
+    def conditions(self) -> list:
+        """Condiciones WHERE sobre File / DocumentMetadata"""
+        conditions = []
+
+        if self.query:
+            conditions.append(
+                File.original_name.ilike(f"%{self.query}%") |
+                File.description.ilike(f"%{self.query}%") |
+                DocumentMetadata.description.ilike(f"%{self.query}%")
+            )
+
+        if self.document_type:
+            conditions.append(DocumentMetadata.document_type == self.document_type)
+
+        if self.company:
+            by_name = (
+                DocumentMetadata.company_name.ilike(f"%{self.company}%") |
+                DocumentMetadata.client_name.ilike(f"%{self.company}%")
+            )
+            if self.company_ruts:
+                # Los RUTs del índice difuso agregan los nombres con typos o escritos distinto;
+                # el ILIKE mantiene los documentos sin RUT válido
+                by_name = (
+                    by_name |
+                    DocumentMetadata.company_rut.in_(self.company_ruts) |
+                    DocumentMetadata.client_rut.in_(self.company_ruts)
+                )
+            conditions.append(by_name)
+
+        # RUTs ya canónicos: igualdad exacta sobre columnas indexadas
+        if self.rut:
+            conditions.append(
+                (DocumentMetadata.company_rut == self.rut) |
+                (DocumentMetadata.client_rut == self.rut)
+            )
+
+        if self.company_rut:
+            conditions.append(DocumentMetadata.company_rut == self.company_rut)
+
+        if self.client_rut:
+            conditions.append(DocumentMetadata.client_rut == self.client_rut)
+
+        if self.date_from is not None:
+            conditions.append(DocumentMetadata.document_date >= self.date_from)
+
+        if self.date_to is not None:
+            conditions.append(DocumentMetadata.document_date <= self.date_to)
+
+        if self.min_amount is not None:
+            conditions.append(DocumentMetadata.total_amount >= self.min_amount)
+
+        if self.max_amount is not None:
+            conditions.append(DocumentMetadata.total_amount <= self.max_amount)
+
+        if self.tags:
+            tagged = select(DocumentTag.metadata_id).where(DocumentTag.tag.in_(self.tags))
+            if self.tags_mode == "all":
+                # El documento debe tener TODOS los tags pedidos
+                tagged = tagged.group_by(DocumentTag.metadata_id).having(
+                    func.count(DocumentTag.tag) == len(self.tags)
+                )
+            conditions.append(DocumentMetadata.id.in_(tagged))
+
+        return conditions
+
+    def apply(self, statement):
+        for condition in self.conditions():
+            statement = statement.where(condition)
+        return statement
+
+
+def apply_partition(statement, partition: Optional[DocumentPartition], filters: Optional[DocumentSearchFilters] = None):
+    """Restringe la consulta a la partición; None = sin restricción (procesos internos)"""
+    if partition is not None:
+        for condition in partition.conditions(filters):
+            statement = statement.where(condition)
+    return statement
+
+
+def files_with_metadata_query(
+    filters: Optional[DocumentSearchFilters] = None, partition: Optional[DocumentPartition] = None
+):
+    """SELECT File, DocumentMetadata con los filtros aplicados"""
+    statement = select(File, DocumentMetadata).outerjoin(
+        DocumentMetadata, File.id == DocumentMetadata.file_id
+    )
+    if filters:
+        statement = filters.apply(statement)
+    return apply_partition(statement, partition, filters)
+
+
+def tag_facets_query(filters: DocumentSearchFilters, limit: int = 50, partition: Optional[DocumentPartition] = None):
+    """Cantidad de documentos por tag para el conjunto filtrado, en una sola query"""
+    statement = (
+        select(DocumentTag.tag, func.count().label("count"))
+        .join(DocumentMetadata, DocumentMetadata.id == DocumentTag.metadata_id)
+        .join(File, File.id == DocumentMetadata.file_id)
+    )
+    statement = apply_partition(filters.apply(statement), partition, filters)
+    return (
+        statement.group_by(DocumentTag.tag)
+        .order_by(func.count().desc(), DocumentTag.tag)
+        .limit(limit)
+    )
+
+
+async def delete_metadata_for_file(db: AsyncSession, file_id: int) -> None:
+    """Borra los metadatos de un archivo junto con sus tablas dependientes"""
+    metadata_ids = select(DocumentMetadata.id).where(DocumentMetadata.file_id == file_id)
+
+    await db.execute(delete(DocumentExtraction).where(DocumentExtraction.metadata_id.in_(metadata_ids)))
+    await db.execute(delete(DocumentTag).where(DocumentTag.metadata_id.in_(metadata_ids)))
+    await db.execute(delete(DocumentMetadata).where(DocumentMetadata.file_id == file_id))
@@ -0,0 +1,84 @@
+from typing import Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, delete, update, func, or_, and_
+
+from src.infrastructure.db.models.document_fingerprint import DocumentFingerprint, FingerprintBucket
+from src.infrastructure.db.models.document_metadata import DocumentMetadata
+from src.infrastructure.fingerprints import Fingerprint
+
+
+
+class FingerprintRepository:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+
+    async def save(self, file_id: int, fingerprint: Fingerprint) -> None:
+        """Reemplaza la huella del archivo y sus buckets (sin commit)"""
+        await self.delete(file_id)
+        self.db.add(DocumentFingerprint.from_fingerprint(file_id, fingerprint))
+        self.db.add_all(
+            FingerprintBucket(kind=kind, bucket_key=key, file_id=file_id)
+            for kind, key in fingerprint.bucket_keys()
+        )
+
+
+    async def delete(self, file_id: int) -> None:
+        await self.db.execute(delete(FingerprintBucket).where(FingerprintBucket.file_id == file_id))
+        await self.db.execute(delete(DocumentFingerprint).where(DocumentFingerprint.file_id == file_id))
+
+
+    async def candidates(
+        self, fingerprint: Fingerprint, exclude_file_id: int, owner_id: Optional[int] = None, limit: int = 20
+    ) -> list[DocumentFingerprint]:
+        """
+        Huellas de archivos ya analizados del mismo dueño que podrían ser el mismo
+        documento: igual sha256 o al menos un bucket en común (los que comparten más, primero).
+        """
+        analyzed = select(DocumentMetadata.file_id).where(
+            DocumentMetadata.file_id != exclude_file_id,
+            DocumentMetadata.owner_id.is_(None) if owner_id is None else DocumentMetadata.owner_id == owner_id,
+        )
+
+        exact = (await self.db.execute(
+            select(DocumentFingerprint)
+            .where(DocumentFingerprint.content_hash == fingerprint.content_hash)
+            .where(DocumentFingerprint.file_id.in_(analyzed))
+            .limit(1)
+        )).scalars().all()
+        if exact:
+            return list(exact)
+
+        keys = fingerprint.bucket_keys()
+        if not keys:
+            return []
+
+        shared = func.count().label("shared")
+        file_ids = (await self.db.execute(
+            select(FingerprintBucket.file_id, shared)
+            .where(or_(*(
+                and_(FingerprintBucket.kind == kind, FingerprintBucket.bucket_key == key)
+                for kind, key in keys
+            )))
+            .where(FingerprintBucket.file_id.in_(analyzed))
+            .group_by(FingerprintBucket.file_id)
+            .order_by(shared.desc())
+            .limit(limit)
+        )).scalars().all()
+        if not file_ids:
+            return []
+
+        result = await self.db.execute(
+            select(DocumentFingerprint).where(DocumentFingerprint.file_id.in_(file_ids))
+        )
+        return list(result.scalars())
+
+
+    async def detach_duplicates_of(self, file_id: int) -> None:
+        """Al borrar un archivo, sus duplicados dejan de apuntarle (conservan los metadatos)"""
+        await self.db.execute(
+            update(DocumentMetadata)
+            .where(DocumentMetadata.duplicate_of_file_id == file_id)
+            .values(duplicate_of_file_id=None)
+        )
@@ -5,11 +5,21 @@ from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 
 from src.core.config.settings import env_vars
+from src.infrastructure.db import sqlite
 
 
 
-sync_engine = create_engine(env_vars.url_db_sync)
-engine = create_async_engine(env_vars.url_db)
+if env_vars.database_backend == "sqlite":
+    sqlite.prepare(env_vars.sqlite_path, env_vars.sqlite_target)
+    sync_engine = create_engine(env_vars.url_db_sync, **sqlite.engine_options(env_vars.sqlite_path, is_async=False))
+    engine = create_async_engine(env_vars.url_db, **sqlite.engine_options(env_vars.sqlite_path, is_async=True))
+    sqlite.configure_engine(sync_engine, env_vars.sqlite_path)
+    sqlite.configure_engine(
+        engine.sync_engine, env_vars.sqlite_path, writer_queue=True, writer_timeout=env_vars.sqlite_writer_timeout_seconds
+    )
+else:
+    sync_engine = create_engine(env_vars.url_db_sync)
+    engine = create_async_engine(env_vars.url_db)
 
 SyncSessionLocal = sessionmaker(bind=sync_engine, future=True)
 AsyncSessionLocal = async_sessionmaker(
@@ -29,4 +39,4 @@ def get_sync_db_session():
     try:
         yield session
     finally:
-        session.close()
\ No newline at end of file
+        session.close()
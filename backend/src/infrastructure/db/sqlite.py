@@ -0,0 +1,139 @@
+"""
+Backend embebido SQLite (`database_backend=sqlite`) para instalaciones de un
+solo nodo y para correr pruebas sin MySQL.
+
+- Cada conexión abre con WAL (lectores no bloquean al escritor), synchronous=NORMAL
+  (seguro con WAL), foreign_keys, busy_timeout y caché/mmap más grandes.
+- SQLite admite un solo escritor a la vez. En vez de dejar que las sesiones
+  choquen con "database is locked", las escrituras pasan por una cola por
+  proceso: antes del primer INSERT/UPDATE/DELETE de una transacción se espera
+  un `asyncio.Lock` (FIFO) que se libera en el commit o rollback, o al devolver
+  la conexión al pool (sesión cerrada sin terminar la transacción). El driver
+  abre la transacción recién en ese primer DML, así que los SELECT previos
+  no dejan una instantánea vieja que impida escribir.
+- El lock no es reentrante: una segunda sesión que escribe mientras la primera
+  (en la misma tarea) retiene el turno se quedaría esperando para siempre. La
+  espera tiene tope (`writer_timeout`) y termina en "database is locked".
+- `sqlite_path=":memory:"` usa una base en memoria compartida por las
+  conexiones del proceso (sin WAL); el esquema se crea al iniciar la app.
+- `sqlite_replica_path` (réplica de lectura, ver replica.py) se abre con
+  query_only: no cambia el modo de journal ni acepta escrituras.
+"""
+import asyncio
+import sqlite3
+from pathlib import Path
+
+from sqlalchemy import Engine, event
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from sqlalchemy.util import await_only
+
+from src.infrastructure.metrics import metrics
+
+
+
+MEMORY_PATH = ":memory:"
+
+PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "foreign_keys": "ON",
+    "busy_timeout": "5000",
+    "temp_store": "MEMORY",
+    "cache_size": "-64000",  # KiB (negativo), ~64 MB
+    "mmap_size": str(256 * 1024 * 1024),
+}
+REPLICA_PRAGMAS = {
+    "query_only": "ON",
+    "busy_timeout": "5000",
+    "temp_store": "MEMORY",
+    "cache_size": "-64000",
+    "mmap_size": str(256 * 1024 * 1024),
+}
+MEMORY_PRAGMAS = {
+    "foreign_keys": "ON",
+    "read_uncommitted": "ON",  # caché compartida: los lectores no toman locks de tabla
+}
+
+_WRITE_STATEMENTS = ("INSERT", "UPDATE", "DELETE", "REPLACE")
+_WRITER_KEY = "sqlite_writer"
+
+# Un lock por base (todos los engines async del proceso que escriben en ella)
+_writer_locks: dict[str, asyncio.Lock] = {}
+# La base en memoria existe mientras haya una conexión abierta
+_memory_keepers: dict[str, sqlite3.Connection] = {}
+
+
+def is_memory(path: str) -> bool:
+    return path == MEMORY_PATH
+
+
+def prepare(path: str, target: str) -> None:
+    """Crea la carpeta del archivo o, en memoria, abre la conexión que mantiene viva la base"""
+    if is_memory(path):
+        if target not in _memory_keepers:
+            _memory_keepers[target] = sqlite3.connect(target, uri=True, check_same_thread=False)
+    else:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+
+
+def engine_options(path: str, is_async: bool) -> dict:
+    options = {"connect_args": {"timeout": 30} if is_async else {"timeout": 30, "check_same_thread": False}}
+    if is_memory(path):
+        # SQLAlchemy usaría una sola conexión compartida (StaticPool) y las
+        # transacciones de sesiones distintas se mezclarían
+        options["poolclass"] = AsyncAdaptedQueuePool if is_async else QueuePool
+    return options
+
+
+def configure_engine(
+    engine: Engine, path: str, writer_queue: bool = False, read_only: bool = False, writer_timeout: float = 30
+) -> None:
+    """Aplica los pragmas en cada conexión y, para engines async, la cola de escritura"""
+    pragmas = REPLICA_PRAGMAS if read_only else MEMORY_PRAGMAS if is_memory(path) else PRAGMAS
+
+    @event.listens_for(engine, "connect")
+    def apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+    if not writer_queue:
+        return
+
+    lock = _writer_locks.setdefault(path, asyncio.Lock())
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def wait_for_writer_slot(conn, cursor, statement, parameters, context, executemany):
+        if conn.info.get(_WRITER_KEY) or not statement.lstrip().upper().startswith(_WRITE_STATEMENTS):
+            return
+        if lock.locked():
+            metrics.increment("sqlite_writer", outcome="waited")
+        # Corre dentro del greenlet del engine async: se puede esperar el lock
+        try:
+            await_only(asyncio.wait_for(lock.acquire(), timeout=writer_timeout))
+        except asyncio.TimeoutError:
+            metrics.increment("sqlite_writer", outcome="timeout")
+            raise sqlite3.OperationalError(f"database is locked: sin turno de escritura tras {writer_timeout:g} s")
+        conn.info[_WRITER_KEY] = True
+
+    def release_writer_slot(finish):
+        # Los eventos llegan antes del COMMIT/ROLLBACK real: se ejecuta aquí para
+        # que el siguiente escritor no choque con la transacción aún abierta
+        # (en memoria la caché compartida falla de inmediato con "table is locked")
+        def release(conn):
+            if conn.info.pop(_WRITER_KEY, False):
+                try:
+                    finish(conn.connection.dbapi_connection)
+                finally:
+                    lock.release()
+        return release
+
+    event.listen(engine, "commit", release_writer_slot(lambda dbapi_connection: dbapi_connection.commit()))
+    event.listen(engine, "rollback", release_writer_slot(lambda dbapi_connection: dbapi_connection.rollback()))
+
+    @event.listens_for(engine, "checkin")
+    def release_on_checkin(dbapi_connection, connection_record):
+        # Conexión devuelta al pool sin commit/rollback explícito
+        if connection_record.info.pop(_WRITER_KEY, False):
+            lock.release()
@@ -0,0 +1,258 @@
+"""
+Pub/sub del progreso de los análisis (alimenta el endpoint SSE), compartido
+entre procesos a través de la tabla `analysis_event`.
+
+`publish` no bloquea: deja el evento en un buffer que una tarea escribe en
+lotes cada `flush_seconds`. Cada proceso con clientes SSE conectados lee los
+eventos nuevos cada `poll_seconds` y los reparte; así llegan también los que
+publica un worker de `src.worker` u otro worker de uvicorn. El id de la fila
+no llega en orden de commit (con escritores concurrentes N+1 puede confirmarse
+antes que N): el poller recuerda los huecos durante `gap_seconds` y los vuelve
+a pedir. El id que se manda al cliente es el cursor hasta donde ya no quedan
+huecos, así reconectarse con `Last-Event-ID` no salta eventos (a lo más repite
+alguno). Cada suscriptor recibe solo los eventos de archivos de su partición
+(ver DocumentPartition). Los eventos se borran después de `retention_seconds`.
+"""
+import asyncio
+import json
+import logging
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import timedelta
+from typing import AsyncIterator, Optional
+
+from src.infrastructure.db.session import engine, get_db_session
+from src.infrastructure.db.models.analysis_event import AnalysisEvent
+from src.infrastructure.db.repositories.analysis_event_repository import AnalysisEventRepository
+from src.infrastructure.db.repositories.document_repository import DocumentPartition
+from src.infrastructure.metrics import metrics
+from src.utils.timing import now
+
+logger = logging.getLogger(__name__)
+
+
+
+MAX_PENDING_EVENTS = 10_000  # si la base no responde se descartan los más antiguos
+EVENTS_PAGE_SIZE = 500
+MAX_GAP_IDS = 1_000  # saltos de id más grandes no se siguen
+MAX_SENT_IDS = 4_096  # ids ya entregados que recuerda cada suscriptor para no repetir
+
+
+class AnalysisStage:
+    QUEUED = "queued"
+    EXTRACTING = "extracting"
+    CALLING_MODEL = "calling_model"
+    PARSING = "parsing"
+    DONE = "done"
+    FAILED = "failed"
+
+
+@dataclass
+class ProgressEvent:
+    id: int
+    file_id: int
+    stage: str
+    timestamp: str
+    detail: Optional[str] = None
+    owner_id: Optional[int] = None  # dueño del archivo, para filtrar por partición (no se envía)
+    cursor: int = 0  # id para Last-Event-ID: todos los eventos hasta ahí ya se entregaron
+
+    @classmethod
+    def from_row(cls, row: AnalysisEvent, owner_id: Optional[int], cursor: Optional[int] = None) -> "ProgressEvent":
+        return cls(
+            id=row.id, file_id=row.file_id, stage=row.stage, timestamp=row.created_at.isoformat(),
+            detail=row.detail, owner_id=owner_id, cursor=row.id if cursor is None else cursor,
+        )
+
+    def to_json(self) -> str:
+        return json.dumps({
+            "file_id": self.file_id,
+            "stage": self.stage,
+            "timestamp": self.timestamp,
+            "detail": self.detail,
+        }, ensure_ascii=False)
+
+
+@dataclass(eq=False)
+class _Subscriber:
+    file_id: Optional[int]
+    partition: DocumentPartition
+    queue: asyncio.Queue = field(default_factory=lambda: asyncio.Queue(maxsize=256))
+
+
+class ProgressBroker:
+    def __init__(
+        self, flush_seconds: float = 0.2, poll_seconds: float = 0.5, retention_seconds: float = 24 * 3600,
+        gap_seconds: float = 10.0,
+    ):
+        self.flush_seconds = flush_seconds
+        self.poll_seconds = poll_seconds
+        self.retention_seconds = retention_seconds
+        self.gap_seconds = gap_seconds
+        self._pending: deque[AnalysisEvent] = deque(maxlen=MAX_PENDING_EVENTS)
+        self._subscribers: set[_Subscriber] = set()
+        self._last_id = 0  # último evento leído por el poller de este proceso
+        self._gaps: dict[int, float] = {}  # ids menores a _last_id aún no vistos -> hasta cuándo esperarlos
+        self._flusher: Optional[asyncio.Task] = None
+        self._poller: Optional[asyncio.Task] = None
+        self._pruned_at = 0.0
+
+    def publish(self, file_id: int, stage: str, detail: Optional[str] = None) -> None:
+        self._pending.append(AnalysisEvent(file_id=file_id, stage=stage, detail=detail, created_at=now()))
+        # Las tareas se crean a demanda y terminan cuando no hay trabajo
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.get_running_loop().create_task(self._flush_loop())
+
+    async def _flush_loop(self) -> None:
+        while self._pending:
+            await asyncio.sleep(self.flush_seconds)
+            await self.flush()
+
+    async def flush(self) -> None:
+        """Escribe los eventos pendientes (también al apagar el proceso)"""
+        if not self._pending:
+            return
+        batch = list(self._pending)
+        self._pending.clear()
+        try:
+            async with get_db_session() as session:
+                repository = AnalysisEventRepository(session)
+                await repository.add_all(batch)
+                if time.monotonic() - self._pruned_at > 600:
+                    self._pruned_at = time.monotonic()
+                    await repository.prune(now() - timedelta(seconds=self.retention_seconds))
+        except Exception as e:
+            # El progreso es informativo: no se reintenta
+            metrics.increment("progress_events_dropped", len(batch))
+            logger.warning(f"No se pudieron guardar {len(batch)} eventos de progreso: {e}")
+
+    async def close(self) -> None:
+        """Al apagar el proceso: detiene las tareas y escribe lo pendiente"""
+        for task in (self._flusher, self._poller):
+            if task is not None and not task.done():
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+        await self.flush()
+        # En la app corre después de que el plugin cerró el engine: el último flush abrió
+        # una conexión nueva que mantendría vivo el hilo de aiosqlite
+        await engine.dispose()
+
+    async def _poll_loop(self) -> None:
+        while self._subscribers:
+            await asyncio.sleep(self.poll_seconds)
+            try:
+                await self._poll()
+            except Exception as e:
+                logger.warning(f"No se pudieron leer eventos de progreso: {e}")
+
+    async def _poll(self) -> None:
+        """Reparte los eventos nuevos y los de huecos que ya se confirmaron, hasta agotarlos"""
+        current = time.monotonic()
+        self._gaps = {event_id: expires for event_id, expires in self._gaps.items() if expires > current}
+        while True:
+            async with get_db_session() as session:
+                rows = await AnalysisEventRepository(session).since(
+                    self._last_id, limit=EVENTS_PAGE_SIZE, also_ids=list(self._gaps)
+                )
+            for row, owner_id in rows:
+                if self._gaps.pop(row.id, None) is None:
+                    # Saltos de id: filas que aún no se confirman (o que nunca existirán)
+                    if row.id - self._last_id - 1 <= MAX_GAP_IDS:
+                        expires = time.monotonic() + self.gap_seconds
+                        self._gaps.update(dict.fromkeys(range(self._last_id + 1, row.id), expires))
+                    self._last_id = row.id
+                cursor = min(self._gaps) - 1 if self._gaps else self._last_id
+                self._dispatch(ProgressEvent.from_row(row, owner_id, cursor=cursor))
+            if len(rows) < EVENTS_PAGE_SIZE:
+                return
+
+    def _dispatch(self, event: ProgressEvent) -> None:
+        for subscriber in list(self._subscribers):
+            if subscriber.file_id is not None and subscriber.file_id != event.file_id:
+                continue
+            if not subscriber.partition.owns(event):
+                continue
+            try:
+                subscriber.queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # Cliente demasiado lento: se corta y se reconectará con Last-Event-ID
+                self._subscribers.discard(subscriber)
+
+    async def subscribe(
+        self,
+        partition: DocumentPartition,
+        last_event_id: Optional[int] = None,
+        file_id: Optional[int] = None,
+        keepalive_seconds: float = 15.0,
+    ) -> AsyncIterator[Optional[ProgressEvent]]:
+        """Itera eventos nuevos de archivos de la partición; entrega None cada `keepalive_seconds` sin actividad"""
+        async with get_db_session() as session:
+            head = await AnalysisEventRepository(session).last_id()
+
+        if not self._subscribers:
+            # Poller detenido: retoma desde ahora, no desde donde quedó
+            self._last_id = max(self._last_id, head)
+            self._gaps.clear()
+        subscriber = _Subscriber(file_id=file_id, partition=partition)
+        self._subscribers.add(subscriber)
+        if self._poller is None or self._poller.done():
+            self._poller = asyncio.get_running_loop().create_task(self._poll_loop())
+
+        sent: dict[int, None] = {}  # Lo recuperado puede venir repetido en la cola
+
+        def first_time(event: ProgressEvent) -> bool:
+            if event.id in sent:
+                return False
+            sent[event.id] = None
+            if len(sent) > MAX_SENT_IDS:
+                del sent[next(iter(sent))]
+            return True
+
+        try:
+            # Lo que se perdió desconectado, por páginas: una desconexión larga puede dejar muchos
+            cursor = last_event_id
+            while cursor is not None:
+                async with get_db_session() as session:
+                    missed = await AnalysisEventRepository(session).since(cursor, file_id=file_id, limit=EVENTS_PAGE_SIZE)
+                for row, owner_id in missed:
+                    event = ProgressEvent.from_row(row, owner_id)
+                    if partition.owns(event) and first_time(event):
+                        yield event
+                cursor = missed[-1][0].id if len(missed) == EVENTS_PAGE_SIZE else None
+
+            while subscriber in self._subscribers or not subscriber.queue.empty():
+                try:
+                    event = await asyncio.wait_for(subscriber.queue.get(), timeout=keepalive_seconds)
+                except asyncio.TimeoutError:
+                    yield None
+                    continue
+                if first_time(event):
+                    yield event
+        finally:
+            self._subscribers.discard(subscriber)
+
+
+progress_broker = ProgressBroker()
+
+
+# Archivo cuyo análisis corre en la tarea actual (lo fija quien llama al analizador)
+_current_file_id: ContextVar[Optional[int]] = ContextVar("analysis_file_id", default=None)
+
+
+@contextmanager
+def analysis_progress(file_id: int):
+    token = _current_file_id.set(file_id)
+    try:
+        yield
+    finally:
+        _current_file_id.reset(token)
+
+
+def report_stage(stage: str, detail: Optional[str] = None) -> None:
+    """Publica una etapa para el archivo del contexto actual (no hace nada fuera de contexto)"""
+    file_id = _current_file_id.get()
+    if file_id is not None:
+        progress_broker.publish(file_id, stage, detail)
@@ -0,0 +1,125 @@
+"""
+Almacenamiento de las subidas en `uploads/`, con compresión zstd opcional por archivo.
+
+Con `upload_compression` activo, cada archivo se guarda como `<nombre>.zst`
+salvo que su formato ya venga comprimido (JPEG, PNG, Office, zip...) o que
+la compresión no ahorre al menos `MIN_SAVINGS`. `File.size` sigue siendo el
+tamaño lógico y `File.stored_size` lo que ocupa en disco.
+
+Quien necesite el archivo original en disco (análisis, previews, huellas)
+usa `plain_file`/`plain_file_async` con el `File.compression` de la fila (no
+el sufijo: una subida llamada `x.zst` se guarda tal cual): si está comprimido
+se descomprime a un temporal que se borra al salir.
+"""
+import asyncio
+import mimetypes
+import os
+import shutil
+import tempfile
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import AsyncIterator, Iterator, Optional
+
+import zstandard
+
+from src.core.config.settings import env_vars
+from src.infrastructure.metrics import metrics
+
+
+
+ZSTD_SUFFIX = ".zst"
+ZSTD_ENCODING = "zstd"
+MIN_SAVINGS = 0.1  # si comprime menos de 10%, se guarda tal cual
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Formatos que ya vienen comprimidos: no vale la pena gastar CPU
+INCOMPRESSIBLE_EXTENSIONS = {
+    ".jpg", ".jpeg", ".png", ".gif", ".webp", ".heic", ".avif",
+    ".zip", ".gz", ".7z", ".rar", ".zst", ".xz", ".bz2",
+    ".docx", ".xlsx", ".pptx", ".odt", ".ods",
+    ".mp3", ".mp4", ".mov",
+}
+
+
+@dataclass
+class StoredFile:
+    path: Path
+    stored_size: int
+    compression: Optional[str] = None  # "zstd" o None
+
+
+def should_compress(original_name: str) -> bool:
+    if not env_vars.upload_compression:
+        return False
+    suffix = Path(original_name).suffix.lower()
+    if suffix in INCOMPRESSIBLE_EXTENSIONS:
+        return False
+    mime_type, _ = mimetypes.guess_type(original_name)
+    return not (mime_type and mime_type.startswith(("image/jpeg", "image/png", "video/", "audio/")))
+
+
+def write_upload(target: Path, content: bytes, original_name: str) -> StoredFile:
+    """Guarda `content` en `target` (o `target.zst` si conviene comprimir)"""
+    if should_compress(original_name):
+        compressed = zstandard.ZstdCompressor(level=env_vars.upload_compression_level).compress(content)
+        if len(compressed) <= len(content) * (1 - MIN_SAVINGS):
+            target = target.with_name(target.name + ZSTD_SUFFIX)
+            target.write_bytes(compressed)
+            metrics.increment("upload_storage", outcome="compressed")
+            metrics.increment("upload_storage_bytes", len(content) - len(compressed), kind="saved")
+            return StoredFile(path=target, stored_size=len(compressed), compression=ZSTD_ENCODING)
+        metrics.increment("upload_storage", outcome="not_worth")
+    else:
+        metrics.increment("upload_storage", outcome="skipped")
+
+    target.write_bytes(content)
+    return StoredFile(path=target, stored_size=len(content))
+
+
+@contextmanager
+def plain_file(path: str | Path, compression: Optional[str]) -> Iterator[Path]:
+    """Ruta al archivo sin comprimir (temporal si `compression` es zstd)"""
+    path = Path(path)
+    if compression != ZSTD_ENCODING:
+        yield path
+        return
+
+    # Mismo sufijo que el original (.pdf, .txt...): algunos lectores lo usan
+    suffix = Path(path.name.removesuffix(ZSTD_SUFFIX)).suffix
+    fd, tmp_name = tempfile.mkstemp(suffix=suffix, prefix="nolandocs-")
+    try:
+        with os.fdopen(fd, "wb") as output, open(path, "rb") as source:
+            with zstandard.ZstdDecompressor().stream_reader(source) as reader:
+                shutil.copyfileobj(reader, output, STREAM_CHUNK_SIZE)
+        yield Path(tmp_name)
+    finally:
+        Path(tmp_name).unlink(missing_ok=True)
+
+
+@asynccontextmanager
+async def plain_file_async(path: str | Path, compression: Optional[str]):
+    """Como `plain_file`, descomprimiendo en un hilo para no bloquear el event loop"""
+    manager = plain_file(path, compression)
+    plain_path = await asyncio.to_thread(manager.__enter__)
+    try:
+        yield plain_path
+    finally:
+        await asyncio.to_thread(manager.__exit__, None, None, None)
+
+
+async def stream_decompressed(path: str | Path, chunk_size: int = STREAM_CHUNK_SIZE) -> AsyncIterator[bytes]:
+    """Lee un `.zst` descomprimiendo por bloques (cada lectura en un hilo)"""
+    with open(path, "rb") as source:
+        with zstandard.ZstdDecompressor().stream_reader(source) as reader:
+            while chunk := await asyncio.to_thread(reader.read, chunk_size):
+                yield chunk
+
+
+def accepts_zstd(accept_encoding: Optional[str]) -> bool:
+    """Si el header Accept-Encoding admite zstd (y no con q=0)"""
+    for part in (accept_encoding or "").split(","):
+        coding, _, params = part.strip().partition(";")
+        if coding.strip().lower() == ZSTD_ENCODING:
+            return params.replace(" ", "").lower() not in ("q=0", "q=0.0", "q=0.00", "q=0.000")
+    return False
@@ -0,0 +1,227 @@
+"""
+Huellas para detectar documentos casi duplicados antes de llamar al modelo.
+
+- Texto (PDF con capa de texto, archivos planos): MinHash de 64 permutaciones
+  sobre shingles de 3 palabras del texto normalizado. La fracción de valores
+  iguales entre dos firmas estima la similitud de Jaccard.
+- Imágenes y PDFs: dHash de 64 bits de la primera página; la distancia de
+  Hamming mide qué tan parecidas se ven (un PDF escaneado vs. una foto).
+  Solo decide cuando alguno de los dos no tiene texto: entre documentos con
+  texto manda MinHash, porque facturas de una misma plantilla se ven casi iguales.
+- Números del texto (folios, montos, RUTs) normalizados a dígitos: MinHash no
+  distingue dos contratos que solo cambian en folio y total, así que una
+  coincidencia por texto se confirma contra los datos del original.
+
+Para no comparar contra todo el archivo se indexan "buckets" (tabla
+`fingerprint_bucket`): LSH de 16 bandas x 4 filas para MinHash, y 5 segmentos
+del dHash (con distancia <= 4 al menos un segmento coincide exacto).
+
+`compute_fingerprint` es CPU puro: se ejecuta en el pool de procesos.
+"""
+import hashlib
+import mimetypes
+import random
+import re
+import struct
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+from PIL import Image, ImageOps
+
+from src.infrastructure.file_storage import plain_file
+from src.utils.pdf import extract_pdf_text
+from src.utils.text import fold_text
+
+
+
+MINHASH_PERMUTATIONS = 64
+MINHASH_BANDS = 16
+MINHASH_ROWS = MINHASH_PERMUTATIONS // MINHASH_BANDS
+SHINGLE_SIZE = 3
+MIN_SHINGLES = 8  # Con menos texto la estimación de Jaccard no es confiable
+
+PHASH_SEGMENTS = (13, 13, 13, 13, 12)  # bits por segmento (suman 64)
+PHASH_PDF_DPI = 50
+
+_MERSENNE_PRIME = (1 << 61) - 1
+
+# "1.190.000,00", "76.123.456-K", "001234": dígitos con separadores y DV opcional
+_NUMBER_RE = re.compile(r"\d[\d.,]*(?:-[\dkK])?")
+_DECIMALS_RE = re.compile(r"[.,]\d{1,2}$")
+
+# Semilla fija: las firmas deben ser comparables entre procesos y reinicios
+_rng = random.Random(20261019)
+_PERMUTATIONS = [
+    (_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME))
+    for _ in range(MINHASH_PERMUTATIONS)
+]
+
+
+@dataclass
+class Fingerprint:
+    content_hash: str
+    phash: Optional[int] = None
+    minhash: Optional[list[int]] = None
+    shingle_count: int = 0
+    numbers: frozenset[str] = frozenset()  # ver numeric_tokens; no se guarda en la BD
+
+    def bucket_keys(self) -> list[tuple[str, str]]:
+        """(tipo, clave) a indexar para encontrar candidatos"""
+        keys = []
+        if self.minhash:
+            for band in range(MINHASH_BANDS):
+                rows = self.minhash[band * MINHASH_ROWS:(band + 1) * MINHASH_ROWS]
+                digest = hashlib.blake2b(struct.pack(f"<{MINHASH_ROWS}Q", *rows), digest_size=8).hexdigest()
+                keys.append(("minhash", f"{band}:{digest}"))
+        if self.phash is not None:
+            for segment, value in enumerate(_phash_segments(self.phash)):
+                keys.append(("phash", f"{segment}:{value:x}"))
+        return keys
+
+
+@dataclass
+class Similarity:
+    exact: bool = False
+    jaccard: Optional[float] = None
+    hamming: Optional[int] = None
+
+
+def pack_minhash(values: list[int]) -> bytes:
+    return struct.pack(f"<{len(values)}Q", *values)
+
+
+def unpack_minhash(payload: bytes) -> list[int]:
+    return list(struct.unpack(f"<{len(payload) // 8}Q", payload))
+
+
+def _phash_segments(phash: int) -> list[int]:
+    segments = []
+    offset = 0
+    for bits in PHASH_SEGMENTS:
+        segments.append((phash >> offset) & ((1 << bits) - 1))
+        offset += bits
+    return segments
+
+
+def _shingles(text: str) -> set[bytes]:
+    words = fold_text(text).split()
+    if len(words) < SHINGLE_SIZE:
+        return {" ".join(words).encode("utf-8")} if words else set()
+    return {
+        " ".join(words[i:i + SHINGLE_SIZE]).encode("utf-8")
+        for i in range(len(words) - SHINGLE_SIZE + 1)
+    }
+
+
+def _number_key(value: str) -> str:
+    return re.sub(r"[^0-9K]", "", value.upper()).lstrip("0")
+
+
+def numeric_tokens(text: str) -> frozenset[str]:
+    """Números del texto como dígitos sin separadores ni ceros a la izquierda
+    (el monto también sin decimales): "$1.190.000,00" -> {"119000000", "1190000"}"""
+    tokens = set()
+    for match in _NUMBER_RE.finditer(text):
+        value = match.group()
+        tokens.add(_number_key(value))
+        if _DECIMALS_RE.search(value):
+            tokens.add(_number_key(_DECIMALS_RE.sub("", value)))
+    tokens.discard("")
+    return frozenset(tokens)
+
+
+def identifier_tokens(document_number: Optional[str], total_amount: Optional[float], company_rut: Optional[str]) -> set[str]:
+    """Folio, total y RUT de unos metadatos en la forma de `numeric_tokens`"""
+    values = [document_number, company_rut]
+    if total_amount is not None:
+        values.append(str(int(total_amount)) if total_amount == int(total_amount) else f"{total_amount:.2f}")
+    tokens = {_number_key(value) for value in values if value}
+    tokens.discard("")
+    return tokens
+
+
+def minhash_signature(text: str) -> tuple[Optional[list[int]], int]:
+    shingles = _shingles(text)
+    if len(shingles) < MIN_SHINGLES:
+        return None, len(shingles)
+
+    hashed = [int.from_bytes(hashlib.blake2b(shingle, digest_size=8).digest(), "little") for shingle in shingles]
+    signature = [
+        min((a * value + b) % _MERSENNE_PRIME for value in hashed)
+        for a, b in _PERMUTATIONS
+    ]
+    return signature, len(shingles)
+
+
+def dhash(image: Image.Image) -> int:
+    """Hash de diferencias 8x8: cada bit indica si un pixel es más claro que el de su derecha"""
+    small = image.convert("L").resize((9, 8), Image.Resampling.LANCZOS)
+    pixels = list(small.getdata())
+    value = 0
+    for row in range(8):
+        for col in range(8):
+            left = pixels[row * 9 + col]
+            right = pixels[row * 9 + col + 1]
+            value = (value << 1) | (left > right)
+    return value
+
+
+def _first_page_image(file_path: Path, mime_type: str) -> Optional[Image.Image]:
+    if mime_type == "application/pdf":
+        from pdf2image import convert_from_path
+        pages = convert_from_path(file_path, dpi=PHASH_PDF_DPI, first_page=1, last_page=1)
+        return pages[0] if pages else None
+
+    image = Image.open(file_path)
+    image.seek(0)
+    return ImageOps.exif_transpose(image)
+
+
+def _document_text(file_path: Path, mime_type: str) -> str:
+    if mime_type == "application/pdf":
+        return extract_pdf_text(file_path)
+    if mime_type.startswith("image/"):
+        return ""
+    try:
+        return file_path.read_text(encoding="utf-8")
+    except UnicodeDecodeError:
+        return ""
+
+
+def compute_fingerprint(file_path: str, original_name: str, compression: Optional[str] = None) -> Fingerprint:
+    """Calcula la huella de un archivo (corre en el pool de procesos)"""
+    with plain_file(file_path, compression) as path:
+        return _fingerprint(path, original_name)
+
+
+def _fingerprint(path: Path, original_name: str) -> Fingerprint:
+    mime_type, _ = mimetypes.guess_type(original_name)
+    mime_type = mime_type or ""
+
+    fingerprint = Fingerprint(content_hash=hashlib.sha256(path.read_bytes()).hexdigest())
+
+    text = _document_text(path, mime_type)
+    fingerprint.minhash, fingerprint.shingle_count = minhash_signature(text)
+    fingerprint.numbers = numeric_tokens(text)
+
+    # También para PDFs con texto: así una foto del mismo documento puede coincidir
+    if mime_type.startswith("image/") or mime_type == "application/pdf":
+        try:
+            image = _first_page_image(path, mime_type)
+            if image is not None:
+                fingerprint.phash = dhash(image)
+        except Exception:
+            pass  # Sin poppler o imagen ilegible: solo queda el hash exacto
+
+    return fingerprint
+
+
+def compare(a: Fingerprint, b: Fingerprint) -> Similarity:
+    similarity = Similarity(exact=a.content_hash == b.content_hash)
+    if a.minhash and b.minhash:
+        equal = sum(1 for x, y in zip(a.minhash, b.minhash) if x == y)
+        similarity.jaccard = equal / MINHASH_PERMUTATIONS
+    if a.phash is not None and b.phash is not None:
+        similarity.hamming = bin(a.phash ^ b.phash).count("1")
+    return similarity
@@ -0,0 +1,57 @@
+"""
+Caché de fragmentos HTML de la lista de archivos (páginas por cursor).
+
+Cada página cubre un rango de ids: [id más bajo, cursor). Cuando un archivo
+cambia (subida, edición, borrado, análisis) se descartan solo las páginas
+cuyo rango lo incluye; la primera página (sin cursor) cubre hacia arriba,
+así que toda subida nueva la invalida. El resto queda en caché.
+
+Es por proceso: los cambios hechos por otro proceso (el worker de análisis)
+se ven al expirar el TTL.
+"""
+import math
+import threading
+from typing import Hashable, Optional
+
+from cachetools import TTLCache
+
+from src.infrastructure.metrics import metrics
+
+
+
+class PageFragmentCache:
+    def __init__(self, name: str, maxsize: int = 512, ttl: float = 60):
+        self.name = name
+        self._pages: TTLCache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[str]:
+        with self._lock:
+            entry = self._pages.get(key)
+        metrics.increment("fragment_cache", cache=self.name, outcome="hit" if entry else "miss")
+        return entry[0] if entry else None
+
+    def put(self, key: Hashable, html: str, low: float, high: float) -> None:
+        """Guarda el fragmento de una página que muestra los ids en [low, high]"""
+        with self._lock:
+            self._pages[key] = (html, low, high)
+
+    def invalidate(self, item_id: int) -> None:
+        with self._lock:
+            stale = [key for key, (_, low, high) in self._pages.items() if low <= item_id <= high]
+            for key in stale:
+                del self._pages[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._pages.clear()
+
+
+def page_bounds(ids: list[int], before: Optional[int], has_more: bool) -> tuple[float, float]:
+    """Rango de ids que cubre una página ordenada por id descendente"""
+    low = min(ids) if ids and has_more else 0  # la última página cubre todo lo de abajo
+    high = before - 1 if before is not None else math.inf
+    return low, high
+
+
+file_list_cache = PageFragmentCache("file_list")
@@ -0,0 +1,61 @@
+"""
+Contadores en memoria para el endpoint /metrics.
+
+Son por proceso (como los eventos de progreso): con varios workers cada uno
+reporta lo suyo. Cada contador se separa por etiquetas y el snapshot incluye
+la proporción de cada combinación sobre el total del contador, ej:
+
+    metrics.increment("analysis_route", route="local")
+    -> {"analysis_route": {"total": 10, "by": {"route=local": {"count": 6, "share": 0.6}, ...}}}
+"""
+import threading
+from collections import defaultdict
+
+
+
+class Metrics:
+    def __init__(self):
+        self._counters: dict[str, dict[tuple, float]] = defaultdict(lambda: defaultdict(int))
+        self._lock = threading.Lock()
+
+    def increment(self, name: str, amount: float = 1, **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._counters[name][key] += amount
+
+    def count(self, name: str, **labels: str) -> float:
+        """Suma de las series de `name` que tienen (al menos) estas etiquetas"""
+        wanted = set(labels.items())
+        with self._lock:
+            return sum(value for key, value in self._counters.get(name, {}).items() if wanted <= set(key))
+
+    def label_values(self, name: str, label: str) -> set[str]:
+        """Valores que ha tomado una etiqueta en las series de `name`"""
+        with self._lock:
+            return {dict(key)[label] for key in self._counters.get(name, {}) if label in dict(key)}
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            counters = {name: dict(series) for name, series in self._counters.items()}
+
+        result = {}
+        for name, series in sorted(counters.items()):
+            total = sum(series.values())
+            result[name] = {
+                "total": total,
+                "by": {
+                    ",".join(f"{label}={value}" for label, value in key) or "_": {
+                        "count": count,
+                        "share": round(count / total, 4) if total else 0.0,
+                    }
+                    for key, count in sorted(series.items())
+                },
+            }
+        return result
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+
+
+metrics = Metrics()
@@ -0,0 +1,167 @@
+"""
+Ruteo de modelos para el análisis: cada documento va primero al modelo que le
+corresponde según su tipo y tamaño, y solo se escala a uno más fuerte si la
+respuesta no convence.
+
+Reglas (`MODEL_ROUTES`, JSON; gana la primera que calza, si ninguna calza se
+usa `GEMINI_MODEL` con escalamiento a `GEMINI_ESCALATION_MODEL`):
+
+    [{"name": "imagen_chica", "kind": "image", "max_bytes": 2000000, "model": "gemini-2.0-flash-lite"},
+     {"name": "escaneado", "kind": "scanned_pdf", "model": "gemini-2.0-flash", "escalate_to": "gemini-2.5-pro"}]
+
+`kind` es image | pdf (con capa de texto) | scanned_pdf | text | * y
+`escalate_to` es opcional (por defecto el modelo de escalamiento global).
+
+Se escala cuando la respuesta falla (no se pudo decodificar ni reparar), no
+pasa `validation_error`, trae `requires_review` o `confidence_score` bajo el
+umbral. Cada decisión se cuenta en la métrica `model_route` (etiquetas route
+y outcome: hit | escalated | unresolved) y `route_hit_rates()` resume la
+proporción de aciertos del primer modelo por ruta.
+"""
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+from src.core.config.settings import env_vars
+from src.infrastructure.db.models.enums import AIMetadataResponse
+from src.infrastructure.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+KINDS = ("image", "pdf", "scanned_pdf", "text")
+DEFAULT_ROUTE = "default"
+AMOUNT_TOLERANCE = 0.01  # diferencia relativa aceptada entre total y net + tax + other_taxes
+
+
+
+@dataclass(frozen=True)
+class Route:
+    name: str
+    model: str
+    escalate_to: Optional[str] = None
+    kind: str = "*"
+    max_bytes: Optional[int] = None
+
+    def matches(self, kind: str, size: int) -> bool:
+        if self.kind not in ("*", kind):
+            return False
+        return self.max_bytes is None or size <= self.max_bytes
+
+
+def parse_routes(rules: list[dict], default_escalation: Optional[str]) -> list[Route]:
+    """Reglas de la configuración validadas; un error aquí es de configuración y se propaga"""
+    routes = []
+    for index, rule in enumerate(rules):
+        kind = rule.get("kind", "*")
+        if kind != "*" and kind not in KINDS:
+            raise ValueError(f"MODEL_ROUTES[{index}]: kind '{kind}' no es uno de {', '.join(KINDS)} o *")
+        if not rule.get("model"):
+            raise ValueError(f"MODEL_ROUTES[{index}]: falta model")
+        max_bytes = rule.get("max_bytes")
+        routes.append(Route(
+            name=rule.get("name") or (f"{kind}<={max_bytes}" if max_bytes is not None else kind),
+            model=rule["model"],
+            escalate_to=rule.get("escalate_to", default_escalation),
+            kind=kind,
+            max_bytes=int(max_bytes) if max_bytes is not None else None,
+        ))
+    return routes
+
+
+class ModelRouter:
+    def __init__(self, routes: list[Route], default: Route):
+        self.routes = routes
+        self.default = default
+
+    def route(self, kind: str, size: int) -> Route:
+        return next((route for route in self.routes if route.matches(kind, size)), self.default)
+
+
+def build_model_router() -> ModelRouter:
+    return ModelRouter(
+        parse_routes(env_vars.model_routes, env_vars.gemini_escalation_model),
+        Route(name=DEFAULT_ROUTE, model=env_vars.gemini_model, escalate_to=env_vars.gemini_escalation_model),
+    )
+
+
+def _parse_date(value: Optional[str]) -> Optional[datetime]:
+    return datetime.strptime(value, "%Y-%m-%d") if value else None
+
+
+def validation_error(result: AIMetadataResponse) -> Optional[str]:
+    """Inconsistencias que el esquema no detecta (fechas inválidas, montos que no cuadran)"""
+    try:
+        document_date = _parse_date(result.document_date)
+        due_date = _parse_date(result.due_date)
+    except ValueError:
+        return "invalid_date"
+    if document_date and due_date and due_date < document_date:
+        return "due_before_date"
+
+    amounts = result.amounts or {}
+    total = amounts.get("total")
+    parts = [amounts.get(key) for key in ("net", "tax")]
+    if total is not None and None not in parts:
+        expected = sum(parts) + (amounts.get("other_taxes") or 0)
+        if abs(total - expected) > max(1.0, abs(total) * AMOUNT_TOLERANCE):
+            return "amounts_mismatch"
+    return None
+
+
+def escalation_reason(result: Optional[AIMetadataResponse]) -> Optional[str]:
+    """Motivo para llamar al modelo más fuerte; None si la respuesta sirve"""
+    if result is None:
+        return "failed"
+    error = validation_error(result)
+    if error:
+        return error
+    if result.requires_review:
+        return "requires_review"
+    if result.confidence_score < env_vars.model_escalation_confidence:
+        return "low_confidence"
+    return None
+
+
+async def analyze_routed(route: Route, analyze) -> Optional[AIMetadataResponse]:
+    """Analiza con el modelo de la ruta (`analyze(model)`) y escala si hace falta"""
+    result = await analyze(route.model)
+    reason = escalation_reason(result)
+    if reason is None:
+        metrics.increment("model_route", route=route.name, outcome="hit")
+        return result
+    if not route.escalate_to or route.escalate_to == route.model:
+        metrics.increment("model_route", route=route.name, outcome="unresolved", reason=reason)
+        # Sin modelo al que escalar: montos o fechas que no cuadran no se guardan como limpios
+        if result is not None:
+            result.requires_review = True
+        return result
+
+    logger.info(f"Ruta {route.name}: escalando de {route.model} a {route.escalate_to} ({reason})")
+    metrics.increment("model_route", route=route.name, outcome="escalated", reason=reason)
+    escalated = await analyze(route.escalate_to)
+    resolved = escalation_reason(escalated) is None
+    metrics.increment("model_escalation", route=route.name, outcome="resolved" if resolved else "unresolved")
+    # Si el modelo fuerte también falla, queda la primera respuesta (marcada para revisión)
+    if escalated is None:
+        if result is not None:
+            result.requires_review = True
+        return result
+    if not resolved:
+        escalated.requires_review = True
+    return escalated
+
+
+def route_hit_rates() -> dict:
+    """Por ruta: análisis, cuántos resolvió el primer modelo y la proporción (de este proceso)"""
+    stats = {}
+    for name in sorted(metrics.label_values("model_route", "route")):
+        total = metrics.count("model_route", route=name)
+        hits = metrics.count("model_route", route=name, outcome="hit")
+        stats[name] = {
+            "analyses": total,
+            "hits": hits,
+            "escalated": metrics.count("model_route", route=name, outcome="escalated"),
+            "hit_rate": round(hits / total, 4) if total else 0.0,
+        }
+    return stats
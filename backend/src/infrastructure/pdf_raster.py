@@ -0,0 +1,93 @@
+"""
+Rasterizado de PDFs escaneados para enviarlos al modelo como imágenes.
+
+Cada página se rasteriza en el pool de procesos (en paralelo, sin bloquear el
+event loop) y se reduce a lo necesario para elegir qué mandar:
+
+- Páginas en blanco (separadores, reversos) se descartan por su proporción de tinta.
+- La primera página (encabezado) y la última con contenido (donde suelen ir
+  los totales) se envían siempre. Solo llegan aquí PDFs sin capa de texto,
+  así que la elección no depende del texto.
+- El resto del cupo se llena con las páginas con más contenido.
+"""
+import asyncio
+import io
+from dataclasses import dataclass
+from pathlib import Path
+
+from PIL import Image
+
+from src.infrastructure.process_pool import run_in_process
+from src.utils.pdf import count_pdf_pages
+
+
+
+BLANK_INK_RATIO = 0.004  # menos de 0,4% de pixeles oscuros = página en blanco
+INK_THRESHOLD = 160  # gris bajo este valor cuenta como tinta
+INK_SAMPLE_WIDTH = 200
+JPEG_QUALITY = 85
+
+
+@dataclass
+class PageRaster:
+    page_number: int  # desde 1
+    image_bytes: bytes  # JPEG
+    ink_ratio: float
+
+    @property
+    def is_blank(self) -> bool:
+        return self.ink_ratio < BLANK_INK_RATIO
+
+    def to_image(self) -> Image.Image:
+        return Image.open(io.BytesIO(self.image_bytes))
+
+
+def render_page(file_path: str, page_number: int, dpi: int) -> PageRaster:
+    """Rasteriza una página (corre en el pool de procesos)"""
+    from pdf2image import convert_from_path
+
+    pages = convert_from_path(file_path, dpi=dpi, first_page=page_number, last_page=page_number)
+    if not pages:
+        raise ValueError(f"Página {page_number} no encontrada")
+    page = pages[0].convert("RGB")
+
+    # Proporción de tinta sobre una muestra reducida (rápido y suficiente)
+    sample = page.convert("L")
+    sample.thumbnail((INK_SAMPLE_WIDTH, INK_SAMPLE_WIDTH * 2))
+    histogram = sample.histogram()
+    ink_ratio = sum(histogram[:INK_THRESHOLD]) / max(1, sum(histogram))
+
+    buffer = io.BytesIO()
+    page.save(buffer, format="JPEG", quality=JPEG_QUALITY, optimize=True)
+    return PageRaster(page_number=page_number, image_bytes=buffer.getvalue(), ink_ratio=ink_ratio)
+
+
+def select_pages(pages: list[PageRaster], max_pages: int) -> list[PageRaster]:
+    """Elige hasta `max_pages` páginas con contenido, en orden de aparición"""
+    content = [page for page in pages if not page.is_blank]
+    if len(content) <= max_pages:
+        return content
+
+    chosen = {content[0].page_number, content[-1].page_number}
+
+    for page in sorted(content, key=lambda page: page.ink_ratio, reverse=True):
+        if len(chosen) >= max_pages:
+            break
+        chosen.add(page.page_number)
+
+    return [page for page in content if page.page_number in chosen]
+
+
+async def rasterize_pdf(file_path: str | Path, dpi: int, max_pages: int, scan_pages: int) -> tuple[list[PageRaster], int]:
+    """Rasteriza las primeras `scan_pages` páginas en paralelo y selecciona las que se envían.
+
+    Retorna (páginas elegidas, total de páginas del PDF).
+    """
+    total_pages = await asyncio.to_thread(count_pdf_pages, file_path)
+    page_numbers = range(1, min(total_pages, scan_pages) + 1)
+
+    rasters = await asyncio.gather(*(
+        run_in_process(render_page, str(file_path), page_number, dpi) for page_number in page_numbers
+    ))
+
+    return select_pages(list(rasters), max_pages), total_pages
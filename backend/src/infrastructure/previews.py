@@ -0,0 +1,102 @@
+"""
+Miniaturas y raster de la primera página, guardados junto al archivo subido:
+
+    uploads/<stored_name>.thumb.webp   (~256 px, para listas)
+    uploads/<stored_name>.page.webp    (~1280 px, vista previa)
+
+Se generan en el pool de procesos apenas termina el upload.
+"""
+import asyncio
+import logging
+import mimetypes
+from pathlib import Path
+from typing import Optional
+
+from PIL import Image, ImageOps
+
+from src.infrastructure.file_storage import plain_file
+from src.infrastructure.process_pool import run_in_process
+
+logger = logging.getLogger(__name__)
+
+
+
+PREVIEW_SIZES = {
+    "thumb": (256, 70),  # (lado máximo en px, calidad WebP)
+    "page": (1280, 80),
+}
+PDF_PREVIEW_DPI = 100
+
+# Referencias a las tareas en curso (si no, el GC puede cancelarlas)
+_pending_tasks: set[asyncio.Task] = set()
+
+
+def preview_path(file_path: str | Path, size: str) -> Path:
+    file_path = Path(file_path)
+    return file_path.with_name(f"{file_path.name}.{size}.webp")
+
+
+def supports_preview(original_name: str) -> bool:
+    mime_type, _ = mimetypes.guess_type(original_name)
+    return bool(mime_type) and (mime_type.startswith("image/") or mime_type == "application/pdf")
+
+
+def _load_first_page(file_path: Path, mime_type: str) -> Image.Image:
+    if mime_type == "application/pdf":
+        from pdf2image import convert_from_path
+        pages = convert_from_path(file_path, dpi=PDF_PREVIEW_DPI, first_page=1, last_page=1)
+        if not pages:
+            raise ValueError("PDF sin páginas")
+        return pages[0]
+
+    image = Image.open(file_path)
+    image.seek(0)  # TIFF/GIF multipágina: solo la primera
+    return ImageOps.exif_transpose(image)
+
+
+def render_previews(file_path: str, original_name: str, compression: Optional[str] = None) -> dict[str, int]:
+    """Genera todas las previews (corre en el pool de procesos). Retorna bytes por tamaño"""
+    mime_type, _ = mimetypes.guess_type(original_name)
+    with plain_file(file_path, compression) as source:
+        page = _load_first_page(source, mime_type or "")
+        page.load()  # antes de que se borre el temporal
+    if page.mode not in ("RGB", "RGBA"):
+        page = page.convert("RGB")
+
+    written = {}
+    # De mayor a menor: cada tamaño parte del anterior, que ya es más chico
+    for size, (max_side, quality) in sorted(PREVIEW_SIZES.items(), key=lambda item: -item[1][0]):
+        page.thumbnail((max_side, max_side), Image.Resampling.LANCZOS)
+        target = preview_path(file_path, size)
+        tmp_target = target.with_suffix(".tmp")
+        page.save(tmp_target, format="WEBP", quality=quality, method=4)
+        tmp_target.replace(target)
+        written[size] = target.stat().st_size
+
+    return written
+
+
+async def generate_previews(
+    file_path: str, original_name: str, compression: Optional[str] = None
+) -> Optional[dict[str, int]]:
+    if not supports_preview(original_name):
+        return None
+    try:
+        return await run_in_process(render_previews, str(file_path), original_name, compression)
+    except Exception as e:
+        logger.error(f"Error generando previews de {original_name}: {str(e)}")
+        return None
+
+
+def schedule_previews(file_path: str, original_name: str, compression: Optional[str] = None) -> None:
+    """Lanza la generación en segundo plano sin esperar el resultado"""
+    if not supports_preview(original_name):
+        return
+    task = asyncio.create_task(generate_previews(file_path, original_name, compression))
+    _pending_tasks.add(task)
+    task.add_done_callback(_pending_tasks.discard)
+
+
+def delete_previews(file_path: str | Path) -> None:
+    for size in PREVIEW_SIZES:
+        preview_path(file_path, size).unlink(missing_ok=True)
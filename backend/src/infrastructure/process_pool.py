@@ -0,0 +1,31 @@
+"""Pool de procesos compartido para trabajo CPU (rasterizar PDFs, generar previews)"""
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Optional
+
+from src.core.config.settings import env_vars
+
+
+
+_process_pool: Optional[ProcessPoolExecutor] = None
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    global _process_pool
+    if _process_pool is None:
+        _process_pool = ProcessPoolExecutor(max_workers=env_vars.process_pool_workers)
+    return _process_pool
+
+
+async def run_in_process(function, *args, **kwargs):
+    """Ejecuta `function` (a nivel de módulo, picklable) en el pool sin bloquear el event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_process_pool(), partial(function, *args, **kwargs))
+
+
+def shutdown_process_pool() -> None:
+    global _process_pool
+    if _process_pool is not None:
+        _process_pool.shutdown(wait=False, cancel_futures=True)
+        _process_pool = None
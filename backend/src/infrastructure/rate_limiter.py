@@ -0,0 +1,241 @@
+"""
+Rate limiter tipo token bucket compartido entre procesos para la cuota de Gemini.
+
+Cada worker de uvicorn tiene su propio analizador; el estado de los buckets
+vive fuera del proceso para que todos respeten el mismo presupuesto:
+
+- "sqlite": archivo SQLite local (varios procesos en un mismo host).
+- "db": tabla `rate_limit_bucket` en la base de datos principal (varios hosts).
+- "memory": solo este proceso (desarrollo).
+
+Se presupuestan requests por minuto y tokens por minuto. Cuando Gemini
+responde 429 la tasa efectiva se reduce a la mitad (una vez por pausa: los
+429 de llamadas que ya estaban en vuelo no la vuelven a bajar) y luego se
+recupera de a poco con cada respuesta exitosa (AIMD).
+"""
+import asyncio
+import logging
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+
+logger = logging.getLogger(__name__)
+
+
+
+MIN_RATE_FACTOR = 0.1
+RATE_RECOVERY_STEP = 0.05
+THROTTLE_COOLDOWN_SECONDS = 10.0
+MAX_SLEEP_SECONDS = 5.0
+
+
+@dataclass
+class RateLimitConfig:
+    requests_per_minute: float
+    tokens_per_minute: float
+
+
+@dataclass
+class BucketState:
+    requests: float
+    tokens: float
+    updated_at: float
+    rate_factor: float = 1.0
+    blocked_until: float = 0.0
+
+    @classmethod
+    def full(cls, config: RateLimitConfig, now: float) -> "BucketState":
+        return cls(requests=config.requests_per_minute, tokens=config.tokens_per_minute, updated_at=now)
+
+
+def _refill(state: BucketState, config: RateLimitConfig, now: float) -> None:
+    elapsed = max(0.0, now - state.updated_at)
+    capacity_requests = config.requests_per_minute * state.rate_factor
+    capacity_tokens = config.tokens_per_minute * state.rate_factor
+    state.requests = min(capacity_requests, state.requests + elapsed * capacity_requests / 60.0)
+    state.tokens = min(capacity_tokens, state.tokens + elapsed * capacity_tokens / 60.0)
+    state.updated_at = now
+
+
+def take(state: BucketState, config: RateLimitConfig, now: float, tokens: float) -> float:
+    """Intenta consumir 1 request + `tokens`. Retorna 0 si se pudo o los segundos a esperar"""
+    _refill(state, config, now)
+
+    if now < state.blocked_until:
+        return state.blocked_until - now
+
+    # Un pedido más grande que la capacidad nunca cabría: se limita a la capacidad
+    tokens = min(tokens, config.tokens_per_minute * state.rate_factor)
+
+    if state.requests >= 1 and state.tokens >= tokens:
+        state.requests -= 1
+        state.tokens -= tokens
+        return 0.0
+
+    request_rate = config.requests_per_minute * state.rate_factor / 60.0
+    token_rate = config.tokens_per_minute * state.rate_factor / 60.0
+    wait_requests = (1 - state.requests) / request_rate if state.requests < 1 else 0.0
+    wait_tokens = (tokens - state.tokens) / token_rate if state.tokens < tokens else 0.0
+    return max(wait_requests, wait_tokens)
+
+
+def throttle(state: BucketState, config: RateLimitConfig, now: float) -> None:
+    """Recibimos un 429: bajar la tasa a la mitad, vaciar el bucket y pausar"""
+    _refill(state, config, now)
+    if now < state.blocked_until:
+        # Ya en pausa por la misma congestión (otras llamadas en vuelo): no se vuelve a bajar
+        return
+    state.rate_factor = max(MIN_RATE_FACTOR, state.rate_factor / 2)
+    state.requests = 0.0
+    state.tokens = 0.0
+    state.blocked_until = now + THROTTLE_COOLDOWN_SECONDS
+
+
+def settle(state: BucketState, config: RateLimitConfig, now: float, token_delta: float) -> None:
+    """Respuesta exitosa: corregir la estimación de tokens y recuperar tasa"""
+    _refill(state, config, now)
+    state.tokens -= token_delta
+    state.rate_factor = min(1.0, state.rate_factor + RATE_RECOVERY_STEP)
+
+
+class MemoryBackend:
+    def __init__(self):
+        self._states: dict[str, BucketState] = {}
+        self._lock = threading.Lock()
+
+    def apply(self, name: str, config: RateLimitConfig, operation, *args):
+        with self._lock:
+            now = time.time()
+            state = self._states.setdefault(name, BucketState.full(config, now))
+            return operation(state, config, now, *args)
+
+
+class SQLiteBackend:
+    """Estado en un archivo SQLite; BEGIN IMMEDIATE serializa a los procesos del host"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # El context manager de sqlite3 no cierra la conexión
+        with closing(self._connect()) as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS bucket ("
+                "name TEXT PRIMARY KEY, requests REAL, tokens REAL, updated_at REAL, "
+                "rate_factor REAL, blocked_until REAL)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        connection.execute("PRAGMA journal_mode=WAL")
+        return connection
+
+    def apply(self, name: str, config: RateLimitConfig, operation, *args):
+        connection = self._connect()
+        try:
+            connection.execute("BEGIN IMMEDIATE")
+            now = time.time()
+            row = connection.execute(
+                "SELECT requests, tokens, updated_at, rate_factor, blocked_until FROM bucket WHERE name = ?",
+                (name,),
+            ).fetchone()
+            state = BucketState(*row) if row else BucketState.full(config, now)
+
+            result = operation(state, config, now, *args)
+
+            connection.execute(
+                "INSERT OR REPLACE INTO bucket VALUES (?, ?, ?, ?, ?, ?)",
+                (name, state.requests, state.tokens, state.updated_at, state.rate_factor, state.blocked_until),
+            )
+            connection.execute("COMMIT")
+            return result
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+        finally:
+            connection.close()
+
+
+class DatabaseBackend:
+    """Estado en la tabla `rate_limit_bucket` de la BD principal (SELECT ... FOR UPDATE)"""
+
+    def apply(self, name: str, config: RateLimitConfig, operation, *args):
+        try:
+            return self._apply(name, config, operation, *args)
+        except IntegrityError:
+            # Otro proceso creó la fila al mismo tiempo; ahora sí existe
+            return self._apply(name, config, operation, *args)
+
+    def _apply(self, name: str, config: RateLimitConfig, operation, *args):
+        # Imports diferidos: los backends sqlite/memory no necesitan la BD
+        from src.infrastructure.db.session import get_sync_db_session
+        from src.infrastructure.db.models.rate_limit_bucket import RateLimitBucket
+
+        with get_sync_db_session() as session:
+            row = session.execute(
+                select(RateLimitBucket).where(RateLimitBucket.name == name).with_for_update()
+            ).scalar_one_or_none()
+
+            now = time.time()
+            if row is None:
+                row = RateLimitBucket(name=name)
+                state = BucketState.full(config, now)
+                session.add(row)
+            else:
+                state = BucketState(row.requests, row.tokens, row.updated_at, row.rate_factor, row.blocked_until)
+
+            result = operation(state, config, now, *args)
+
+            row.requests = state.requests
+            row.tokens = state.tokens
+            row.updated_at = state.updated_at
+            row.rate_factor = state.rate_factor
+            row.blocked_until = state.blocked_until
+            session.commit()
+            return result
+
+
+class RateLimiter:
+    def __init__(self, backend, config: RateLimitConfig, name: str = "gemini"):
+        self.backend = backend
+        self.config = config
+        self.name = name
+
+    async def _apply(self, operation, *args):
+        return await asyncio.to_thread(self.backend.apply, self.name, self.config, operation, *args)
+
+    async def acquire(self, estimated_tokens: float) -> None:
+        """Espera hasta que haya presupuesto para una llamada de `estimated_tokens`"""
+        while True:
+            wait = await self._apply(take, estimated_tokens)
+            if wait <= 0:
+                return
+            await asyncio.sleep(min(wait, MAX_SLEEP_SECONDS))
+
+    async def report_throttled(self) -> None:
+        logger.warning(f"Rate limit '{self.name}': 429 recibido, reduciendo la tasa")
+        await self._apply(throttle)
+
+    async def report_success(self, estimated_tokens: float, actual_tokens: Optional[float]) -> None:
+        delta = (actual_tokens - estimated_tokens) if actual_tokens is not None else 0.0
+        await self._apply(settle, delta)
+
+
+def build_rate_limiter(backend: str, requests_per_minute: float, tokens_per_minute: float, path: Path) -> RateLimiter:
+    """Construye el rate limiter según la configuración (`gemini_rate_limiter`)"""
+    config = RateLimitConfig(requests_per_minute=requests_per_minute, tokens_per_minute=tokens_per_minute)
+
+    if backend == "db":
+        return RateLimiter(DatabaseBackend(), config)
+    if backend == "memory":
+        return RateLimiter(MemoryBackend(), config)
+    if backend == "sqlite":
+        return RateLimiter(SQLiteBackend(path), config)
+
+    raise ValueError(f"Backend de rate limit desconocido: {backend}")
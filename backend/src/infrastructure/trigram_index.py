@@ -0,0 +1,84 @@
+"""
+Índice invertido de trigramas para búsqueda difusa de nombres (tolera typos,
+tildes y mayúsculas: "comercial penalolen" encuentra "Comercial Peñalolén SpA").
+
+Los textos se normalizan con `fold_text` y cada palabra se rellena como en
+pg_trgm ("  pena" ... "en "), así los trigramas de inicio y fin de palabra
+pesan. El puntaje es la fracción de trigramas de la consulta presentes en el
+nombre (la consulta puede ser solo una parte del nombre); a igual puntaje
+gana el nombre más parecido en largo (Jaccard).
+"""
+from collections import Counter
+from typing import Hashable, Optional
+
+from src.utils.text import fold_text
+
+
+
+def trigrams(value: str) -> frozenset[str]:
+    grams = set()
+    for word in fold_text(value).split(" "):
+        if not word:
+            continue
+        padded = f"  {word} "
+        grams.update(padded[index:index + 3] for index in range(len(padded) - 2))
+    return frozenset(grams)
+
+
+class TrigramIndex:
+    def __init__(self, max_posting_share: float = 0.5):
+        # Trigramas presentes en más de esta fracción de las entradas no
+        # discriminan ("sa ", "spa"): no se recorren, pero sí cuentan en el puntaje
+        self.max_posting_share = max_posting_share
+        self._postings: dict[str, set[Hashable]] = {}
+        self._grams: dict[Hashable, frozenset[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._grams)
+
+    def add(self, key: Hashable, value: Optional[str]) -> None:
+        """Agrega o reemplaza el texto indexado para `key`"""
+        self.remove(key)
+        grams = trigrams(value or "")
+        if not grams:
+            return
+        self._grams[key] = grams
+        for gram in grams:
+            self._postings.setdefault(gram, set()).add(key)
+
+    def remove(self, key: Hashable) -> None:
+        for gram in self._grams.pop(key, ()):
+            posting = self._postings.get(gram)
+            if posting is not None:
+                posting.discard(key)
+                if not posting:
+                    del self._postings[gram]
+
+    def search(self, query: str, limit: Optional[int] = 10, min_score: float = 0.5) -> list[tuple[Hashable, float]]:
+        """(key, puntaje) ordenados de mejor a peor, con puntaje >= `min_score` (todos con `limit=None`)"""
+        query_grams = trigrams(query)
+        if not query_grams:
+            return []
+
+        max_posting = max(1, int(len(self._grams) * self.max_posting_share))
+        selective = {gram for gram in query_grams if len(self._postings.get(gram, ())) <= max_posting}
+        if not selective:
+            selective = set(query_grams)
+
+        shared = Counter()
+        for gram in selective:
+            shared.update(self._postings.get(gram, ()))
+
+        # Los trigramas frecuentes omitidos se suman al comparar cada candidato
+        common = [gram for gram in query_grams if gram not in selective]
+        results = []
+        for key, count in shared.items():
+            grams = self._grams[key]
+            count += sum(1 for gram in common if gram in grams)
+            score = count / len(query_grams)
+            if score >= min_score:
+                jaccard = count / (len(query_grams) + len(grams) - count)
+                results.append((key, score, jaccard))
+
+        results.sort(key=lambda item: (item[1], item[2]), reverse=True)
+        return [(key, round(score, 4)) for key, score, _ in results[:limit]]
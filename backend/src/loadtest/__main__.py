@@ -0,0 +1,81 @@
+"""
+Prueba de carga en proceso, sin Gemini ni documentos reales:
+
+    python -m src.loadtest
+    python -m src.loadtest --users 32 --requests 2000 --latency-ms 1500 --failure-rate 0.05
+    python -m src.loadtest --mix upload=1,list=4,search=4,download=1 --json reporte.json
+
+La app usa SQLite en memoria y un directorio temporal de subidas; el resto de
+la configuración (admisión, compresión, duplicados...) se toma del entorno
+como en producción, así que se puede medir el efecto de cada ajuste.
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+
+# Antes de importar la app: la configuración se lee al importar
+LOADTEST_ENV = {
+    "DATABASE_BACKEND": "sqlite",
+    "SQLITE_PATH": ":memory:",
+    "GEMINI_API_KEY": "",  # sin analizador real; se usa StubAnalyzer
+    "GEMINI_RATE_LIMITER": "memory",
+    "ANALYSIS_MODE": "inline",
+}
+REQUIRED_DEFAULTS = {
+    "ENVIRONMENT": "loadtest",
+    "URL_DOMAIN": "loadtest",
+    "SECRET_KEY": "loadtest",
+    "HASH_ALGORITHM": "HS256",
+    "ACCESS_TOKEN_EXPIRE_MINUTES": "30",
+    "GEMINI_MODEL": "stub",
+}
+
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Prueba de carga en proceso con corpus sintético")
+    parser.add_argument("--users", type=int, default=16, help="clientes concurrentes")
+    parser.add_argument("--requests", type=int, default=500, help="operaciones en total")
+    parser.add_argument("--mix", default=None, help="pesos por escenario, ej: upload=2,list=3,search=3,download=2")
+    parser.add_argument("--corpus", type=int, default=60, help="documentos sintéticos a generar")
+    parser.add_argument("--warmup", type=int, default=20, help="subidas previas, fuera del reporte")
+    parser.add_argument("--latency-ms", type=float, default=800, help="latencia media del analizador simulado")
+    parser.add_argument("--jitter-ms", type=float, default=400, help="variación (uniforme) de esa latencia")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="proporción de análisis que fallan")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", dest="json_path", default=None, help="guarda además el reporte en JSON")
+    return parser.parse_args()
+
+
+async def main(args: argparse.Namespace) -> None:
+    from src.loadtest.corpus import generate_corpus
+    from src.loadtest.runner import format_report, parse_mix, run_load_test
+    from src.loadtest.stub_analyzer import StubAnalyzer
+
+    corpus = generate_corpus(args.corpus, seed=args.seed)
+    analyzer = StubAnalyzer(
+        corpus, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, failure_rate=args.failure_rate, seed=args.seed
+    )
+    report = await run_load_test(
+        corpus, analyzer,
+        users=args.users,
+        requests=args.requests,
+        mix=parse_mix(args.mix) if args.mix else None,
+        warmup=args.warmup,
+        seed=args.seed,
+    )
+    print(format_report(report))
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as file:
+            json.dump(report, file, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    with tempfile.TemporaryDirectory(prefix="nolandocs-loadtest-") as upload_dir:
+        os.environ.update(LOADTEST_ENV, UPLOAD_DIR=upload_dir)
+        for key, value in REQUIRED_DEFAULTS.items():
+            os.environ.setdefault(key, value)
+        asyncio.run(main(args))
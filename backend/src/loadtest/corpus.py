@@ -0,0 +1,190 @@
+"""
+Corpus sintético de facturas y boletas chilenas (Faker es_CL) para las
+pruebas de carga: ningún documento de clientes sale del entorno.
+
+Cada `SyntheticDocument` trae el archivo ya serializado (PDF con capa de
+texto, PNG o texto plano) y los datos con que se generó, que el analizador
+simulado devuelve como si los hubiera extraído.
+"""
+import io
+import random
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+
+from faker import Faker
+from PIL import Image, ImageDraw, ImageFont
+
+from src.infrastructure.db.models.enums import AIMetadataResponse, DocumentType
+from src.utils.rut import format_rut, normalize_rut
+
+
+
+IVA_RATE = 0.19
+FORMATS = ("pdf", "png", "txt")
+KINDS = {
+    DocumentType.FACTURA: ("FACTURA ELECTRONICA", "33"),
+    DocumentType.BOLETA: ("BOLETA ELECTRONICA", "39"),
+}
+PAGE_WIDTH, PAGE_HEIGHT = 612, 792  # carta, en puntos
+LINE_HEIGHT = 14
+
+
+@dataclass
+class SyntheticDocument:
+    filename: str
+    content: bytes
+    document_type: DocumentType
+    folio: str
+    issue_date: date
+    issuer: dict
+    client: dict
+    net: int
+    tax: int
+    total: int
+    lines: list[str] = field(default_factory=list)
+    tags: list[str] = field(default_factory=list)
+
+    def to_ai_response(self) -> AIMetadataResponse:
+        label = KINDS[self.document_type][0].lower()
+        return AIMetadataResponse(
+            document_type=self.document_type,
+            confidence_score=0.95,
+            document_number=self.folio,
+            document_date=self.issue_date.isoformat(),
+            due_date=(self.issue_date + timedelta(days=30)).isoformat() if self.document_type == DocumentType.FACTURA else None,
+            issuer=self.issuer,
+            client=self.client,
+            amounts={"total": float(self.total), "net": float(self.net), "tax": float(self.tax), "other_taxes": 0.0},
+            description=f"{label.capitalize()} N° {self.folio} de {self.issuer['name']}",
+            tags=self.tags,
+            accounting_period=self.issue_date.strftime("%Y-%m"),
+            extracted_text="\n".join(self.lines),
+            key_data={"folio": self.folio},
+        )
+
+
+def _party(fake: Faker) -> dict:
+    return {"name": fake.company(), "rut": normalize_rut(fake.rut()), "address": fake.address().replace("\n", ", ")}
+
+
+def _document_lines(fake: Faker, document_type: DocumentType, folio: str, issue_date: date,
+                    issuer: dict, client: dict, items: list[tuple[str, int, int]], net: int, tax: int, total: int) -> list[str]:
+    title, code = KINDS[document_type]
+    lines = [
+        issuer["name"],
+        f"R.U.T.: {format_rut(issuer['rut'])}",
+        issuer["address"],
+        f"{title} N° {folio}",
+        f"S.I.I. - {fake.city().upper()}",
+        f"Fecha Emision: {issue_date.strftime('%d-%m-%Y')}",
+        f"Señor(es): {client['name']}",
+        f"R.U.T.: {format_rut(client['rut'])}",
+        f"Direccion: {client['address']}",
+        "",
+        "Detalle:",
+    ]
+    lines += [f"  {quantity} x {name} ${price * quantity:,}".replace(",", ".") for name, quantity, price in items]
+    lines += [
+        "",
+        f"MONTO NETO $ {net:,}".replace(",", "."),
+        f"I.V.A. 19% $ {tax:,}".replace(",", "."),
+        f"TOTAL $ {total:,}".replace(",", "."),
+        f"Timbre Electronico SII - Res. {code}",
+    ]
+    return lines
+
+
+def _pdf_escape(line: str) -> bytes:
+    encoded = line.encode("cp1252", errors="replace")
+    return encoded.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)")
+
+
+def render_pdf(lines: list[str]) -> bytes:
+    """PDF de una página con capa de texto (Helvetica, WinAnsi), sin dependencias extra"""
+    stream = b"BT /F1 10 Tf %d TL 50 %d Td " % (LINE_HEIGHT, PAGE_HEIGHT - 60)
+    stream += b"".join(b"(" + _pdf_escape(line) + b") Tj T* " for line in lines) + b"ET"
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] /Contents 4 0 R "
+        b"/Resources << /Font << /F1 5 0 R >> >> >>" % (PAGE_WIDTH, PAGE_HEIGHT),
+        b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+    ]
+
+    output = io.BytesIO()
+    output.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(output.tell())
+        output.write(b"%d 0 obj\n" % number + body + b"\nendobj\n")
+    xref = output.tell()
+    output.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    output.write(b"".join(b"%010d 00000 n \n" % offset for offset in offsets))
+    output.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref))
+    return output.getvalue()
+
+
+def render_image(lines: list[str], rng: random.Random) -> bytes:
+    """PNG tipo documento escaneado: texto sobre blanco, con logo y márgenes variables
+    (páginas de texto casi iguales tendrían el mismo dHash y se tomarían por duplicados)"""
+    font_size = rng.randint(14, 22)
+    margin = rng.randint(20, 120)
+    logo = (rng.randint(80, 300), rng.randint(60, 160))
+    width = rng.randint(800, 1100)
+    top = margin + logo[1] + 20
+    image = Image.new("L", (width, top + int(font_size * 1.6) * len(lines) + margin), color=255)
+    draw = ImageDraw.Draw(image)
+    logo_x = rng.choice([margin, width - margin - logo[0]])
+    draw.rectangle((logo_x, margin, logo_x + logo[0], margin + logo[1]), fill=rng.randint(0, 200))
+    # Recuadros (detalle, totales, timbre) en posiciones y tonos al azar
+    for _ in range(rng.randint(2, 4)):
+        x, y = rng.randint(0, width - 100), rng.randint(top, image.height - 60)
+        draw.rectangle((x, y, x + rng.randint(100, width // 2), y + rng.randint(40, 200)), fill=rng.randint(120, 235))
+    font = ImageFont.load_default(size=font_size)
+    for index, line in enumerate(lines):
+        draw.text((margin, top + index * int(font_size * 1.6)), line, fill=0, font=font)
+    output = io.BytesIO()
+    image.save(output, format="PNG", optimize=True)
+    return output.getvalue()
+
+
+def generate_document(fake: Faker, rng: random.Random, index: int, file_format: str) -> SyntheticDocument:
+    document_type = rng.choice(list(KINDS))
+    issuer, client = _party(fake), _party(fake)
+    folio = str(rng.randint(1, 999_999))
+    issue_date = fake.date_between(start_date="-2y", end_date="today")
+
+    items = [(fake.bs().capitalize(), rng.randint(1, 10), rng.randint(1, 500) * 100) for _ in range(rng.randint(1, 8))]
+    net = sum(quantity * price for _, quantity, price in items)
+    tax = round(net * IVA_RATE)
+    lines = _document_lines(fake, document_type, folio, issue_date, issuer, client, items, net, tax, net + tax)
+
+    if file_format == "png":
+        content = render_image(lines, rng)
+    elif file_format == "pdf":
+        content = render_pdf(lines)
+    else:
+        content = "\n".join(lines).encode("utf-8")
+    return SyntheticDocument(
+        filename=f"{document_type.value}_{index:05d}_{folio}.{file_format}",
+        content=content,
+        document_type=document_type,
+        folio=folio,
+        issue_date=issue_date,
+        issuer=issuer,
+        client=client,
+        net=net,
+        tax=tax,
+        total=net + tax,
+        lines=lines,
+        tags=[document_type.value, issue_date.strftime("%Y"), fake.word()],
+    )
+
+
+def generate_corpus(size: int, seed: int = 0, formats: tuple[str, ...] = FORMATS) -> list[SyntheticDocument]:
+    """Corpus reproducible: la misma semilla genera los mismos documentos"""
+    fake = Faker("es_CL")
+    fake.seed_instance(seed)
+    rng = random.Random(seed)
+    return [generate_document(fake, rng, index, formats[index % len(formats)]) for index in range(size)]
@@ -0,0 +1,100 @@
+"""
+Comprobación en proceso del ruteo a la réplica de lectura (ver infrastructure/db/replica.py):
+
+    python -m src.loadtest.replica_check
+
+Levanta la app con SQLite en archivos temporales: la primaria y, como réplica,
+una copia tomada antes de escribir (una réplica atrasada). Verifica que:
+
+1. un GET lee de la réplica,
+2. tras una escritura el mismo cliente queda fijado a la primaria y ve su cambio,
+3. otro cliente sigue leyendo de la réplica (sin el cambio todavía),
+4. la cookie del pin basta para leer de la primaria aunque el proceso no
+   recuerde la escritura (se simula con otra IP que trae esa cookie).
+
+Sale con código 1 si alguna verificación falla.
+"""
+import asyncio
+import os
+import sqlite3
+import sys
+import tempfile
+from pathlib import Path
+
+from src.loadtest.__main__ import REQUIRED_DEFAULTS
+
+BASE_URL = "http://replica-check"
+
+
+
+async def check(primary_path: Path, replica_path: Path) -> list[str]:
+    """Errores encontrados (vacío si el ruteo se comporta como se espera)"""
+    import httpx
+    from sqlalchemy import create_engine
+
+    from src.infrastructure.db.models.base import BaseModel
+    from src.infrastructure.metrics import metrics
+    from src.main import app
+
+    BaseModel.metadata.create_all(create_engine(f"sqlite:///{primary_path}"))
+    with sqlite3.connect(primary_path) as primary, sqlite3.connect(replica_path) as replica:
+        primary.backup(replica)
+
+    def client(address: str) -> httpx.AsyncClient:
+        return httpx.AsyncClient(transport=httpx.ASGITransport(app=app, client=(address, 40000)), base_url=BASE_URL)
+
+    def routed(**labels: str) -> float:
+        return metrics.count("db_route", **labels)
+
+    errors = []
+    async with app.lifespan(), client("10.0.0.1") as writer, client("10.0.0.2") as reader:
+        metrics.reset()
+        await writer.get("/files")
+        if routed(route="replica", reason="read") != 1:
+            errors.append("GET /files no leyó de la réplica")
+
+        response = await writer.post("/upload", files={"data": ("replica.txt", b"comprobacion de replica")})
+        if response.status_code >= 400:
+            return errors + [f"POST /upload respondió {response.status_code}"]
+        file_id = response.json()["file_id"]
+
+        metrics.reset()
+        own = [file["id"] for file in (await writer.get("/files")).json()]
+        if routed(route="primary", reason="pinned") != 1:
+            errors.append("Tras escribir, el cliente no quedó fijado a la primaria")
+        if file_id not in own:
+            errors.append("El cliente que escribió no ve su propio archivo")
+
+        others = [file["id"] for file in (await reader.get("/files")).json()]
+        if routed(route="replica", reason="read") != 1:
+            errors.append("Otro cliente dejó de leer de la réplica")
+        if file_id in others:
+            errors.append("La réplica (copia anterior) muestra el archivo nuevo: el GET no pasó por ella")
+
+        metrics.reset()
+        async with client("10.0.0.3") as other_process:
+            other_process.cookies = writer.cookies
+            carried = [file["id"] for file in (await other_process.get("/files")).json()]
+        if routed(route="primary", reason="pinned") != 1 or file_id not in carried:
+            errors.append("La cookie del pin no fijó la lectura a la primaria")
+    return errors
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory(prefix="nolandocs-replica-check-") as directory:
+        directory = Path(directory)
+        os.environ.update(
+            DATABASE_BACKEND="sqlite",
+            SQLITE_PATH=str(directory / "primary.sqlite3"),
+            SQLITE_REPLICA_PATH=str(directory / "replica.sqlite3"),
+            GEMINI_API_KEY="",  # solo se prueba el ruteo, sin análisis
+            UPLOAD_DIR=str(directory / "uploads"),
+        )
+        for key, value in REQUIRED_DEFAULTS.items():
+            os.environ.setdefault(key, value)
+
+        errors = asyncio.run(check(directory / "primary.sqlite3", directory / "replica.sqlite3"))
+        for error in errors:
+            print(f"FALLA: {error}")
+        print("Ruteo a la réplica OK" if not errors else f"{len(errors)} verificaciones fallidas")
+        sys.exit(1 if errors else 0)
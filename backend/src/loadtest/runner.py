@@ -0,0 +1,208 @@
+"""
+Escenarios y reporte de la prueba de carga. La app corre en el mismo proceso
+(httpx sobre ASGITransport, con el lifespan de Litestar) y el análisis lo hace
+`StubAnalyzer`; ver `python -m src.loadtest --help`.
+"""
+import asyncio
+import random
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Optional
+
+import httpx
+
+from src import gemini_service
+from src.application.document.services.analysis_stats_service import percentile
+from src.loadtest.corpus import SyntheticDocument
+from src.loadtest.stub_analyzer import StubAnalyzer
+from src.main import app
+
+BASE_URL = "http://loadtest"
+DEFAULT_MIX = {"upload": 2, "list": 3, "search": 3, "download": 2}
+
+
+
+@dataclass
+class LoadState:
+    corpus: list[SyntheticDocument]
+    rng: random.Random
+    file_ids: list[int] = field(default_factory=list)
+    analysis_statuses: dict[str, int] = field(default_factory=lambda: defaultdict(int))
+    next_document: int = 0
+
+    def take_document(self) -> SyntheticDocument:
+        document = self.corpus[self.next_document % len(self.corpus)]
+        self.next_document += 1
+        return document
+
+
+@dataclass
+class Sample:
+    endpoint: str
+    status: int
+    latency_ms: float
+
+
+Scenario = Callable[[httpx.AsyncClient, LoadState], Awaitable[tuple[str, httpx.Response]]]
+
+
+async def upload(client: httpx.AsyncClient, state: LoadState) -> tuple[str, httpx.Response]:
+    document = state.take_document()
+    response = await client.post(
+        "/upload",
+        files={"data": (document.filename, document.content)},
+        data={"description": f"Carga sintética {document.folio}"},
+    )
+    if response.status_code < 400:
+        body = response.json()
+        state.file_ids.append(body["file_id"])
+        state.analysis_statuses[body["analysis_status"]] += 1
+    return "POST /upload", response
+
+
+async def list_files(client: httpx.AsyncClient, state: LoadState) -> tuple[str, httpx.Response]:
+    # Primera página la mayoría de las veces; a veces una página más antigua (scroll)
+    params = {"limit": 50}
+    if state.file_ids and state.rng.random() < 0.3:
+        params["before"] = state.rng.choice(state.file_ids)
+    return "GET /files/rows", await client.get("/files/rows", params=params)
+
+
+async def search(client: httpx.AsyncClient, state: LoadState) -> tuple[str, httpx.Response]:
+    document = state.rng.choice(state.corpus)
+    params = state.rng.choice([
+        {"query": document.folio},
+        {"company": document.issuer["name"].split()[0]},
+        {"rut": document.issuer["rut"]},
+        {"document_type": document.document_type.value, "date_from": document.issue_date.isoformat()},
+        {"tags": ",".join(document.tags[:2])},
+        {"min_amount": document.total // 2, "max_amount": document.total * 2},
+    ])
+    return "GET /search", await client.get("/search", params=params)
+
+
+async def download(client: httpx.AsyncClient, state: LoadState) -> tuple[str, httpx.Response]:
+    if not state.file_ids:
+        return await upload(client, state)
+    file_id = state.rng.choice(state.file_ids)
+    return "GET /files/{id}/download", await client.get(f"/files/{file_id}/download")
+
+
+SCENARIOS: dict[str, Scenario] = {"upload": upload, "list": list_files, "search": search, "download": download}
+
+
+def parse_mix(value: str) -> dict[str, float]:
+    """Pesos por escenario, ej: upload=2,list=3,search=3,download=2"""
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in SCENARIOS:
+            raise ValueError(f"Escenario desconocido: {name} (disponibles: {', '.join(SCENARIOS)})")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+def summarize(samples: list[Sample], elapsed_seconds: float) -> list[dict]:
+    """Por endpoint: requests, errores, throughput y percentiles de latencia"""
+    by_endpoint = defaultdict(list)
+    for sample in samples:
+        by_endpoint[sample.endpoint].append(sample)
+
+    summary = []
+    for endpoint, endpoint_samples in sorted(by_endpoint.items()):
+        latencies = sorted(sample.latency_ms for sample in endpoint_samples)
+        statuses = defaultdict(int)
+        for sample in endpoint_samples:
+            statuses[sample.status] += 1
+        summary.append({
+            "endpoint": endpoint,
+            "requests": len(endpoint_samples),
+            "errors": sum(count for status, count in statuses.items() if status >= 400),
+            "statuses": dict(sorted(statuses.items())),
+            "rps": round(len(endpoint_samples) / elapsed_seconds, 2) if elapsed_seconds else 0.0,
+            "p50_ms": round(percentile(latencies, 0.50), 1),
+            "p95_ms": round(percentile(latencies, 0.95), 1),
+            "p99_ms": round(percentile(latencies, 0.99), 1),
+            "max_ms": round(latencies[-1], 1),
+        })
+    return summary
+
+
+def format_report(report: dict) -> str:
+    header = f"{'endpoint':<26}{'reqs':>7}{'err':>6}{'req/s':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}"
+    lines = [header, "-" * len(header)]
+    for row in report["endpoints"]:
+        lines.append(
+            f"{row['endpoint']:<26}{row['requests']:>7}{row['errors']:>6}{row['rps']:>9.2f}"
+            f"{row['p50_ms']:>9.1f}{row['p95_ms']:>9.1f}{row['p99_ms']:>9.1f}{row['max_ms']:>9.1f}"
+        )
+    lines.append("-" * len(header))
+    lines.append(
+        f"{report['requests']} requests en {report['elapsed_seconds']:.1f} s ({report['rps']:.2f} req/s), "
+        f"{report['users']} usuarios; análisis simulados: {report['analysis']['calls']} "
+        f"({report['analysis']['failures']} fallidos)"
+    )
+    lines.append("Subidas por resultado: " + ", ".join(
+        f"{status}={count}" for status, count in sorted(report["uploads"].items())
+    ))
+    return "\n".join(lines)
+
+
+async def run_load_test(
+    corpus: list[SyntheticDocument],
+    analyzer: StubAnalyzer,
+    users: int,
+    requests: int,
+    mix: Optional[dict[str, float]] = None,
+    warmup: int = 20,
+    seed: int = 0,
+) -> dict:
+    """Corre `requests` operaciones repartidas entre `users` clientes concurrentes"""
+    mix = mix or DEFAULT_MIX
+    state = LoadState(corpus=corpus, rng=random.Random(seed))
+    names, weights = list(mix), list(mix.values())
+    samples: list[Sample] = []
+    remaining = requests
+    gemini_service.gemini_analyzer = analyzer
+
+    async def run_user(client: httpx.AsyncClient) -> None:
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            scenario = SCENARIOS[state.rng.choices(names, weights)[0]]
+            started = time.perf_counter()
+            endpoint, response = await scenario(client, state)
+            samples.append(Sample(endpoint, response.status_code, (time.perf_counter() - started) * 1000))
+
+    # Cada usuario con su IP: los límites por cliente de la admisión aplican como en producción
+    clients = [
+        httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app, client=(f"10.0.{index // 250}.{index % 250 + 1}", 40000)),
+            base_url=BASE_URL,
+            timeout=None,
+        )
+        for index in range(users)
+    ]
+    async with app.lifespan():
+        try:
+            # Documentos iniciales para que haya qué listar, buscar y descargar (fuera del reporte)
+            for _ in range(min(warmup, len(corpus))):
+                await upload(clients[0], state)
+
+            started = time.perf_counter()
+            await asyncio.gather(*(run_user(client) for client in clients))
+            elapsed = time.perf_counter() - started
+        finally:
+            for client in clients:
+                await client.aclose()
+
+    return {
+        "users": users,
+        "requests": len(samples),
+        "elapsed_seconds": round(elapsed, 3),
+        "rps": round(len(samples) / elapsed, 2) if elapsed else 0.0,
+        "analysis": {"calls": analyzer.calls, "failures": analyzer.failures},
+        "uploads": dict(state.analysis_statuses),  # analysis_status de /upload (incluye el warmup)
+        "endpoints": summarize(samples, elapsed),
+    }
@@ -0,0 +1,55 @@
+"""
+Analizador simulado para las pruebas de carga: misma interfaz que
+`GeminiDocumentAnalyzer.analyze_document`, sin llamar a la API.
+
+Espera una latencia aleatoria (media ± jitter) y falla con la probabilidad
+configurada devolviendo None, como el analizador real. Los documentos del
+corpus se "extraen" con los datos con que se generaron.
+"""
+import asyncio
+import random
+from typing import Optional
+
+from src.infrastructure.analysis_ledger import record_model_call
+from src.infrastructure.db.models.enums import AIMetadataResponse, DocumentType
+from src.infrastructure.events import AnalysisStage, report_stage
+from src.loadtest.corpus import SyntheticDocument
+
+STUB_MODEL = "stub"
+
+
+
+class StubAnalyzer:
+    def __init__(self, corpus: list[SyntheticDocument], latency_ms: float = 800, jitter_ms: float = 400,
+                 failure_rate: float = 0.0, seed: int = 0):
+        self.documents = {document.filename: document for document in corpus}
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.failure_rate = failure_rate
+        self.rng = random.Random(seed)
+        self.calls = 0
+        self.failures = 0
+
+    async def analyze_document(
+        self, file_path: str, original_filename: str, compression: Optional[str] = None
+    ) -> Optional[AIMetadataResponse]:
+        report_stage(AnalysisStage.CALLING_MODEL)
+        self.calls += 1
+        delay = max(0.0, self.latency_ms + self.rng.uniform(-self.jitter_ms, self.jitter_ms))
+        await asyncio.sleep(delay / 1000)
+        record_model_call(STUB_MODEL, original_filename)
+
+        if self.rng.random() < self.failure_rate:
+            self.failures += 1
+            return None
+
+        document = self.documents.get(original_filename)
+        if document is None:
+            return AIMetadataResponse(
+                document_type=DocumentType.OTROS,
+                confidence_score=0.5,
+                description=f"Documento {original_filename}",
+                extracted_text="",
+                requires_review=True,
+            )
+        return document.to_ai_response()
@@ -1,16 +1,22 @@
+import asyncio
 import secrets
+from contextlib import AsyncExitStack
+from datetime import date, datetime, timedelta
 from pathlib import Path
 from typing import Optional
+from urllib.parse import quote
 
 from litestar import Litestar, get, post, delete as litestar_delete, patch
 from litestar.params import Body
 from litestar.response import Template
-from litestar.datastructures import UploadFile
+from litestar.datastructures import ETag, UploadFile
 from litestar.enums import RequestEncodingType
 from litestar.plugins.sqlalchemy import SQLAlchemyPlugin
+from litestar.plugins.htmx import HTMXPlugin, HTMXRequest
 from litestar.di import Provide
 from litestar.exceptions import HTTPException, NotFoundException
-from litestar.response import File as FileResponse
+from litestar.response import File as FileResponse, Response, Stream, ServerSentEvent, ServerSentEventMessage
+from litestar import Request
 from litestar import MediaType
 
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -22,19 +28,59 @@ from pydantic import BaseModel
 
 from src.core.config.settings import env_vars
 from src.core.config.logging import logging_config
-from src.core.config.constants import ROOT_PATH
 # from src.api.routes_v1 import routes
 from src.api.middlewares.auth import AuthMiddleware
+from src.api.middlewares.admission import AdmissionMiddleware, release_upload_slot
+from src.api.middlewares.read_your_writes import ReadYourWritesMiddleware
+from src.api.routes_v1.health import health_check
 from src.api.templates import template_config, static_files
 from src.infrastructure.db.models.file import File
 from src.infrastructure.db.config import config_db
 
 # Importar nuevos modelos y servicios
-from src.infrastructure.db.models.enums import DocumentMetadata, ai_response_to_db_metadata, MetadataResponse
+from src.infrastructure.db.models.enums import DocumentMetadata, MetadataResponse
+from src.infrastructure.db.models.document_extraction import DocumentExtraction, EXTRACTION_FIELDS
+from src.infrastructure.db.repositories.document_repository import (
+    DocumentPartition, DocumentSearchFilters, apply_partition, files_with_metadata_query, tag_facets_query,
+)
+from src.infrastructure.db.repositories.analysis_job_repository import AnalysisJobRepository
+from src.infrastructure.db.repositories.archive_repository import ArchiveRepository
+from src.infrastructure.db.repositories.counterparty_repository import CounterpartyRepository
+from src.infrastructure.db.models.analysis_job import AnalysisJob
+from src.api.dependencies.search import provide_search_filters
+from src.api.dependencies.db import provide_db
+from src.api.dependencies.partition import provide_partition
+from src.application.document.services.analysis_stats_service import analysis_run_stats
+from src.application.document.services.archive_service import rehydrate_file
+from src.application.document.services.metadata_service import (
+    save_analysis_result, save_duplicate_result, delete_metadata
+)
+from src.application.document.services.duplicate_service import compute_file_fingerprint, find_duplicate
+from src.infrastructure.db.repositories.fingerprint_repository import FingerprintRepository
+from src.application.document.services.counterparty_directory import counterparty_directory
+from src.application.document.services.export_service import stream_export, EXPORT_FORMATS
+from src.infrastructure.process_pool import shutdown_process_pool
+from src.infrastructure.previews import (
+    PREVIEW_SIZES, preview_path, supports_preview, schedule_previews, generate_previews, delete_previews
+)
+from src.infrastructure.events import AnalysisStage, analysis_progress, progress_broker
+from src.infrastructure.metrics import metrics
+from src.infrastructure.model_routing import route_hit_rates
+from src.infrastructure.admission import Overloaded, analysis_admission
+from src.infrastructure.analysis_ledger import track_analysis_run
+from src.infrastructure.db.replica import dispose_replica, read_session_factory
+from src.infrastructure.fragment_cache import file_list_cache, page_bounds
+from src.infrastructure.file_storage import ZSTD_ENCODING, accepts_zstd, stream_decompressed, write_upload
+from src.utils.rut import format_rut
+from src.utils.timing import now
 from src.gemini_service import get_gemini_analyzer, init_gemini_service
 
 
 
+FILE_ROWS_PAGE_SIZE = 50
+FILE_ROWS_MAX_PAGE_SIZE = 200
+SEARCH_FACETS_MAX_LIMIT = 200
+ANALYSIS_STATS_DEFAULT_DAYS = 30
 
 
 @get("/")
@@ -45,67 +91,120 @@ async def index() -> Template:
 
 @post("/upload")
 async def upload_file(
+    request: Request,
     db: AsyncSession,
+    partition: DocumentPartition,
     data: UploadFile = Body(media_type=RequestEncodingType.MULTI_PART),
     description: str = Body(media_type=RequestEncodingType.MULTI_PART, default=""),
 ) -> dict:
-    upload_dir = ROOT_PATH / "uploads"
-    upload_dir.mkdir(parents=True, exist_ok=True)
-
-    # Generar nombre aleatorio
-    random_name = secrets.token_hex(16) + Path(data.filename).suffix
-    file_location = upload_dir / random_name
-
-    # Leer el contenido UNA SOLA VEZ
-    content = await data.read()
-
-    # Escribir el contenido leído
-    with open(file_location, "wb") as f:
-        f.write(content)
-
-    # Guardar info básica del archivo en DB
-    new_file = File(
-        original_name=data.filename,
-        stored_name=random_name,
-        description=description,
-        size=len(content),
-        path=str(file_location)
-    )
-    db.add(new_file)
-    await db.commit()
-    await db.refresh(new_file)
-
-    # ✅ CAPTURAR EL ID INMEDIATAMENTE DESPUÉS DEL REFRESH
-    file_id = new_file.id
-
-    # Analizar archivo con IA (asíncrono para no bloquear la respuesta)
-    analysis_result = "processing"
     analyzer = get_gemini_analyzer()
-
-    if analyzer:
-        try:
-            # Analizar documento con Gemini
-            ai_response = await analyzer.analyze_document(
-                str(file_location),
-                data.filename
-            )
-
-            if ai_response:
-                # Convertir respuesta AI a modelo de BD
-                metadata = ai_response_to_db_metadata(ai_response, file_id)  # ✅ USAR VARIABLE LOCAL
-                db.add(metadata)
-                await db.commit()
-                await db.refresh(metadata)
-                analysis_result = "completed"
-            else:
+    analyze_inline = env_vars.analysis_mode != "queue" and analyzer is not None
+
+    async with AsyncExitStack() as analysis_slot:
+        if analyze_inline:
+            # Cupo de análisis inline por proceso (el modelo es el recurso escaso). Se pide antes
+            # de guardar: sin worker que procese la cola, un archivo guardado sin cupo quedaría sin analizar
+            try:
+                await analysis_slot.enter_async_context(analysis_admission.admit())
+            except Overloaded as e:
+                raise HTTPException(
+                    status_code=503,
+                    detail="Análisis saturado, intenta más tarde",
+                    headers={"Retry-After": str(e.retry_after)},
+                )
+
+        upload_dir = Path(env_vars.upload_dir)
+        upload_dir.mkdir(parents=True, exist_ok=True)
+
+        # Generar nombre aleatorio
+        random_name = secrets.token_hex(16) + Path(data.filename).suffix
+        file_location = upload_dir / random_name
+
+        # Leer el contenido UNA SOLA VEZ
+        content = await data.read()
+
+        # Escribir el contenido leído (comprimido con zstd si está activo y conviene)
+        stored = await asyncio.to_thread(write_upload, file_location, content, data.filename)
+        file_location = stored.path
+
+        # Miniaturas en segundo plano (pool de procesos), en paralelo al análisis
+        schedule_previews(str(file_location), data.filename, stored.compression)
+
+        # Guardar info básica del archivo en DB
+        new_file = File(
+            original_name=data.filename,
+            stored_name=file_location.name,
+            description=description,
+            size=len(content),
+            path=str(file_location),
+            stored_size=stored.stored_size,
+            compression=stored.compression,
+            owner_id=partition.owner_id,  # el admin también: sus subidas no quedan sin dueño
+        )
+        db.add(new_file)
+        await db.commit()
+        await db.refresh(new_file)
+
+        # ✅ CAPTURAR EL ID INMEDIATAMENTE DESPUÉS DEL REFRESH
+        file_id = new_file.id
+        file_list_cache.invalidate(file_id)
+
+        # El archivo ya está guardado: el análisis no ocupa el cupo de subidas
+        release_upload_slot(request.scope)
+
+        # Analizar archivo con IA (asíncrono para no bloquear la respuesta)
+        analysis_result = "processing"
+
+        if env_vars.analysis_mode == "queue":
+            # Lo procesa un worker (python -m src.worker)
+            await AnalysisJobRepository(db).enqueue(file_id, max_attempts=env_vars.analysis_job_max_attempts)
+            await db.commit()
+            progress_broker.publish(file_id, AnalysisStage.QUEUED)
+            analysis_result = "queued"
+
+        elif analyze_inline:
+            progress_broker.publish(file_id, AnalysisStage.QUEUED)
+            try:
+                async with track_analysis_run(file_id, session=db) as run:
+                    # Casi duplicado de un documento ya analizado: se reutilizan sus metadatos
+                    fingerprint = await compute_file_fingerprint(str(file_location), data.filename, stored.compression)
+                    match = None
+                    if fingerprint:
+                        match = await find_duplicate(db, file_id, fingerprint, owner_id=partition.owner_id)
+                        await FingerprintRepository(db).save(file_id, fingerprint)
+
+                    duplicate = await save_duplicate_result(db, file_id, match) if match else None
+                    if duplicate:
+                        run.finish_duplicate(duplicate)
+                        analysis_result = "duplicate"
+                    else:
+                        # Confirmar la huella antes de llamar al modelo: no se retiene
+                        # la transacción (ni el turno de escritura en SQLite) durante el análisis
+                        await db.commit()
+                        # Analizar documento con Gemini
+                        with analysis_progress(file_id):
+                            ai_response = await analyzer.analyze_document(
+                                str(file_location),
+                                data.filename,
+                                compression=stored.compression,
+                            )
+                        run.finish(ai_response)
+
+                        if ai_response:
+                            # Guardar metadatos (y contrapartes) en BD
+                            await save_analysis_result(db, file_id, ai_response)  # ✅ USAR VARIABLE LOCAL
+                            analysis_result = "completed"
+                        else:
+                            analysis_result = "failed"
+
+            except Exception as e:
+                print(f"Error en análisis de IA: {str(e)}")
                 analysis_result = "failed"
 
-        except Exception as e:
-            print(f"Error en análisis de IA: {str(e)}")
-            analysis_result = "failed"
+            progress_broker.publish(file_id, AnalysisStage.FAILED if analysis_result == "failed" else AnalysisStage.DONE)
 
     return {
-        "message": f"Archivo '{data.filename}' guardado con nombre '{random_name}'",
+        "message": f"Archivo '{data.filename}' guardado con nombre '{file_location.name}'",
         "description": description,
         "file_id": file_id,  # ✅ USAR VARIABLE LOCAL
         "analysis_status": analysis_result
@@ -113,12 +212,10 @@ async def upload_file(
 
 
 @get("/files")
-async def get_files(db: AsyncSession) -> list[dict]:
-    """Obtiene todos los archivos con sus metadatos"""
+async def get_files(db: AsyncSession, partition: DocumentPartition) -> list[dict]:
+    """Obtiene todos los archivos (de la partición del usuario) con sus metadatos"""
     # Query join para obtener archivos y metadatos
-    query = select(File, DocumentMetadata).outerjoin(
-        DocumentMetadata, File.id == DocumentMetadata.file_id
-    )
+    query = files_with_metadata_query(partition=partition)
     result = await db.execute(query)
     files_with_metadata = result.all()
 
@@ -130,7 +227,9 @@ async def get_files(db: AsyncSession) -> list[dict]:
             "stored_name": file_row.stored_name,
             "description": file_row.description,
             "size": file_row.size,
+            "stored_size": file_row.stored_size if file_row.stored_size is not None else file_row.size,
             "path": file_row.path,
+            "archived": file_row.archived,
             "metadata": None
         }
 
@@ -148,7 +247,8 @@ async def get_files(db: AsyncSession) -> list[dict]:
                 "tags": metadata_row.tags,
                 "confidence_score": metadata_row.confidence_score,
                 "status": metadata_row.status,
-                "needs_review": metadata_row.needs_review
+                "needs_review": metadata_row.needs_review,
+                "duplicate_of_file_id": metadata_row.duplicate_of_file_id,
             }
 
         files_list.append(file_data)
@@ -156,11 +256,75 @@ async def get_files(db: AsyncSession) -> list[dict]:
     return files_list
 
 
+async def _get_owned_file(db: AsyncSession, file_id: int, partition: DocumentPartition) -> Optional[File]:
+    """El archivo si pertenece a la partición (en cualquier tier); de otro dueño se responde igual que si no existiera"""
+    statement = apply_partition(select(File).filter(File.id == file_id), partition.including_archived())
+    return (await db.execute(statement)).scalar_one_or_none()
+
+
+async def _ensure_hot(file: File) -> None:
+    """Si el archivo está en el tier frío, lo rehidrata (una sola vez) antes de leerlo"""
+    if not file.archived:
+        return
+    try:
+        await rehydrate_file(file.id)
+    except (FileNotFoundError, ValueError):
+        raise NotFoundException("No se pudo recuperar el archivo archivado")
+
+
+def _render_fragment(request: Request, template_name: str, **context) -> str:
+    return request.app.template_engine.get_template(template_name).render(**context)
+
+
+# Siempre de la primaria: una lectura atrasada de la réplica quedaría en la caché todo el TTL
+@get("/files/rows", media_type=MediaType.HTML, opt={"read_replica": False})
+async def get_file_rows(
+    request: HTMXRequest, db: AsyncSession, partition: DocumentPartition,
+    before: Optional[int] = None, limit: int = FILE_ROWS_PAGE_SIZE,
+) -> str:
+    """Página de la lista de archivos en HTML (HTMX), más recientes primero.
+
+    Paginación por cursor: `before` es el id de la última fila ya mostrada.
+    Las páginas se cachean hasta que cambie alguno de sus archivos.
+    """
+    limit = max(1, min(limit, FILE_ROWS_MAX_PAGE_SIZE))
+    cache_key = (*partition.cache_key, before, limit)
+    cached = file_list_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    statement = files_with_metadata_query(partition=partition).order_by(File.id.desc()).limit(limit + 1)
+    if before is not None:
+        statement = statement.where(File.id < before)
+    rows = (await db.execute(statement)).all()
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    html = _render_fragment(
+        request, "partials/file_rows.html",
+        rows=rows, limit=limit, first_page=before is None,
+        next_cursor=rows[-1][0].id if has_more else None,
+    )
+    file_list_cache.put(cache_key, html, *page_bounds([file.id for file, _ in rows], before, has_more))
+    return html
+
+
+@get("/files/{file_id:int}/row", media_type=MediaType.HTML)
+async def get_file_row(request: HTMXRequest, file_id: int, db: AsyncSession, partition: DocumentPartition) -> str:
+    """Una sola fila, para reemplazarla tras editar o agregarla tras subir"""
+    row = (await db.execute(
+        files_with_metadata_query(partition=partition.including_archived()).where(File.id == file_id)
+    )).first()
+    if not row:
+        raise NotFoundException("Archivo no encontrado")
+    file, metadata = row
+    return _render_fragment(request, "partials/file_row.html", file=file, metadata=metadata)
+
+
 @litestar_delete("/files/{file_id:int}", status_code=200)
-async def delete_file(file_id: int, db: AsyncSession) -> dict:
+async def delete_file(file_id: int, db: AsyncSession, partition: DocumentPartition) -> dict:
     """Elimina un archivo y sus metadatos"""
-    result = await db.execute(select(File).filter(File.id == file_id))
-    file = result.scalar_one_or_none()
+    file = await _get_owned_file(db, file_id, partition)
 
     if not file:
         raise HTTPException(status_code=404, detail="Archivo no encontrado")
@@ -170,15 +334,25 @@ async def delete_file(file_id: int, db: AsyncSession) -> dict:
         path = Path(file.path)
         if path.exists():
             path.unlink()
+        delete_previews(path)
     except Exception as e:
         pass
 
-    # Borrar metadatos asociados
-    await db.execute(delete(DocumentMetadata).filter(DocumentMetadata.file_id == file_id))
+    # Borrar metadatos asociados (extracción y tags incluidos)
+    await delete_metadata(db, file_id)
+    fingerprints = FingerprintRepository(db)
+    await fingerprints.delete(file_id)
+    await fingerprints.detach_duplicates_of(file_id)
+    await db.execute(delete(AnalysisJob).filter(AnalysisJob.file_id == file_id))
+    # Documento del tier frío: sale de su segmento (que se borra si era el último)
+    empty_segment = await ArchiveRepository(db).release(file_id) if file.archived else None
 
     # Borrar archivo de la base de datos
     await db.execute(delete(File).filter(File.id == file_id))
     await db.commit()
+    file_list_cache.invalidate(file_id)
+    if empty_segment:
+        Path(empty_segment).unlink(missing_ok=True)
 
     return {"message": f"Archivo con id {file_id} eliminado"}
 
@@ -190,10 +364,10 @@ class UpdateDescriptionRequest(BaseModel):
 async def update_file_description(
     db: AsyncSession,
     file_id: int,
+    partition: DocumentPartition,
     data: UpdateDescriptionRequest = Body(),
 ) -> dict:
-    result = await db.execute(select(File).filter(File.id == file_id))
-    file = result.scalar_one_or_none()
+    file = await _get_owned_file(db, file_id, partition)
     if not file:
         raise NotFoundException("Archivo no encontrado")
 
@@ -201,6 +375,7 @@ async def update_file_description(
     db.add(file)
     await db.commit()
     await db.refresh(file)
+    file_list_cache.invalidate(file_id)
 
     return {
         "message": f"Descripción del archivo con id {file_id} actualizada",
@@ -210,15 +385,86 @@ async def update_file_description(
 
 
 
+@get("/files/{file_id:int}/preview")
+async def get_file_preview(
+    file_id: int, db: AsyncSession, partition: DocumentPartition, request: Request, size: str = "thumb"
+) -> FileResponse | Response:
+    """Miniatura (size=thumb) o primera página (size=page) en WebP.
+
+    El navegador la guarda pero revalida con ETag (304 si no cambió): la URL es
+    solo el id, que con SQLite se puede reutilizar tras borrar un archivo.
+    """
+    if size not in PREVIEW_SIZES:
+        raise HTTPException(status_code=400, detail=f"size debe ser uno de: {', '.join(PREVIEW_SIZES)}")
+
+    file = await _get_owned_file(db, file_id, partition)
+    if not file:
+        raise NotFoundException("Archivo no encontrado")
+
+    target = preview_path(file.path, size)
+    if not target.exists():
+        # Aún no generada (o upload anterior a las previews): generarla ahora
+        if not supports_preview(file.original_name):
+            raise NotFoundException("Vista previa no disponible para este archivo")
+        await _ensure_hot(file)
+        if not Path(file.path).exists():
+            raise NotFoundException("Vista previa no disponible para este archivo")
+        if not await generate_previews(file.path, file.original_name, file.compression):
+            raise NotFoundException("No se pudo generar la vista previa")
+
+    # Archivo guardado (nombre aleatorio por subida) + versión de la preview
+    etag = ETag(value=f"{file.stored_name}-{target.stat().st_mtime_ns:x}")
+    headers = {"Cache-Control": "private, no-cache"}
+    if request.headers.get("if-none-match") == etag.to_header():
+        return Response(content=None, status_code=304, headers={**headers, "ETag": etag.to_header()})
+    return FileResponse(
+        path=target,
+        media_type="image/webp",
+        content_disposition_type="inline",
+        etag=etag,
+        headers=headers,
+    )
+
+
+@get("/files/events")
+async def analysis_events(request: Request, partition: DocumentPartition, file_id: Optional[int] = None) -> ServerSentEvent:
+    """
+    Stream SSE con las transiciones de estado de los análisis (queued, extracting,
+    calling_model, parsing, done, failed) de los archivos de la partición.
+    Soporta reconexión con Last-Event-ID.
+    """
+    last_event_id = request.headers.get("last-event-id")
+    try:
+        last_event_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        last_event_id = None
+
+    async def stream():
+        async for event in progress_broker.subscribe(partition, last_event_id=last_event_id, file_id=file_id):
+            if event is None:
+                yield ServerSentEventMessage(comment="keepalive")
+            else:
+                yield ServerSentEventMessage(data=event.to_json(), event="analysis", id=event.cursor)
+
+    return ServerSentEvent(stream(), retry_duration=3000)
+
+
 @get("/files/{file_id:int}/download")
-async def download_file(file_id: int, db: AsyncSession) -> FileResponse:
-    # Buscar el archivo en la base de datos
-    result = await db.execute(select(File).filter(File.id == file_id))
-    file = result.scalar_one_or_none()
+async def download_file(file_id: int, db: AsyncSession, partition: DocumentPartition, request: Request) -> FileResponse | Stream:
+    """Descarga el archivo original.
+
+    Si está guardado con zstd y el cliente acepta `zstd` se envían los bytes
+    comprimidos tal cual (Content-Encoding: zstd); si no, se descomprime en streaming.
+    """
+    # Buscar el archivo en la base de datos (solo dentro de la partición)
+    file = await _get_owned_file(db, file_id, partition)
 
     if not file:
         raise NotFoundException("Archivo no encontrado")
 
+    # Documento archivado: la primera descarga lo trae de vuelta del segmento
+    await _ensure_hot(file)
+
     # Verificar que el archivo existe en el sistema de archivos
     file_path = Path(file.path)
     if not file_path.exists():
@@ -229,6 +475,25 @@ async def download_file(file_id: int, db: AsyncSession) -> FileResponse:
     if mime_type is None:
         mime_type = "application/octet-stream"
 
+    if file.compression == ZSTD_ENCODING:
+        if accepts_zstd(request.headers.get("accept-encoding")):
+            return FileResponse(
+                path=file_path,
+                filename=file.original_name,
+                media_type=mime_type,
+                content_disposition_type="attachment",
+                headers={"Content-Encoding": ZSTD_ENCODING, "Vary": "Accept-Encoding"},
+            )
+        return Stream(
+            stream_decompressed(file_path),
+            media_type=mime_type,
+            headers={
+                "Content-Length": str(file.size),
+                "Content-Disposition": f"attachment; filename*=UTF-8''{quote(file.original_name)}",
+                "Vary": "Accept-Encoding",
+            },
+        )
+
     # Retornar el archivo para descarga
     return FileResponse(
         path=file_path,
@@ -239,61 +504,49 @@ async def download_file(file_id: int, db: AsyncSession) -> FileResponse:
 
 
 @get("/files/{file_id:int}/metadata")
-async def get_file_metadata(file_id: int, db: AsyncSession) -> MetadataResponse:
-    """Obtiene los metadatos de un archivo específico"""
-    result = await db.execute(
-        select(DocumentMetadata).filter(DocumentMetadata.file_id == file_id)
-    )
+async def get_file_metadata(
+    file_id: int, db: AsyncSession, partition: DocumentPartition, include: Optional[str] = None
+) -> MetadataResponse:
+    """Obtiene los metadatos de un archivo específico.
+
+    `include` es opcional: "extraction" (todo) o una lista separada por comas
+    de campos de la extracción completa, ej: include=extracted_text,key_data
+    """
+    result = await db.execute(apply_partition(
+        select(DocumentMetadata).join(File, File.id == DocumentMetadata.file_id).filter(DocumentMetadata.file_id == file_id),
+        partition.including_archived(),
+    ))
     metadata = result.scalar_one_or_none()
 
     if not metadata:
         raise NotFoundException("Metadatos no encontrados")
 
-    return MetadataResponse.from_orm(metadata)
+    response = MetadataResponse.from_orm(metadata)
 
+    if include:
+        requested = {field.strip() for field in include.split(",") if field.strip()}
+        if "extraction" in requested:
+            requested = set(EXTRACTION_FIELDS)
 
-@get("/search")
-async def search_documents(
-    db: AsyncSession,
-    query: Optional[str] = None,
-    document_type: Optional[str] = None,
-    company: Optional[str] = None,
-    date_from: Optional[str] = None,
-    date_to: Optional[str] = None,
-    min_amount: Optional[float] = None,
-    max_amount: Optional[float] = None,
-) -> list[dict]:
-    """Busca documentos por diferentes criterios"""
+        unknown = requested - set(EXTRACTION_FIELDS)
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Campos desconocidos en include: {', '.join(sorted(unknown))}")
 
-    # Construir query base
-    base_query = select(File, DocumentMetadata).outerjoin(
-        DocumentMetadata, File.id == DocumentMetadata.file_id
-    )
+        # Solo aquí se toca la tabla de extracciones
+        extraction = (await db.execute(
+            select(DocumentExtraction).filter(DocumentExtraction.metadata_id == metadata.id)
+        )).scalar_one_or_none()
 
-    # Aplicar filtros
-    if query:
-        base_query = base_query.where(
-            File.original_name.ilike(f"%{query}%") |
-            File.description.ilike(f"%{query}%") |
-            DocumentMetadata.description.ilike(f"%{query}%")
-        )
+        data = extraction.load() if extraction else {}
+        response.extraction = {field: data.get(field) for field in EXTRACTION_FIELDS if field in requested}
 
-    if document_type:
-        base_query = base_query.where(DocumentMetadata.document_type == document_type)
+    return response
 
-    if company:
-        base_query = base_query.where(
-            DocumentMetadata.company_name.ilike(f"%{company}%") |
-            DocumentMetadata.client_name.ilike(f"%{company}%")
-        )
 
-    if min_amount is not None:
-        base_query = base_query.where(DocumentMetadata.total_amount >= min_amount)
-
-    if max_amount is not None:
-        base_query = base_query.where(DocumentMetadata.total_amount <= max_amount)
-
-    result = await db.execute(base_query)
+@get("/search", dependencies={"filters": Provide(provide_search_filters)})
+async def search_documents(db: AsyncSession, filters: DocumentSearchFilters, partition: DocumentPartition) -> list[dict]:
+    """Busca documentos (de la partición del usuario) por diferentes criterios"""
+    result = await db.execute(files_with_metadata_query(filters, partition))
     files_with_metadata = result.all()
 
     # Formato de respuesta similar a get_files
@@ -304,10 +557,12 @@ async def search_documents(
             "stored_name": file_row.stored_name,
             "description": file_row.description,
             "size": file_row.size,
+            "archived": file_row.archived,
             "metadata": {
                 "document_type": metadata_row.document_type if metadata_row else None,
                 "company_name": metadata_row.company_name if metadata_row else None,
                 "total_amount": metadata_row.total_amount if metadata_row else None,
+                "tags": metadata_row.tags if metadata_row else None,
                 # ... otros campos
             } if metadata_row else None
         }
@@ -315,7 +570,101 @@ async def search_documents(
     ]
 
 
-routes = [index, upload_file, get_files, delete_file, update_file_description, download_file, get_file_metadata, search_documents]
+@get("/search/facets", dependencies={"filters": Provide(provide_search_filters)})
+async def search_facets(
+    db: AsyncSession, filters: DocumentSearchFilters, partition: DocumentPartition, limit: int = 50
+) -> dict:
+    """Cantidad de documentos por tag para los mismos filtros de /search"""
+    limit = max(1, min(limit, SEARCH_FACETS_MAX_LIMIT))
+    result = await db.execute(tag_facets_query(filters, limit=limit, partition=partition))
+    return {
+        "tags": [{"tag": tag, "count": count} for tag, count in result.all()]
+    }
+
+
+@get("/export", dependencies={"filters": Provide(provide_search_filters)})
+async def export_documents(
+    request: Request, filters: DocumentSearchFilters, partition: DocumentPartition,
+    format: str = "csv", gzip: bool = False,
+) -> Stream:
+    """Exporta los metadatos (mismos filtros que /search) en CSV o NDJSON, en streaming"""
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format debe ser uno de: {', '.join(EXPORT_FORMATS)}")
+
+    filename = f"documentos_{now():%Y%m%d_%H%M%S}.{format}"
+    media_type = "text/csv; charset=utf-8" if format == "csv" else "application/x-ndjson"
+    if gzip:
+        filename += ".gz"
+        media_type = "application/gzip"
+
+    return Stream(
+        stream_export(
+            filters, export_format=format, gzip=gzip,
+            session_factory=read_session_factory(request.scope), partition=partition,
+        ),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@get("/counterparties")
+async def search_counterparties(
+    db: AsyncSession, partition: DocumentPartition, q: str, limit: int = 10, fuzzy: bool = False
+) -> list[dict]:
+    """Autocompletado de emisores/clientes por prefijo de RUT o nombre.
+
+    Con `fuzzy=true` busca por similitud de nombre (trigramas) y agrega `score`.
+    Fuera del admin solo aparecen las contrapartes de los documentos propios, con su cuenta.
+    """
+    limit = min(limit, 50)
+    # El directorio es global: fuera del admin se restringe a los RUTs de la partición antes de rankear
+    counts = None if partition.all_owners else await CounterpartyRepository(db).document_counts(None, partition)
+    if fuzzy:
+        matches = await counterparty_directory.fuzzy_search(q, limit=limit, counts=counts)
+    else:
+        matches = [(entry, None) for entry in await counterparty_directory.search(q, limit=limit, counts=counts)]
+
+    return [
+        {
+            "rut": entry.rut,
+            "rut_formatted": format_rut(entry.rut),
+            "name": entry.name,
+            "document_count": entry.document_count,
+            **({"score": score} if fuzzy else {}),
+        }
+        for entry, score in matches
+    ]
+
+
+@get("/analysis/stats")
+async def get_analysis_stats(
+    db: AsyncSession, partition: DocumentPartition, date_from: Optional[date] = None, date_to: Optional[date] = None
+) -> dict:
+    """Latencia p50/p95 y costo de los análisis (tabla analysis_run) por tipo de documento y por día.
+
+    Rango inclusivo; por defecto los últimos ANALYSIS_STATS_DEFAULT_DAYS días. Solo
+    los análisis de archivos de la partición (el admin ve todos).
+    """
+    date_to = date_to or now().date()
+    date_from = date_from or date_to - timedelta(days=ANALYSIS_STATS_DEFAULT_DAYS - 1)
+    if date_from > date_to:
+        raise HTTPException(status_code=400, detail="date_from debe ser anterior a date_to")
+
+    return await analysis_run_stats(
+        db,
+        datetime.combine(date_from, datetime.min.time()),
+        datetime.combine(date_to + timedelta(days=1), datetime.min.time()),
+        partition,
+    )
+
+
+@get("/metrics")
+async def get_metrics() -> dict:
+    """Contadores del proceso (rutas de análisis, etc.), con la proporción de cada etiqueta"""
+    return {**metrics.snapshot(), "model_route_hit_rates": route_hit_rates()}
+
+
+routes = [index, health_check, upload_file, get_files, get_file_rows, get_file_row, delete_file, update_file_description, download_file, get_file_metadata, search_documents, search_facets, export_documents, search_counterparties, analysis_events, get_file_preview, get_analysis_stats, get_metrics]
 
 
 DEBUG_STATE = env_vars.environment == "dev"
@@ -333,11 +682,17 @@ def create_app() -> Litestar:
         route_handlers=[static_files, *routes],
         template_config=template_config,
         plugins=[
-            SQLAlchemyPlugin(config=config_db)
+            SQLAlchemyPlugin(config=config_db),
+            HTMXPlugin(),
         ],
+        # `db`: réplica de lectura para GET/HEAD si está configurada (ver infrastructure/db/replica.py)
+        dependencies={"db": Provide(provide_db), "partition": Provide(provide_partition)},
         debug=DEBUG_STATE,
         logging_config=logging_config,
-        middleware=[AuthMiddleware]
+        # Admisión primero: rechaza subidas antes de leer el cuerpo
+        middleware=[AdmissionMiddleware, AuthMiddleware, ReadYourWritesMiddleware],
+        request_max_body_size=env_vars.upload_max_body_bytes,
+        on_shutdown=[progress_broker.close, dispose_replica, shutdown_process_pool],
     )
 
 
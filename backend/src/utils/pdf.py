@@ -0,0 +1,20 @@
+from pathlib import Path
+
+import PyPDF2
+
+
+
+def extract_pdf_pages_text(file_path: str | Path) -> list[str]:
+    """Texto de cada página del PDF (string vacío si la página no tiene capa de texto)"""
+    with open(file_path, 'rb') as file:
+        pdf_reader = PyPDF2.PdfReader(file)
+        return [page.extract_text() or "" for page in pdf_reader.pages]
+
+
+def count_pdf_pages(file_path: str | Path) -> int:
+    with open(file_path, 'rb') as file:
+        return len(PyPDF2.PdfReader(file).pages)
+
+
+def extract_pdf_text(file_path: str | Path) -> str:
+    return "".join(text + "\n" for text in extract_pdf_pages_text(file_path))
@@ -0,0 +1,54 @@
+import re
+from typing import Optional
+
+
+
+_RUT_CLEAN_RE = re.compile(r"[^0-9kK]")
+
+
+def rut_check_digit(body: str | int) -> str:
+    """Calcula el dígito verificador (módulo 11) de un RUT chileno"""
+    total = 0
+    factor = 2
+    for digit in reversed(str(body)):
+        total += int(digit) * factor
+        factor = 2 if factor == 7 else factor + 1
+
+    remainder = 11 - (total % 11)
+    if remainder == 11:
+        return "0"
+    if remainder == 10:
+        return "K"
+    return str(remainder)
+
+
+def normalize_rut(value: Optional[str]) -> Optional[str]:
+    """
+    Lleva un RUT a su forma canónica: cuerpo sin ceros a la izquierda + DV en
+    mayúscula, sin puntos ni guión (ej: "76.123.456-k" -> "76123456K").
+    Retorna None si está vacío o si el dígito verificador no cuadra.
+    """
+    if not value:
+        return None
+
+    cleaned = _RUT_CLEAN_RE.sub("", str(value)).upper()
+    if len(cleaned) < 2:
+        return None
+
+    body, check_digit = cleaned[:-1].lstrip("0"), cleaned[-1]
+    if not body or not body.isdigit() or len(body) > 9:
+        return None
+
+    if rut_check_digit(body) != check_digit:
+        return None
+
+    return f"{body}{check_digit}"
+
+
+def format_rut(value: Optional[str]) -> Optional[str]:
+    """Formato de visualización: 76.123.456-K"""
+    rut = normalize_rut(value)
+    if not rut:
+        return None
+    body, check_digit = rut[:-1], rut[-1]
+    return f"{int(body):,}".replace(",", ".") + f"-{check_digit}"
@@ -0,0 +1,10 @@
+import re
+import unicodedata
+
+
+
+def fold_text(value: str) -> str:
+    """Minúsculas, sin tildes y con espacios colapsados ("Peñalolén" -> "penalolen")"""
+    decomposed = unicodedata.normalize("NFKD", value)
+    without_marks = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return re.sub(r"\s+", " ", without_marks).strip().lower()
@@ -0,0 +1,121 @@
+"""
+Worker de análisis: consume la tabla `analysis_job` independiente del servidor HTTP.
+
+    python -m src.worker
+    python -m src.worker --concurrency 8 --worker-id analisis-2
+
+Se pueden correr N workers en distintas máquinas contra la misma base de datos.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import signal
+import socket
+
+from src.core.config.settings import env_vars
+from src.infrastructure.db.session import get_db_session
+from src.infrastructure.db.repositories.analysis_job_repository import AnalysisJobRepository
+from src.application.document.services.analysis_service import run_analysis_job
+from src.infrastructure.events import progress_broker
+from src.gemini_service import init_gemini_service
+
+logger = logging.getLogger("src.worker")
+
+
+
+class AnalysisWorker:
+    def __init__(self, worker_id: str, concurrency: int, lease_seconds: int, poll_seconds: float, backoff_seconds: float):
+        self.worker_id = worker_id
+        self.concurrency = concurrency
+        self.lease_seconds = lease_seconds
+        self.poll_seconds = poll_seconds
+        self.backoff_seconds = backoff_seconds
+        self.running: set[int] = set()
+        self.stopping = asyncio.Event()
+
+    async def _heartbeat(self) -> None:
+        """Renueva el lease de los jobs en curso cada tercio del lease"""
+        while not self.stopping.is_set() or self.running:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                async with get_db_session() as session:
+                    await AnalysisJobRepository(session).heartbeat(list(self.running), self.worker_id, self.lease_seconds)
+            except Exception as e:
+                logger.error(f"Error renovando leases: {e}")
+
+    async def _run(self, job_id: int) -> None:
+        try:
+            await run_analysis_job(job_id, self.worker_id, self.backoff_seconds)
+        except Exception as e:
+            # El lease vencerá y otro worker (o este) lo reintentará
+            logger.error(f"Job {job_id}: error inesperado: {e}")
+        finally:
+            self.running.discard(job_id)
+
+    async def run(self) -> None:
+        heartbeat = asyncio.create_task(self._heartbeat())
+        tasks: set[asyncio.Task] = set()
+        logger.warning(f"Worker {self.worker_id} iniciado (concurrencia {self.concurrency})")
+
+        while not self.stopping.is_set():
+            free_slots = self.concurrency - len(self.running)
+            jobs = []
+            if free_slots > 0:
+                try:
+                    async with get_db_session() as session:
+                        jobs = await AnalysisJobRepository(session).claim(self.worker_id, free_slots, self.lease_seconds)
+                except Exception as e:
+                    logger.error(f"Error reclamando jobs: {e}")
+
+            for job in jobs:
+                self.running.add(job.id)
+                task = asyncio.create_task(self._run(job.id))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+
+            if not jobs:
+                try:
+                    await asyncio.wait_for(self.stopping.wait(), timeout=self.poll_seconds)
+                except asyncio.TimeoutError:
+                    pass
+
+        # Apagado ordenado: terminar lo que está en curso
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        heartbeat.cancel()
+        await progress_broker.close()
+        logger.warning(f"Worker {self.worker_id} detenido")
+
+
+async def main(args: argparse.Namespace) -> None:
+    if not env_vars.gemini_api_key:
+        raise SystemExit("GEMINI_API_KEY no configurada.")
+    init_gemini_service(env_vars.gemini_api_key)
+
+    worker = AnalysisWorker(
+        worker_id=args.worker_id,
+        concurrency=args.concurrency,
+        lease_seconds=env_vars.analysis_job_lease_seconds,
+        poll_seconds=args.poll_seconds,
+        backoff_seconds=env_vars.analysis_job_backoff_seconds,
+    )
+
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, worker.stopping.set)
+
+    await worker.run()
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Worker de análisis de documentos")
+    parser.add_argument("--worker-id", default=f"{socket.gethostname()}-{os.getpid()}")
+    parser.add_argument("--concurrency", type=int, default=env_vars.analysis_worker_concurrency)
+    parser.add_argument("--poll-seconds", type=float, default=2.0, help="Espera cuando no hay jobs")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    asyncio.run(main(parse_args()))